@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description: Counts the requests and the data exchanged between browser and server for common interactions
+             with the graph settings. The callbacks of a synthetic app are called through the dash endpoint
+             like the browser does: callbacks triggered by the changed properties, and by the properties
+             their responses change, are requested one by one.
+Usage:       python script/callback_payload_benchmark.py -n 2000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.callbacks import (  # noqa: E402
+    get_callbacks,
+    tsne_paras_to_string,
+    umap_paras_to_string,
+)
+from src.preprocessing import DataPreprocessor  # noqa: E402
+from src.projectionstore import ProjectionStore  # noqa: E402
+from src.structurecontainer import StructureContainer  # noqa: E402
+from src.visualization.visualizator import Visualizator  # noqa: E402
+
+UMAP_PARAS = dict(n_neighbours=25, min_dist=0.5, metric="euclidean")
+TSNE_PARAS = dict(
+    iterations=1000, perplexity=30.0, learning_rate="auto", tsne_metric="euclidean"
+)
+OTHER_UMAP_PARAS = dict(n_neighbours=10, min_dist=0.1, metric="euclidean")
+
+
+def create_app(n_points: int, n_groups: int, output_d: Path):
+    """
+    Creates the app with random embeddings and coordinates of all views, nothing is calculated
+    :param n_points: number of proteins
+    :param n_groups: number of groups
+    :param output_d: output directory of the app
+    :return: the app with its callbacks
+    """
+    rng = np.random.default_rng(42)
+    ids = [f"protein_{i}" for i in range(n_points)]
+
+    df = pd.DataFrame(
+        rng.normal(size=(n_points, len(DataPreprocessor.AXIS_NAMES))),
+        index=ids,
+        columns=DataPreprocessor.AXIS_NAMES,
+    )
+    df["group"] = rng.integers(0, n_groups, n_points).astype(str)
+    df["family"] = rng.integers(0, n_groups * 2, n_points).astype(str)
+    df["variance"] = np.nan
+    df.iloc[:3, df.columns.get_loc("variance")] = [40.0, 30.0, 20.0]
+    csv_header = ["group", "family"]
+
+    projection_store = ProjectionStore.from_df(
+        df,
+        {
+            "UMAP": umap_paras_to_string(UMAP_PARAS),
+            "TSNE": tsne_paras_to_string(TSNE_PARAS),
+        },
+    )
+    projection_store.add(
+        "UMAP", umap_paras_to_string(OTHER_UMAP_PARAS), df * 2
+    )
+    df = df.drop(columns=DataPreprocessor.AXIS_NAMES)
+
+    fig = Visualizator.render(
+        df,
+        "group",
+        None,
+        UMAP_PARAS,
+        TSNE_PARAS,
+        "PCA",
+        coords=projection_store.get("PCA", "3D", ""),
+    )
+    Visualizator.add_highlight_traces(fig)
+
+    visualizator = Visualizator(fig, csv_header, "PCA")
+    app = visualizator.get_base_app(UMAP_PARAS, TSNE_PARAS, ids)
+
+    get_callbacks(
+        app,
+        df,
+        None,
+        UMAP_PARAS,
+        TSNE_PARAS,
+        output_d,
+        csv_header,
+        rng.normal(size=(n_points, 32)),
+        ids,
+        dict(),
+        projection_store,
+        dict(),
+        StructureContainer(None, None),
+    )
+
+    return app
+
+
+def get_layout_values(app) -> dict:
+    """
+    :param app: the app
+    :return: values of all properties set in the layout, keyed by "id.property"
+    """
+    values = dict()
+    for component in app.layout._traverse():
+        component_id = getattr(component, "id", None)
+        if not isinstance(component_id, str):
+            continue
+        for prop in component._prop_names:
+            values[f"{component_id}.{prop}"] = getattr(component, prop, None)
+
+    return values
+
+
+def split_output(output: str) -> list:
+    """
+    :param output: output key of the callback map
+    :return: "id.property" of each output, without the suffix of duplicate outputs
+    """
+    return [
+        out.split("@")[0] for out in output.strip(".").split("...") if out
+    ]
+
+
+class Browser:
+    """
+    Requests the callbacks of the app the way the dash renderer does and counts the exchanged data
+    """
+
+    def __init__(self, app):
+        self.client = app.server.test_client()
+        self.values = get_layout_values(app)
+        self.values["session_id.data"] = "benchmark"
+
+        # server side callbacks only, clientside ones don't send requests
+        self.callbacks = {
+            output: callback
+            for output, callback in app.callback_map.items()
+            if "callback" in callback
+        }
+
+    def triggered_by(self, prop_ids: set, exclude: str = None) -> list:
+        """
+        :param prop_ids: changed properties
+        :param exclude: callback that changed the properties, not triggered by its own outputs
+        :return: callbacks with one of the properties as input
+        """
+        return [
+            output
+            for output, callback in self.callbacks.items()
+            if output != exclude
+            and any(
+                f"{inp['id']}.{inp['property']}" in prop_ids
+                for inp in callback["inputs"]
+            )
+        ]
+
+    def request(self, output: str, triggered: set):
+        """
+        Requests a callback with the current values
+        :param output: output key of the callback map
+        :param triggered: properties the callback is triggered by
+        :return: request and response in bytes, changed properties with their values
+        """
+        callback = self.callbacks[output]
+
+        def with_values(props: list) -> list:
+            return [
+                dict(
+                    prop,
+                    value=self.values.get(f"{prop['id']}.{prop['property']}"),
+                )
+                for prop in props
+            ]
+
+        outputs = [
+            dict(id=out.rsplit(".", 1)[0], property=out.rsplit(".", 1)[1])
+            for out in split_output(output)
+        ]
+        inputs = with_values(callback["inputs"])
+        body = json.dumps(
+            dict(
+                output=output,
+                outputs=outputs if len(outputs) > 1 else outputs[0],
+                inputs=inputs,
+                state=with_values(callback["state"]),
+                changedPropIds=[
+                    f"{inp['id']}.{inp['property']}"
+                    for inp in inputs
+                    if f"{inp['id']}.{inp['property']}" in triggered
+                ],
+            )
+        )
+        response = self.client.post(
+            "/_dash-update-component",
+            data=body,
+            content_type="application/json",
+        )
+
+        changed = dict()
+        if response.status_code == 200:
+            for component_id, props in json.loads(response.data)[
+                "response"
+            ].items():
+                for prop, value in props.items():
+                    changed[f"{component_id}.{prop}"] = value
+
+        return len(body), len(response.data), changed
+
+    def interact(self, changes: dict):
+        """
+        Changes properties like the user and requests all callbacks triggered by it, callbacks with
+        inputs that are outputs of other pending callbacks wait for them
+        :param changes: changed properties with their new values
+        :return: number of requests, request and response in bytes
+        """
+        self.values.update(changes)
+        pending = {
+            output: set(changes) for output in self.triggered_by(set(changes))
+        }
+
+        n_requests, sent, received = 0, 0, 0
+        while pending:
+            waiting_for = {
+                prop_id
+                for output in pending
+                for prop_id in split_output(output)
+            }
+            ready = [
+                output
+                for output in pending
+                if not any(
+                    f"{inp['id']}.{inp['property']}" in waiting_for
+                    and f"{inp['id']}.{inp['property']}"
+                    not in split_output(output)
+                    for inp in self.callbacks[output]["inputs"]
+                )
+            ] or list(pending)[:1]
+
+            for output in ready:
+                request, response, changed = self.request(
+                    output, pending.pop(output)
+                )
+                n_requests += 1
+                sent += request
+                received += response
+
+                self.values.update(changed)
+                for triggered in self.triggered_by(set(changed), output):
+                    pending.setdefault(triggered, set()).update(changed)
+
+        return n_requests, sent, received
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Requests and payload of the graph settings interactions"
+    )
+    parser.add_argument(
+        "-n", "--n_points", type=int, default=2000, help="Number of proteins"
+    )
+    parser.add_argument(
+        "-g", "--n_groups", type=int, default=10, help="Number of groups"
+    )
+    args = parser.parse_args()
+
+    interactions = [
+        ("type n_neighbours", {"n_neighbours_input.value": 10}),
+        ("type min_dist", {"min_dist_input.value": 0.2}),
+        ("UMAP tab", {"dim_red_tabs.active_tab": "UMAP"}),
+        (
+            "UMAP parameters",
+            {
+                "last_umap_paras_dd.value": umap_paras_to_string(
+                    OTHER_UMAP_PARAS
+                )
+            },
+        ),
+        ("2D", {"dim_radio.value": "2D"}),
+        ("other column", {"dd_menu.value": "family"}),
+        ("type iterations", {"iterations_input.value": 500}),
+    ]
+
+    with tempfile.TemporaryDirectory() as output_d:
+        browser = Browser(create_app(args.n_points, args.n_groups, Path(output_d)))
+
+        print(
+            f"{'interaction':>18} {'requests':>9} {'request':>12} {'response':>12}"
+            f" {'time (ms)':>10}"
+        )
+        for name, changes in interactions:
+            start = time.perf_counter()
+            n_requests, sent, received = browser.interact(changes)
+            duration = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{name:>18} {n_requests:>9} {sent:>12,} {received:>12,}"
+                f" {duration:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
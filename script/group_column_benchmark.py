@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description: Compares grouping the selected column for rendering with a boolean mask per group, as done
+             before, and with the single pass of Visualizator.group_column, on synthetic columns with
+             10 to 10,000 groups.
+Usage:       python script/group_column_benchmark.py -n 100000 -g 10 100 1000 10000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.visualization.visualizator import Visualizator  # noqa: E402
+
+
+def group_by_masks(values: pd.Series) -> tuple:
+    """
+    Grouping with a comparator sort and two boolean masks per group, like render did before
+    :param values: values of the column
+    :return: sorted groups, group index of each row and the row positions of each group
+    """
+
+    def my_comparator(val):
+        if isinstance(val, float) and not pd.isna(val) or isinstance(val, int):
+            return 0, val
+        elif pd.isna(val):
+            return 3, val
+        elif isinstance(val, str):
+            return 1, val.lower()
+        else:
+            return 2, val
+
+    col_groups = values.unique().tolist()
+    col_groups.sort(key=my_comparator)
+
+    codes = np.full(len(values), -100)
+    group_rows = list()
+    for group_idx, group_value in enumerate(col_groups):
+        if not pd.isna(group_value):
+            group_mask = (values == group_value).to_numpy()
+        else:
+            group_mask = values.isna().to_numpy()
+        group_rows.append(np.flatnonzero(group_mask))
+        codes[(values == group_value).to_numpy()] = group_idx
+
+    return col_groups, codes, group_rows
+
+
+def timed(function, repeats: int) -> float:
+    """
+    :param function: function without arguments
+    :param repeats: number of calls, the fastest one is reported
+    :return: duration in ms
+    """
+    durations = list()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Grouping of the selected column for rendering"
+    )
+    parser.add_argument(
+        "-n", "--n_points", type=int, default=100000, help="Number of proteins"
+    )
+    parser.add_argument(
+        "-g",
+        "--n_groups",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 10000],
+        help="Number of groups",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeats",
+        type=int,
+        default=1,
+        help="Repeats per measurement, the masks take minutes for 10,000 groups",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(
+        f"{'groups':>8} {'masks (ms)':>12} {'one pass (ms)':>14}"
+        f" {'speedup':>8}"
+    )
+    for n_groups in args.n_groups:
+        values = pd.Series(
+            rng.integers(0, n_groups, args.n_points).astype(str), dtype=object
+        )
+        # some proteins without value
+        values[rng.random(args.n_points) < 0.05] = np.nan
+
+        masks = timed(lambda: group_by_masks(values), args.repeats)
+        one_pass = timed(
+            lambda: Visualizator.group_column(values), args.repeats
+        )
+
+        print(
+            f"{n_groups:>8} {masks:>12.1f} {one_pass:>14.1f}"
+            f" {masks / one_pass:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description: Compares the size of the data exchanged between browser and server when a molecule of
+             the graph is clicked: the whole figure sent to the server as state and back as output,
+             a partial update of the highlighting traces and the camera, and the clientside callback
+             that highlights in the browser without a request.
+Usage:       python script/highlight_payload_benchmark.py -n 10000 100000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from dash import Patch
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.visualization.visualizator import Visualizator  # noqa: E402
+
+CAMERA = {"eye": {"x": 1.25, "y": 1.25, "z": 1.25}}
+
+
+def create_df(n_points: int, n_groups: int) -> pd.DataFrame:
+    """
+    Creates a dataframe with random PCA coordinates and groups
+    :param n_points: number of proteins
+    :param n_groups: number of groups
+    :return: dataframe like the one of the application
+    """
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(
+        rng.normal(size=(n_points, 3)),
+        index=[f"protein_{i}" for i in range(n_points)],
+        columns=["x_pca_3D", "y_pca_3D", "z_pca_3D"],
+    )
+    df["group"] = rng.integers(0, n_groups, n_points).astype(str)
+    df["variance"] = np.nan
+    df.iloc[:3, df.columns.get_loc("variance")] = [40.0, 30.0, 20.0]
+
+    return df
+
+
+def full_figure_click(fig_json: str, seq_id: str, df: pd.DataFrame):
+    """
+    Old click handling: the figure is rebuilt from the state and sent back completely
+    :param fig_json: figure as sent by the browser
+    :param seq_id: clicked protein
+    :param df: dataframe
+    :return: sizes of request and response in bytes
+    """
+    fig = go.Figure(json.loads(fig_json))
+    Visualizator.add_highlight_traces(fig)
+    fig.update_traces(
+        x=[df.at[seq_id, "x_pca_3D"]],
+        y=[df.at[seq_id, "y_pca_3D"]],
+        z=[df.at[seq_id, "z_pca_3D"]],
+        selector=dict(marker_symbol="circle-open", marker_color="black"),
+        overwrite=True,
+    )
+    fig.update_layout(scene_camera=CAMERA)
+
+    return len(fig_json), len(to_json_plotly(fig))
+
+
+def patch_click(seq_id: str, df: pd.DataFrame):
+    """
+    New click handling: only the clicked highlighting trace and the camera are updated
+    :param seq_id: clicked protein
+    :param df: dataframe
+    :return: sizes of request and response in bytes
+    """
+    fig = Patch()
+    fig["data"][-2].update(
+        x=[df.at[seq_id, "x_pca_3D"]],
+        y=[df.at[seq_id, "y_pca_3D"]],
+        z=[df.at[seq_id, "z_pca_3D"]],
+    )
+    fig["layout"]["scene"]["camera"] = CAMERA
+
+    return 0, len(to_json_plotly(fig))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Payload size of highlighting a clicked molecule"
+    )
+    parser.add_argument(
+        "-n",
+        "--n_points",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Number of proteins",
+    )
+    parser.add_argument(
+        "-g", "--n_groups", type=int, default=10, help="Number of groups"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'points':>8} {'method':>12} {'request':>12} {'response':>12}"
+        f" {'time (ms)':>10}"
+    )
+    for n_points in args.n_points:
+        df = create_df(n_points, args.n_groups)
+        fig = Visualizator.render(
+            df,
+            selected_column="group",
+            original_id_col=None,
+            umap_paras=dict(),
+            tsne_paras=dict(),
+            dim_red="PCA",
+        )
+        Visualizator.add_highlight_traces(fig)
+        fig_json = to_json_plotly(fig)
+        seq_id = df.index[n_points // 2]
+
+        for method, click in [
+            ("full figure", lambda: full_figure_click(fig_json, seq_id, df)),
+            ("patch", lambda: patch_click(seq_id, df)),
+            ("clientside", lambda: (0, 0)),
+        ]:
+            start = time.perf_counter()
+            request, response = click()
+            duration = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{n_points:>8} {method:>12} {request:>12,} {response:>12,}"
+                f" {duration:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description: Measures the time to encode a rendered 3D figure as JSON with the built-in json module,
+             with orjson and with typed arrays of the FigureEncoder, and the size and time of their
+             responses compressed with zstd, brotli and gzip by the app with --compress. Engines and
+             encodings that aren't installed are skipped, compression needs dash[compress].
+Usage:       python script/response_compression_benchmark.py -n 10000 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dash import html
+from flask import Response
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.figureencoder import FigureEncoder  # noqa: E402
+from src.visualization.base import get_app  # noqa: E402
+from src.visualization.visualizator import Visualizator  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def create_df(n_points: int, n_groups: int) -> pd.DataFrame:
+    """
+    Creates a dataframe with random PCA coordinates and groups
+    :param n_points: number of proteins
+    :param n_groups: number of groups
+    :return: dataframe like the one of the application
+    """
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(
+        rng.normal(size=(n_points, 3)),
+        index=[f"protein_{i}" for i in range(n_points)],
+        columns=["x_pca_3D", "y_pca_3D", "z_pca_3D"],
+    )
+    df["group"] = rng.integers(0, n_groups, n_points).astype(str)
+    df["variance"] = np.nan
+    df.iloc[:3, df.columns.get_loc("variance")] = [40.0, 30.0, 20.0]
+
+    return df
+
+
+def timed(function, repeats: int):
+    """
+    :param function: function without arguments
+    :param repeats: number of calls, the fastest one is reported
+    :return: result of the function and its duration in ms
+    """
+    durations = list()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return result, min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Encoding and compression of the figure responses"
+    )
+    parser.add_argument(
+        "-n",
+        "--n_points",
+        type=int,
+        nargs="+",
+        default=[10000, 100000],
+        help="Number of proteins",
+    )
+    parser.add_argument(
+        "-g", "--n_groups", type=int, default=10, help="Number of groups"
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=3, help="Repeats per measurement"
+    )
+    args = parser.parse_args()
+
+    # the responses are compressed by the app as it is served with --compress
+    app = get_app(compress=True)
+    app.layout = html.Div()
+    server = app.server
+    response_data = dict()
+
+    @server.route("/figure")
+    def figure():
+        return Response(response_data["figure"], mimetype="application/json")
+
+    client = server.test_client()
+
+    engines = ["json"] + (["orjson"] if orjson is not None else [])
+
+    print(f"{'points':>8} {'step':>20} {'bytes':>12} {'time (ms)':>10}")
+    for n_points in args.n_points:
+        df = create_df(n_points, args.n_groups)
+        fig = Visualizator.render(
+            df,
+            selected_column="group",
+            original_id_col=None,
+            umap_paras=dict(),
+            tsne_paras=dict(),
+            dim_red="PCA",
+        )
+        Visualizator.add_highlight_traces(fig)
+        fig_dict = fig.to_plotly_json()
+        figure_encoder = FigureEncoder(df.index)
+
+        fig_jsons = dict()
+        for engine in engines:
+            fig_jsons[engine], duration = timed(
+                lambda: to_json_plotly(fig_dict, engine=engine), args.repeats
+            )
+            print(
+                f"{n_points:>8} {engine + ' encode':>20}"
+                f" {len(fig_jsons[engine]):>12,} {duration:>10.1f}"
+            )
+
+        fig_jsons["typed arrays"], duration = timed(
+            lambda: to_json_plotly(figure_encoder.encode(fig_dict)),
+            args.repeats,
+        )
+        print(
+            f"{n_points:>8} {'typed arrays encode':>20}"
+            f" {len(fig_jsons['typed arrays']):>12,} {duration:>10.1f}"
+        )
+
+        for name in [engines[-1], "typed arrays"]:
+            response_data["figure"] = fig_jsons[name].encode()
+            for encoding in ["zstd", "br", "gzip"]:
+                response, duration = timed(
+                    lambda: client.get(
+                        "/figure", headers={"Accept-Encoding": encoding}
+                    ),
+                    args.repeats,
+                )
+                # not installed
+                if response.headers.get("Content-Encoding") != encoding:
+                    continue
+
+                print(
+                    f"{n_points:>8} {name + ' ' + encoding:>20}"
+                    f" {len(response.data):>12,} {duration:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description: Measures the time to render a 2D figure with SVG and with WebGL traces and the size of the
+             figure sent to the browser, encoded by the FigureEncoder like the responses of the callbacks.
+Usage:       python script/webgl_render_benchmark.py -n 10000 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.figureencoder import FigureEncoder  # noqa: E402
+from src.visualization.visualizator import Visualizator  # noqa: E402
+
+
+def create_df(n_points: int, n_groups: int) -> pd.DataFrame:
+    """
+    Creates a dataframe with random PCA coordinates and groups
+    :param n_points: number of proteins
+    :param n_groups: number of groups
+    :return: dataframe like the one of the application
+    """
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(
+        rng.normal(size=(n_points, 3)),
+        index=[f"protein_{i}" for i in range(n_points)],
+        columns=["x_pca_3D", "y_pca_3D", "z_pca_3D"],
+    )
+    df["group"] = rng.integers(0, n_groups, n_points).astype(str)
+    df["variance"] = np.nan
+    df.iloc[:3, df.columns.get_loc("variance")] = [40.0, 30.0, 20.0]
+
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rendering of 2D figures with SVG and WebGL"
+    )
+    parser.add_argument(
+        "-n",
+        "--n_points",
+        type=int,
+        nargs="+",
+        default=[10000, 100000, 1000000],
+        help="Number of proteins",
+    )
+    parser.add_argument(
+        "-g", "--n_groups", type=int, default=10, help="Number of groups"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'points':>8} {'renderer':>9} {'render (ms)':>12}"
+        f" {'encode (ms)':>12} {'bytes':>12}"
+    )
+    for n_points in args.n_points:
+        df = create_df(n_points, args.n_groups)
+        figure_encoder = FigureEncoder(df.index)
+
+        for renderer, webgl in [("svg", False), ("webgl", True)]:
+            start = time.perf_counter()
+            fig = Visualizator.render(
+                df,
+                selected_column="group",
+                original_id_col=None,
+                umap_paras=dict(),
+                tsne_paras=dict(),
+                dim_red="PCA",
+                two_d=True,
+                webgl=webgl,
+            )
+            Visualizator.add_highlight_traces(fig, two_d=True)
+            render_duration = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            fig_json = to_json_plotly(figure_encoder.encode(fig))
+            encode_duration = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{n_points:>8} {renderer:>9} {render_duration:>12.1f}"
+                f" {encode_duration:>12.1f} {len(fig_json):>12,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
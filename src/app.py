@@ -7,8 +7,21 @@ from pathlib import Path
 
 import yaml
 
-from src.callbacks import get_callbacks, get_callbacks_pdb
+from src.callbacks import (
+    get_callbacks,
+    get_callbacks_pdb,
+    tsne_paras_to_string,
+    umap_paras_to_string,
+)
+from src.columncatalogue import ColumnCatalogue
+from src.figurecache import FigureCache
+from src.figureencoder import FigureEncoder
+from src.idindex import IdIndex
 from src.preprocessing import DataPreprocessor
+from src.projectionstore import ProjectionStore
+from src.queryprojector import QueryProjector
+from src.routes import get_routes
+from src.startup import StartupTimer, enable_numba_cache, warm_up_umap
 from src.structurecontainer import StructureContainer
 from src.visualization.visualizator import Visualizator
 
@@ -88,6 +101,9 @@ class LoadConfFile(argparse.Action):
             arguments.append("--pca")
         if "tsne" in dictionary.keys():
             arguments.append("--tsne")
+        if "dim" in dictionary.keys():
+            arguments.append("--dim")
+            arguments.append(str(dictionary["dim"]))
         if "iterations" in dictionary.keys():
             arguments.append("--iterations")
             arguments.append(str(dictionary["iterations"]))
@@ -109,9 +125,27 @@ class LoadConfFile(argparse.Action):
         if "metric" in dictionary.keys():
             arguments.append("--metric")
             arguments.append(str(dictionary["metric"]))
+        if "landmarks" in dictionary.keys():
+            arguments.append("--landmarks")
+            arguments.append(str(dictionary["landmarks"]))
+        if "landmark_col" in dictionary.keys():
+            arguments.append("--landmark_col")
+            arguments.append(str(dictionary["landmark_col"]))
+        if "landmark_placement" in dictionary.keys():
+            arguments.append("--landmark_placement")
+            arguments.append(str(dictionary["landmark_placement"]))
         if "port" in dictionary.keys():
             arguments.append("--port")
             arguments.append(str(dictionary["port"]))
+        if "compress" in dictionary.keys():
+            if dictionary["compress"]:
+                arguments.append("--compress")
+        if "webgl" in dictionary.keys():
+            if dictionary["webgl"]:
+                arguments.append("--webgl")
+        if "legend_groups" in dictionary.keys():
+            arguments.append("--legend_groups")
+            arguments.append(str(dictionary["legend_groups"]))
         if "verbose" in dictionary.keys():
             arguments.append("--verbose")
             arguments.append(str(dictionary["verbose"]))
@@ -137,6 +171,7 @@ class Parser:
             self.conf,
             self.pca_flag,
             self.tsne_flag,
+            self.dim,
             self.iterations,
             self.perplexity,
             self.learning_rate,
@@ -144,7 +179,13 @@ class Parser:
             self.n_neighbours,
             self.min_dist,
             self.metric,
+            self.n_landmarks,
+            self.landmark_col,
+            self.landmark_placement,
             self.port,
+            self.compress,
+            self.webgl,
+            self.legend_groups,
             self.verbose,
         ) = self._parse_args()
 
@@ -166,6 +207,7 @@ class Parser:
             self.conf,
             self.pca_flag,
             self.tsne_flag,
+            self.dim,
             self.iterations,
             self.perplexity,
             self.learning_rate,
@@ -173,7 +215,13 @@ class Parser:
             self.n_neighbours,
             self.min_dist,
             self.metric,
+            self.n_landmarks,
+            self.landmark_col,
+            self.landmark_placement,
             self.port,
+            self.compress,
+            self.webgl,
+            self.legend_groups,
             self.verbose,
         )
 
@@ -296,6 +344,17 @@ class Parser:
             help="t-SNE is initially used as dimensionality reduction",
         )
         # Optional argument
+        parser.add_argument(
+            "--dim",
+            required=False,
+            default="3D",
+            choices=["2D", "3D"],
+            help=(
+                "Initially displayed dimension, only this view is calculated"
+                " at startup, default: 3D"
+            ),
+        )
+        # Optional argument
         parser.add_argument(
             "--iterations",
             required=False,
@@ -346,6 +405,34 @@ class Parser:
             default="euclidean",
             help="Metric used for UMAP calculation, default: euclidean",
         )
+        parser.add_argument(
+            "--landmarks",
+            required=False,
+            type=int,
+            default=None,
+            help=(
+                "Fit UMAP & t-SNE only on this number of sampled proteins"
+                " (landmarks) and place the others, for very large sets. Use"
+                " --reset after changing it."
+            ),
+        )
+        parser.add_argument(
+            "--landmark_col",
+            required=False,
+            default=None,
+            help="CSV column the landmark sample is stratified by.",
+        )
+        parser.add_argument(
+            "--landmark_placement",
+            required=False,
+            default="knn",
+            choices=["knn", "transform"],
+            help=(
+                "Placement of the proteins that aren't landmarks, knn"
+                " interpolates the nearest landmarks, transform uses the"
+                " fitted UMAP (t-SNE always uses knn), default: knn"
+            ),
+        )
         parser.add_argument(
             "--port",
             required=False,
@@ -353,6 +440,36 @@ class Parser:
             default=8050,
             help="Port on which the website is locally hosted.",
         )
+        parser.add_argument(
+            "--compress",
+            required=False,
+            action="store_true",
+            help=(
+                "Compress the responses of the server, e.g. the figures,"
+                " with flask-compress, needs dash[compress]."
+            ),
+        )
+        parser.add_argument(
+            "--webgl",
+            required=False,
+            action="store_true",
+            help=(
+                "Draw all 2D graphs with WebGL. By default only graphs with"
+                f" more than {Visualizator.WEBGL_THRESHOLD} proteins are."
+            ),
+        )
+        parser.add_argument(
+            "--legend_groups",
+            required=False,
+            type=int,
+            default=Visualizator.LEGEND_GROUPS,
+            help=(
+                "Number of groups with most proteins shown in the legend, the"
+                " others are shown as other and can be searched for in the"
+                " graph settings. 0 shows all groups, default:"
+                f" {Visualizator.LEGEND_GROUPS}"
+            ),
+        )
         parser.add_argument(
             "-v",
             "--verbose",
@@ -378,6 +495,7 @@ class Parser:
         conf_file = args.configuration
         pca_flag = args.pca
         tsne_flag = args.tsne
+        dim = args.dim
         iterations = args.iterations
         perplexity = args.perplexity
         learning_rate = args.learning_rate
@@ -385,7 +503,13 @@ class Parser:
         n_neighbours = args.n_neighbours
         min_dist = args.min_dist
         metric = args.metric
+        n_landmarks = args.landmarks
+        landmark_col = args.landmark_col
+        landmark_placement = args.landmark_placement
         port = args.port
+        compress = args.compress
+        webgl = args.webgl
+        legend_groups = args.legend_groups
         verbose = args.verbose
 
         return (
@@ -402,6 +526,7 @@ class Parser:
             conf_file,
             pca_flag,
             tsne_flag,
+            dim,
             iterations,
             perplexity,
             learning_rate,
@@ -409,7 +534,13 @@ class Parser:
             n_neighbours,
             min_dist,
             metric,
+            n_landmarks,
+            landmark_col,
+            landmark_placement,
             port,
+            compress,
+            webgl,
+            legend_groups,
             verbose,
         )
 
@@ -438,11 +569,15 @@ def required_arguments_check(hdf_path: Path, output_d: Path):
             )
 
 
-def setup():
+def setup(timer: StartupTimer = None):
     """
     Handles the process of the application
+    :param timer: collects the duration of the startup phases
     :return: app & html_flag
     """
+    if timer is None:
+        timer = StartupTimer()
+
     # Create Application object
     parser = Parser()
 
@@ -461,6 +596,7 @@ def setup():
         conf,
         pca_flag,
         tsne_flag,
+        dim,
         iterations,
         perplexity,
         learning_rate,
@@ -468,7 +604,13 @@ def setup():
         n_neighbours,
         min_dist,
         metric,
+        n_landmarks,
+        landmark_col,
+        landmark_placement,
         port,
+        compress,
+        webgl,
+        legend_groups,
         verbose,
     ) = parser.get_params()
 
@@ -507,25 +649,38 @@ def setup():
         umap_paras,
         tsne_paras,
         verbose,
+        # calculate UMAP & t-SNE in the background while the app is served, not if only html files are written
+        progressive=html_cols is None,
+        n_landmarks=n_landmarks,
+        landmark_col=landmark_col,
+        landmark_placement=landmark_placement,
+        dim=dim,
+        # decided by the number of proteins if not set
+        webgl=True if webgl else None,
+        legend_groups=legend_groups,
     )
 
     # Preprocessing
-    (
-        df,
-        fig,
-        csv_header,
-        original_id_col,
-        embeddings,
-        embedding_uids,
-        distance_dic,
-        fasta_dict,
-    ) = data_preprocessor.data_preprocessing()
+    with timer.phase("preprocessing"):
+        (
+            df,
+            fig,
+            csv_header,
+            original_id_col,
+            embeddings,
+            embedding_uids,
+            distance_dic,
+            fasta_dict,
+        ) = data_preprocessor.data_preprocessing()
 
     # initialize structure container if flag set
     structure_container = StructureContainer(pdb_d, json_d)
 
-    # Create visualization object
-    visualizator = Visualizator(fig, csv_header, dim_red)
+    # dimensionality reductions still calculated in the background
+    projection_worker = data_preprocessor.projection_worker
+    pending_dim_reds = list()
+    if projection_worker is not None:
+        pending_dim_reds = projection_worker.pending_dim_reds()
 
     # get ids of the proteins
     if original_id_col is not None:
@@ -533,14 +688,64 @@ def setup():
     else:
         ids = df.index.to_list()
 
-    umap_paras_dict = data_preprocessor.get_umap_paras_dict(df)
-    tsne_paras_dict = data_preprocessor.get_tsne_paras_dict(df)
+    # coordinates are sent as typed arrays and texts as indices into the IDs
+    fig = FigureEncoder(ids).encode(fig)
+
+    # Create visualization object
+    visualizator = Visualizator(
+        fig, csv_header, dim_red, pending_dim_reds, dim
+    )
+
+    # coordinates of the views are kept apart from the metadata
+    projection_store = ProjectionStore.from_df(
+        df,
+        {
+            "UMAP": umap_paras_to_string(umap_paras),
+            "TSNE": tsne_paras_to_string(tsne_paras),
+        },
+    )
+    df = df.drop(columns=DataPreprocessor.AXIS_NAMES, errors="ignore")
+
+    # groups, colors and ranges of the columns, saved next to the projections
+    with timer.phase("column catalogue"):
+        column_catalogue = ColumnCatalogue.from_df(
+            df, csv_header, output_d / f"columns_{hdf_path.stem}.pkl", reset
+        )
+
+    # lookups between mapped and original IDs used by the callbacks
+    id_index = IdIndex(df.index, original_id_col)
+
+    # rendered figures of the views, shared by the callbacks and the monitoring route
+    figure_cache = FigureCache()
+
+    # IDs of the embeddings as displayed in the graph
+    embedding_ids = id_index.to_original(embedding_uids)
+
+    # UMAP & t-SNE are only fitted on the landmarks
+    landmarks = data_preprocessor.landmarks
+    landmark_idx = landmarks.indexes if landmarks is not None else None
+
+    # projection of new embeddings into the map
+    query_projector = QueryProjector(
+        embeddings,
+        embedding_ids,
+        output_d / f"models_{hdf_path.stem}.pkl",
+        umap_paras,
+        verbose,
+        landmark_idx=landmark_idx,
+        fitted_models=data_preprocessor.umap_models,
+    )
 
     # --- APP creation ---
-    if structure_container.pdb_flag:
-        application = visualizator.get_pdb_app(ids, umap_paras, tsne_paras)
-    else:
-        application = visualizator.get_base_app(umap_paras, tsne_paras, ids)
+    with timer.phase("layout"):
+        if structure_container.pdb_flag:
+            application = visualizator.get_pdb_app(
+                ids, umap_paras, tsne_paras, compress
+            )
+        else:
+            application = visualizator.get_base_app(
+                umap_paras, tsne_paras, ids, compress
+            )
 
     return (
         application,
@@ -550,9 +755,7 @@ def setup():
         original_id_col,
         dim_red,
         umap_paras,
-        umap_paras_dict,
         tsne_paras,
-        tsne_paras_dict,
         output_d,
         csv_header,
         port,
@@ -560,6 +763,16 @@ def setup():
         embedding_uids,
         distance_dic,
         fasta_dict,
+        projection_worker,
+        query_projector,
+        landmarks,
+        id_index,
+        figure_cache,
+        projection_store,
+        column_catalogue,
+        True if webgl else None,
+        legend_groups,
+        verbose,
     )
 
 
@@ -568,6 +781,13 @@ def main():
     Most general processing of the script
     :return: None
     """
+    timer = StartupTimer()
+
+    # compiled UMAP kernels are reused from the disk cache of the last start, UMAP is imported in the
+    # background with the cache enabled, so this has to stay before anything imports UMAP
+    with timer.phase("numba cache"):
+        enable_numba_cache()
+
     (
         app,
         html,
@@ -576,9 +796,7 @@ def main():
         orig_id_col,
         dim_red,
         umap_paras,
-        umap_paras_dict,
         tsne_paras,
-        tsne_paras_dict,
         output_d,
         csv_header,
         port,
@@ -586,7 +804,17 @@ def main():
         embedding_uids,
         distance_dic,
         fasta_dict,
-    ) = setup()
+        projection_worker,
+        query_projector,
+        landmarks,
+        id_index,
+        figure_cache,
+        projection_store,
+        column_catalogue,
+        webgl,
+        legend_groups,
+        verbose,
+    ) = setup(timer)
 
     # don't start server if html is needed
     if not html:
@@ -603,12 +831,21 @@ def main():
                 embeddings,
                 embedding_uids,
                 distance_dic,
-                umap_paras_dict,
-                tsne_paras_dict,
+                projection_store,
                 fasta_dict,
                 struct_container,
+                projection_worker,
+                landmarks,
+                id_index,
+                figure_cache,
+                column_catalogue=column_catalogue,
+                webgl=webgl,
+                legend_groups=legend_groups,
+                query_projector=query_projector,
+            )
+            get_callbacks_pdb(
+                app, df, struct_container, orig_id_col, id_index
             )
-            get_callbacks_pdb(app, df, struct_container, orig_id_col)
         else:
             get_callbacks(
                 app,
@@ -621,13 +858,34 @@ def main():
                 embeddings,
                 embedding_uids,
                 distance_dic,
-                umap_paras_dict,
-                tsne_paras_dict,
+                projection_store,
                 fasta_dict,
                 struct_container,
+                projection_worker,
+                landmarks,
+                id_index,
+                figure_cache,
+                column_catalogue=column_catalogue,
+                webgl=webgl,
+                legend_groups=legend_groups,
+                query_projector=query_projector,
             )
 
-        app.run_server(debug=True, port=port)
+        # HTTP API to project new embeddings into the map
+        get_routes(app, query_projector, figure_cache)
+
+        # compile UMAP while the app is served, not if it is already calculated in the background
+        if (
+            projection_worker is None
+            or "UMAP" not in projection_worker.pending_dim_reds()
+        ):
+            warm_up_umap(timer, verbose)
+
+        if verbose:
+            print(timer.report())
+
+        # the reloader would start a second process running the whole setup again
+        app.run_server(debug=True, port=port, use_reloader=False)
 
 
 if __name__ == "__main__":
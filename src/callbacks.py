@@ -2,70 +2,37 @@
 # -*- coding: utf-8 -*-
 
 import json
+import threading
+import uuid
 from pathlib import Path
 from statistics import mean
 
 import dash
-import dash_bio.utils.ngl_parser as ngl_parser
 import dash_bootstrap_components as dbc
-import numpy
 import numpy as np
-import plotly.graph_objects as go
-from dash import Input, Output, State, html
+import pandas as pd
+import plotly.io as pio
+from dash import ClientsideFunction, Input, Output, State, html
 from dash.exceptions import PreventUpdate
 from pandas import DataFrame
 
-from scipy.spatial.distance import cdist, squareform
-from scipy.stats import spearmanr
 from itertools import groupby
-from sklearn.metrics import silhouette_score
-from sklearn.manifold import trustworthiness
 
+from src.columncatalogue import ColumnCatalogue
+from src.figurecache import FigureCache
+from src.figureencoder import FigureEncoder
+from src.idindex import IdIndex
+from src.landmarks import Landmarks
 from src.preprocessing import DataPreprocessor
+from src.projectionstore import ProjectionStore
+from src.projectionworker import ProjectionWorker
+from src.queryprojector import QueryProjector
+from src.sessionstore import SessionStore
+from src.spatialindex import SpatialIndex
 from src.structurecontainer import StructureContainer
 from src.visualization.visualizator import Visualizator
 
 
-def to_mapped_id(
-    sel_original_seq_ids: list, original_id_col: list, df: DataFrame
-):
-    """
-    Converts IDs from original to mapped
-    :param sel_original_seq_ids: selected original sequence IDs
-    :param original_id_col: list of original IDs
-    :param df: Dataframe with all data
-    :return: sequence IDs in mapped
-    """
-    seq_ids = list()
-
-    for seq_id in sel_original_seq_ids:
-        index_num = original_id_col.index(seq_id)
-        mapped_id = df.index[index_num]
-        seq_ids.append(mapped_id)
-
-    return seq_ids
-
-
-def to_original_id(
-    sel_mapped_seq_ids: list, original_id_col: list, df: DataFrame
-):
-    """
-    Converts IDs from mapped to original
-    :param sel_mapped_seq_ids: selected mapped sequence IDs
-    :param original_id_col: list of original IDs
-    :param df: Dataframe with all data
-    :return: sequence IDs in mapped
-    """
-    seq_ids = list()
-
-    for seq_id in sel_mapped_seq_ids:
-        index_num = df.index.get_indexer_for([seq_id])[0]
-        original_id = original_id_col[index_num]
-        seq_ids.append(original_id)
-
-    return seq_ids
-
-
 def handle_highlighting(
     seq_ids: list,
     struct_container: StructureContainer,
@@ -201,11 +168,70 @@ def clickdata_to_seqid(click_data: dict):
     return seq_id
 
 
+def relayout_to_viewport(relayout_data: dict):
+    """
+    Takes the axis ranges of a zoomed or panned 2D graph from its relayout data
+    :param relayout_data: graph relayout data
+    :return: minimum and maximum of the x and y axis, None for an axis without range, "reset" if the
+    axes were reset and None if the axes didn't change
+    """
+    if not relayout_data:
+        return None
+
+    if relayout_data.get("xaxis.autorange") or relayout_data.get(
+        "yaxis.autorange"
+    ):
+        return "reset"
+
+    viewport = list()
+    for axis in ["xaxis", "yaxis"]:
+        if f"{axis}.range[0]" in relayout_data:
+            viewport.append(
+                [
+                    relayout_data[f"{axis}.range[0]"],
+                    relayout_data[f"{axis}.range[1]"],
+                ]
+            )
+        elif f"{axis}.range" in relayout_data:
+            viewport.append(list(relayout_data[f"{axis}.range"]))
+        else:
+            viewport.append(None)
+
+    if viewport == [None, None]:
+        return None
+
+    return viewport
+
+
+def selection_to_rows(selected_data: dict, spatial_index: SpatialIndex):
+    """
+    Finds the proteins selected with the box or lasso in the spatial index of the displayed view
+    :param selected_data: graph selected data
+    :param spatial_index: spatial index over the coordinates of the view
+    :return: positions of the selected proteins, None if nothing is selected
+    """
+    if not selected_data:
+        return None
+
+    if "range" in selected_data:
+        axis_ranges = selected_data["range"]
+        return spatial_index.box([axis_ranges.get("x"), axis_ranges.get("y")])
+
+    if "lassoPoints" in selected_data:
+        lasso_points = selected_data["lassoPoints"]
+        return spatial_index.lasso(
+            np.column_stack([lasso_points["x"], lasso_points["y"]])
+        )
+
+    return None
+
+
 def get_callbacks_pdb(
     app: dash.Dash,
     df: DataFrame,
     struct_container: StructureContainer,
     original_id_col: list,
+    id_index: IdIndex = None,
 ):
     """
     Holds callbacks needed for pdb layout
@@ -213,8 +239,11 @@ def get_callbacks_pdb(
     :param df: dataframe with all data
     :param struct_container: structure container handling files
     :param original_id_col: list with original IDs
+    :param id_index: index of the mapped and original IDs, created if not given
     :return: None
     """
+    if id_index is None:
+        id_index = IdIndex(df.index, original_id_col)
 
     @app.callback(
         Output("ngl_molecule_viewer", "data"),
@@ -274,7 +303,7 @@ def get_callbacks_pdb(
         saved_seq_ids = list()
         if dd_molecules is not None:
             if original_id_col is not None:
-                seq_ids = to_mapped_id(dd_molecules, original_id_col, df)
+                seq_ids = id_index.to_mapped(dd_molecules)
             else:
                 seq_ids = dd_molecules
 
@@ -318,6 +347,9 @@ def get_callbacks_pdb(
             seq_ids, struct_container, range_start, range_end, selected_atoms
         )
 
+        # imported here, takes seconds and only needed once a molecule is displayed
+        import dash_bio.utils.ngl_parser as ngl_parser
+
         # data format for molecule viewer
         data_list = [
             ngl_parser.get_data(
@@ -337,7 +369,7 @@ def get_callbacks_pdb(
         mapped_seq_ids = seq_ids
         if original_id_col is not None:
             # back to original IDs
-            seq_ids = to_original_id(seq_ids, original_id_col, df)
+            seq_ids = id_index.to_original(seq_ids)
 
         # enable download button at first protein selection
         download_disabled = False
@@ -553,6 +585,36 @@ def get_callbacks_pdb(
         return left_width, right_width
 
 
+def umap_paras_to_string(umap_paras: dict) -> str:
+    """
+    :param umap_paras: UMAP parameters in dictionary
+    :return: string representation of the UMAP parameters
+    """
+    return (
+        str(umap_paras["n_neighbours"])
+        + " ; "
+        + str(umap_paras["min_dist"])
+        + " ; "
+        + umap_paras["metric"]
+    )
+
+
+def tsne_paras_to_string(tsne_paras: dict) -> str:
+    """
+    :param tsne_paras: TSNE parameters in dictionary
+    :return: string representation of the TSNE parameters
+    """
+    return (
+        str(tsne_paras["iterations"])
+        + " ; "
+        + str(tsne_paras["perplexity"])
+        + " ; "
+        + str(tsne_paras["learning_rate"])
+        + " ; "
+        + str(tsne_paras["tsne_metric"])
+    )
+
+
 def get_callbacks(
     app,
     df: DataFrame,
@@ -564,115 +626,472 @@ def get_callbacks(
     embeddings: np.stack,
     embedding_uids: list,
     distance_dic: dict,
-    umap_paras_dict: dict,
-    tsne_paras_dict: dict,
+    projection_store: ProjectionStore,
     fasta_dict: dict,
     struct_container: StructureContainer,
+    projection_worker: ProjectionWorker = None,
+    landmarks: Landmarks = None,
+    id_index: IdIndex = None,
+    figure_cache: FigureCache = None,
+    session_store: SessionStore = None,
+    column_catalogue: ColumnCatalogue = None,
+    webgl: bool = None,
+    legend_groups: int = None,
+    query_projector: QueryProjector = None,
 ):
     """
     General callbacks needed for application
     :param app: application
     :param df: dataframe with all data
     :param original_id_col: list of original IDs
-    :param umap_paras: UMAP parameters in dictionary
-    :param tsne_paras: TSNE parameters in dictionary
+    :param umap_paras: UMAP parameters of the start in dictionary, not changed by the sessions
+    :param tsne_paras: TSNE parameters of the start in dictionary, not changed by the sessions
     :param output_d: output directory
     :param csv_header: the csv headers
     :param embeddings: the embeddings in a numpy stack
     :param embedding_uids: the unique IDs of the embeddings
     :param distance_dic: different distance metrices, euclidean, cosine and manhattan
-    :param umap_paras_dict: already calculated UMAP parameters and their coordinates
+    :param projection_store: coordinates of the calculated views of all parameters
     :param fasta_dict: fasta file in dictionary format
     :param struct_container: the structure container handling files
+    :param projection_worker: worker calculating UMAP & t-SNE in the background, None if all are present
+    :param landmarks: landmarks UMAP & t-SNE are fitted on, None to fit on all proteins
+    :param id_index: index of the mapped and original IDs, created if not given
+    :param figure_cache: cache of the rendered figures, created if not given
+    :param session_store: displayed parameters of each browser session, created if not given
+    :param column_catalogue: descriptions of the columns, columns are described when first displayed if
+    not given
+    :param webgl: if True 2D graphs are drawn with WebGL, if None only graphs with many proteins
+    :param legend_groups: number of groups with most proteins displayed in the legend, the others are
+    folded into "other", Visualizator.LEGEND_GROUPS if None
+    :param query_projector: projects query embeddings into the map, gets the UMAP models fitted with the
+    parameters of the start
     :return:
     """
+    if id_index is None:
+        id_index = IdIndex(df.index, original_id_col)
+
+    if figure_cache is None:
+        figure_cache = FigureCache()
+
+    if column_catalogue is None:
+        column_catalogue = ColumnCatalogue()
+
+    # IDs displayed in the graph, built once instead of on each render
+    display_ids = np.asarray(
+        original_id_col if original_id_col is not None else df.index,
+        dtype=object,
+    )
+
+    # texts of the points are sent as indices into the IDs of the layout
+    figure_encoder = FigureEncoder(display_ids)
+
+    if session_store is None:
+        session_store = SessionStore(dict(UMAP=umap_paras, TSNE=tsne_paras))
+
+    # parameters of the start, only their coordinates are saved in the df.csv
+    initial_umap_paras_string = umap_paras_to_string(umap_paras)
+    initial_tsne_paras_string = tsne_paras_to_string(tsne_paras)
+
+    # positions of the embeddings by their ID
+    embedding_index = pd.Index(embedding_uids)
+
+    # views are only calculated once, even if requested by several callbacks at the same time, with a lock
+    # per view, so calculating one doesn't block the sessions displaying others
+    view_locks = dict()
+    view_locks_lock = threading.Lock()
+    # views finished in the background are collected and added at once
+    collect_lock = threading.Lock()
+    # the df.csv is written by one thread at a time
+    save_lock = threading.Lock()
+
+    def get_view_lock(dim_red: str, dim: str, paras_string: str):
+        """
+        :param dim_red: dimensionality reduction
+        :param dim: 2D or 3D
+        :param paras_string: string representation of the parameters
+        :return: lock of the calculation of the view
+        """
+        with view_locks_lock:
+            return view_locks.setdefault(
+                (dim_red, dim, paras_string), threading.Lock()
+            )
+
+    def get_paras(session_id: str, dim_red: str):
+        """
+        :param session_id: ID of the browser session
+        :param dim_red: dimensionality reduction
+        :return: parameters displayed in the session and their string representation, PCA has none
+        """
+        if dim_red == "UMAP":
+            paras = session_store.paras(session_id, dim_red)
+            return paras, umap_paras_to_string(paras)
+        if dim_red == "TSNE":
+            paras = session_store.paras(session_id, dim_red)
+            return paras, tsne_paras_to_string(paras)
+
+        return None, ""
+
+    def add_projection(dim_red: str, coords_df: DataFrame, paras: dict):
+        """
+        Registers calculated coordinates with their parameters in the projection store
+        :param dim_red: UMAP or TSNE
+        :param coords_df: coordinates of one or more views
+        :param paras: parameters of the calculation
+        :return: None
+        """
+        if dim_red == "UMAP":
+            paras_string = umap_paras_to_string(paras)
+        else:
+            paras_string = tsne_paras_to_string(paras)
+
+        # merged with the views already calculated for these parameters
+        projection_store.add(dim_red, paras_string, coords_df)
+
+        # queries are projected with the UMAP models of the start
+        if (
+            query_projector is not None
+            and dim_red == "UMAP"
+            and paras_string == initial_umap_paras_string
+        ):
+            query_projector.save_fitted_models()
+
+        # figures rendered with the old coordinates
+        figure_cache.invalidate(dim_red)
+
+    def ensure_projection(dim_red: str, dim: str, session_id: str):
+        """
+        Calculates a view of UMAP or t-SNE with the parameters displayed in the session the first time
+        it is needed, waits for it if it is already calculated in the background, and persists it
+        :param dim_red: selected dimensionality reduction
+        :param dim: selected dimension, 2D or 3D
+        :param session_id: ID of the browser session
+        :return: None
+        """
+        paras, paras_string = get_paras(session_id, dim_red)
+
+        # views already calculated don't wait for any lock
+        if projection_store.has_view(dim_red, dim, paras_string):
+            return
+
+        with get_view_lock(dim_red, dim, paras_string):
+            if projection_store.has_view(dim_red, dim, paras_string):
+                return
+
+            # the background calculation uses the parameters of the start
+            if projection_worker is not None and paras_string in [
+                initial_umap_paras_string,
+                initial_tsne_paras_string,
+            ]:
+                result = projection_worker.wait(dim_red, dim)
+                if result is not None:
+                    add_projection(dim_red, *result)
+                else:
+                    # collected by the polling meanwhile, wait until it is added
+                    with collect_lock:
+                        pass
+
+            if not projection_store.has_view(dim_red, dim, paras_string):
+                if dim_red == "UMAP":
+                    # the models of the start are kept for the query projection
+                    models = None
+                    if (
+                        query_projector is not None
+                        and paras_string == initial_umap_paras_string
+                    ):
+                        models = query_projector.fitted_models
+
+                    coords_df = DataPreprocessor.generate_umap(
+                        embeddings, paras, landmarks, [dim], models=models
+                    )
+                else:
+                    coords_df = DataPreprocessor.generate_tsne(
+                        embeddings, paras, landmarks, [dim]
+                    )
+                coords_df.index = embedding_uids
+
+                add_projection(dim_red, coords_df, paras)
+
+            save_df()
+
+    def save_df():
+        """
+        Saves the dataframe with the views calculated for the parameters of the start as df.csv
+        :return: None
+        """
+        if projection_worker is None:
+            return
+
+        with save_lock:
+            df_save = df
+            for dim_red, paras_string in [
+                ("PCA", ""),
+                ("UMAP", initial_umap_paras_string),
+                ("TSNE", initial_tsne_paras_string),
+            ]:
+                df_save = df_save.join(
+                    projection_store.to_frame(dim_red, paras_string),
+                    how="left",
+                )
+
+            df_save.to_csv(
+                projection_worker.df_path,
+                index_label=projection_worker.index_name,
+            )
+
+    def get_figure(
+        selected_column: str,
+        dim_red: str,
+        dim: str,
+        session_id: str,
+        download: bool = False,
+        viewport: list = None,
+        promoted: list = None,
+    ) -> dict:
+        """
+        Takes the figure of a view from the figure cache or renders it
+        :param selected_column: column the graph is colored by
+        :param dim_red: dimensionality reduction
+        :param dim: 2D or 3D
+        :param session_id: ID of the browser session, gives the displayed parameters
+        :param download: whether the figure is rendered for downloading
+        :param viewport: minimum and maximum of the axes, only the proteins inside are rendered and the
+        figure isn't cached
+        :param promoted: groups displayed in the legend in addition to the largest ones
+        :return: figure in dictionary format, with encoded traces if not for downloading
+        """
+        two_d = dim == "2D"
+        _, paras_string = get_paras(session_id, dim_red)
+
+        # the proteins in the viewport and nearest to the cells of the density grid are looked up
+        spatial_index = None
+        if viewport is not None or len(df) > Visualizator.LOD_THRESHOLD:
+            spatial_index = projection_store.spatial_index(
+                dim_red, dim, paras_string
+            )
+
+        def render():
+            fig = Visualizator.render(
+                df,
+                selected_column,
+                display_ids,
+                session_store.paras(session_id, "UMAP"),
+                session_store.paras(session_id, "TSNE"),
+                dim_red,
+                two_d,
+                download,
+                projection_store.get(dim_red, dim, paras_string),
+                webgl=webgl,
+                column_info=column_catalogue.get(df, selected_column),
+                viewport=viewport,
+                spatial_index=spatial_index,
+                legend_groups=legend_groups,
+                promoted=promoted,
+            )
+            if not download:
+                # Add traces with open circles that have no values, but will be filled if something has to be highlighted
+                Visualizator.add_highlight_traces(fig, two_d)
+
+                # hydrated in the browser
+                return figure_encoder.encode(fig)
+
+            return fig
+
+        if viewport is not None:
+            return render()
+
+        return figure_cache.get(
+            FigureCache.key(
+                selected_column, dim_red, paras_string, dim, download, promoted
+            ),
+            render,
+        )
+
+    @app.callback(
+        Output("session_id", "data"),
+        Input("session_id", "modified_timestamp"),
+        State("session_id", "data"),
+    )
+    def set_session_id(modified_timestamp: int, session_id: str):
+        """
+        Gives a new browser session an ID, reloading the page keeps it
+        :param modified_timestamp: time the ID was set, -1 if never
+        :param session_id: ID of the browser session
+        :return: new ID of the session
+        """
+        # Make redundant variable used
+        if modified_timestamp:
+            pass
+
+        if session_id is not None:
+            raise PreventUpdate
+
+        return uuid.uuid4().hex
+
+    def get_paras_options(dim_red: str, initial_paras_string: str) -> list:
+        """
+        :param dim_red: UMAP or TSNE
+        :param initial_paras_string: parameters of the start, selectable even if not calculated yet
+        :return: options of the dropdown menu with the calculated parameters
+        """
+        return [initial_paras_string] + [
+            paras_string
+            for paras_string in projection_store.paras_strings(dim_red)
+            if paras_string != initial_paras_string
+        ]
 
     @app.callback(
-        Output("graph", "figure"),
         Output("n_neighbours_input", "disabled"),
         Output("min_dist_input", "disabled"),
         Output("metric_input", "disabled"),
-        Output("last_umap_paras_dd", "options"),
         Output("last_umap_paras_dd", "disabled"),
         Output("umap_recalculation_button", "disabled"),
+        Input("dim_red_tabs", "active_tab"),
+        Input("n_neighbours_input", "value"),
+        Input("min_dist_input", "value"),
+        Input("metric_input", "value"),
+    )
+    def validate_umap_paras(
+        dim_red: str, n_neighbours: int, min_dist: float, metric: str
+    ):
+        """
+        Enables the UMAP parameter inputs on the UMAP tab and the recalculation button if the values are valid
+        :param dim_red: selected dimensionality reduction
+        :param n_neighbours: UMAP value n_neighbours
+        :param min_dist: UMAP value min_dist
+        :param metric: UMAP value metric
+        :return: disabled flags of the inputs, the dropdown menu and the button
+        """
+        disabled = dim_red != "UMAP"
+
+        # Disable recalculating when one of the values is empty or min dist is out of bounds
+        invalid = (
+            n_neighbours is None
+            or min_dist is None
+            or metric is None
+            or min_dist > 1.0
+        )
+
+        return disabled, disabled, disabled, disabled, disabled or invalid
+
+    @app.callback(
         Output("n_neighbours_input", "value"),
         Output("min_dist_input", "value"),
         Output("metric_input", "value"),
+        Output("last_umap_paras_dd", "options"),
         Output("last_umap_paras_dd", "value"),
+        Output("load_umap_spinner", "children"),
+        Input("umap_recalculation_button", "n_clicks"),
+        Input("last_umap_paras_dd", "value"),
+        State("n_neighbours_input", "value"),
+        State("min_dist_input", "value"),
+        State("metric_input", "value"),
+        State("dim_radio", "value"),
+        State("session_id", "data"),
+        prevent_initial_call=True,
+    )
+    def switch_umap_paras(
+        recal_button_clicks: int,
+        umap_paras_dd_value: str,
+        n_neighbours: int,
+        min_dist: float,
+        metric: str,
+        dim: str,
+        session_id: str,
+    ):
+        """
+        Displays UMAP with parameters of already calculated ones, or calculates it with new parameters.
+        The graph is rendered by update_graph on the changed value of the dropdown menu.
+        :param recal_button_clicks: Button for recalculating UMAP with new values and applying these.
+        :param umap_paras_dd_value: selected UMAP parameters of already calculated ones
+        :param n_neighbours: UMAP value n_neighbours
+        :param min_dist: UMAP value min_dist
+        :param metric: UMAP value metric
+        :param dim: chosen dimension, 2D or 3D
+        :param session_id: ID of the browser session
+        :return: parameter inputs, dropdown menu and spinner variables
+        """
+        # Make redundant variable used
+        if recal_button_clicks:
+            pass
+
+        ctx = dash.callback_context
+        umap_paras, _ = get_paras(session_id, "UMAP")
+
+        # If umap parameters are selected in the dropdown menu
+        if ctx.triggered_id == "last_umap_paras_dd":
+            splits = umap_paras_dd_value.split(" ; ")
+            umap_paras["n_neighbours"] = int(splits[0])
+            umap_paras["min_dist"] = float(splits[1])
+            umap_paras["metric"] = splits[2]
+            session_store.set_paras(session_id, "UMAP", umap_paras)
+
+            return (
+                umap_paras["n_neighbours"],
+                umap_paras["min_dist"],
+                umap_paras["metric"],
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+            )
+
+        # UMAP parameters are changed and accepted
+        umap_paras["n_neighbours"] = n_neighbours
+        umap_paras["min_dist"] = min_dist
+        umap_paras["metric"] = metric
+        session_store.set_paras(session_id, "UMAP", umap_paras)
+
+        # only the displayed view, the other one is calculated when selected
+        ensure_projection("UMAP", dim, session_id)
+
+        return (
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+            get_paras_options("UMAP", initial_umap_paras_string),
+            umap_paras_to_string(umap_paras),
+            "Output for UMAP spinner",
+        )
+
+    @app.callback(
         Output("iterations_input", "value"),
         Output("perplexity_input", "value"),
         Output("learning_rate_input", "value"),
         Output("tsne_metric_input", "value"),
-        Output("last_tsne_paras_dd", "value"),
         Output("last_tsne_paras_dd", "options"),
-        Output("highlighting_bool", "data"),
-        Output("relayoutData_save", "data"),
-        Output("load_umap_spinner", "children"),
-        Output("load_graph_spinner", "children"),
-        Output("molecules_dropdown", "value"),
-        Output("clicked_mol_storage", "data"),
-        Input("dd_menu", "value"),
-        Input("dim_red_tabs", "active_tab"),
-        Input("n_neighbours_input", "value"),
-        Input("min_dist_input", "value"),
-        Input("metric_input", "value"),
-        Input("umap_recalculation_button", "n_clicks"),
-        Input("last_umap_paras_dd", "value"),
-        Input("iterations_input", "value"),
-        Input("perplexity_input", "value"),
-        Input("learning_rate_input", "value"),
-        Input("tsne_metric_input", "value"),
+        Output("last_tsne_paras_dd", "value"),
         Input("tsne_recalculation_button", "n_clicks"),
         Input("last_tsne_paras_dd", "value"),
-        Input("graph", "clickData"),
-        Input("highlighting_bool", "data"),
-        Input("relayoutData_save", "data"),
-        Input("dim_radio", "value"),
-        Input("molecules_dropdown", "value"),
-        Input("clicked_mol_storage", "data"),
-        State("graph", "figure"),
-        State("graph", "relayoutData"),
+        State("iterations_input", "value"),
+        State("perplexity_input", "value"),
+        State("learning_rate_input", "value"),
+        State("tsne_metric_input", "value"),
+        State("dim_radio", "value"),
+        State("session_id", "data"),
+        prevent_initial_call=True,
     )
-    def update_graph(
-        selected_value: str,
-        dim_red: str,
-        n_neighbours: int,
-        min_dist: float,
-        metric: str,
-        recal_button_clicks: int,
-        umap_paras_dd_value: str,
+    def switch_tsne_paras(
+        tsne_recal_button_clicks: int,
+        tsne_paras_dd_value: str,
         iterations: int,
         perplexity: int,
         learning_rate: str,
         tsne_metric: str,
-        tsne_recal_button_clicks: int,
-        tsne_paras_dd_value: str,
-        click_data: dict,
-        highlighting_bool: bool,
-        relayout_data_save: dict,
         dim: str,
-        dd_molecules: list,
-        last_clicked_mol: str,
-        fig: go.Figure,
-        relayout_data: dict,
+        session_id: str,
     ):
         """
-        Handles updating the graph when another group is selected, dimensionality reduction has changed,
-        new parameters for UMAP should be calculated and applied, or a trace is removed/added for highlighting
-        :param selected_value: selected group in dropdown menu
-        :param dim_red: selected dimensionality reduction
-        :param n_neighbours: UMAP value n_neighbours
-        :param min_dist: UMAP value min_dist
-        :param metric: UMAP value metric
-        :param recal_button_clicks: Button for recalculating UMAP with new values and applying these.
-        :param umap_paras_dd_value: selected UMAP parameters of already calculated ones
-        :param click_data: data received from clicking the graph
-        :param highlighting_bool: boolean indicating whether highlighting circle is already displayed or not
-        :param relayout_data_save: relayout dict of the last click, needed for buggy plotly
-        :param fig: graph Figure
-        :param relayout_data: scene data of the graph
+        Displays t-SNE with parameters of already calculated ones, or calculates it with new parameters.
+        The graph is rendered by update_graph on the changed value of the dropdown menu.
+        :param tsne_recal_button_clicks: Button for recalculating t-SNE with new values and applying these.
+        :param tsne_paras_dd_value: selected t-SNE parameters of already calculated ones
+        :param iterations: t-SNE value iterations
+        :param perplexity: t-SNE value perplexity
+        :param learning_rate: t-SNE value learning rate, auto or a number
+        :param tsne_metric: t-SNE value metric
         :param dim: chosen dimension, 2D or 3D
-        :return: Output variables
+        :param session_id: ID of the browser session
+        :return: parameter inputs and dropdown menu variables
         """
 
         def is_number(s):
@@ -682,505 +1101,400 @@ def get_callbacks(
             except ValueError:
                 return False
 
-        # Check whether an input is triggered
+        # Make redundant variable used
+        if tsne_recal_button_clicks:
+            pass
+
         ctx = dash.callback_context
-        if not ctx.triggered:
+        tsne_paras, _ = get_paras(session_id, "TSNE")
+
+        # If tsne parameters are selected in the dropdown menu
+        if ctx.triggered_id == "last_tsne_paras_dd":
+            splits = tsne_paras_dd_value.split(" ; ")
+            tsne_paras["iterations"] = int(splits[0])
+            tsne_paras["perplexity"] = float(splits[1])
+            tsne_paras["learning_rate"] = splits[2]
+            tsne_paras["tsne_metric"] = splits[3]
+            session_store.set_paras(session_id, "TSNE", tsne_paras)
+
+            return (
+                tsne_paras["iterations"],
+                tsne_paras["perplexity"],
+                tsne_paras["learning_rate"],
+                tsne_paras["tsne_metric"],
+                dash.no_update,
+                dash.no_update,
+            )
+
+        # check whether learning rate is auto or a number
+        learning_rate = learning_rate.replace(",", ".")
+        if is_number(learning_rate):
+            learning_rate = float(learning_rate)
+        elif learning_rate != "auto":
             raise PreventUpdate
 
-        disable_recal_umap_button_return = (
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            True,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
-            dash.no_update,
+        # t-SNE parameters are changed and accepted
+        tsne_paras["iterations"] = iterations
+        tsne_paras["perplexity"] = perplexity
+        tsne_paras["learning_rate"] = learning_rate
+        tsne_paras["tsne_metric"] = tsne_metric
+        session_store.set_paras(session_id, "TSNE", tsne_paras)
+
+        # only the displayed view, the other one is calculated when selected
+        ensure_projection("TSNE", dim, session_id)
+
+        return (
             dash.no_update,
             dash.no_update,
             dash.no_update,
             dash.no_update,
+            get_paras_options("TSNE", initial_tsne_paras_string),
+            tsne_paras_to_string(tsne_paras),
         )
 
-        # Prevent constant resetting of the graph
-        if ctx.triggered_id in [
-            "n_neighbours_input",
-            "min_dist_input",
-            "metric_input",
-        ]:
-            # Disable recalculating when one of the values is empty
-            if min_dist is None or n_neighbours is None or metric is None:
-                return disable_recal_umap_button_return
-
-            # Disable recalculating when min dist is out of bounds
-            if min_dist > 1.0:
-                return disable_recal_umap_button_return
-            else:
-                return (
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    False,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                    dash.no_update,
-                )
-
-        if ctx.triggered_id in [
-            "iterations_input",
-            "perplexity_input",
-            "learning_rate_input",
-            "tsne_metric_input",
-        ]:
+    @app.callback(
+        Output("graph_data", "data"),
+        Output("load_graph_spinner", "children"),
+        Input("dd_menu", "value"),
+        Input("dim_red_tabs", "active_tab"),
+        Input("last_umap_paras_dd", "value"),
+        Input("last_tsne_paras_dd", "value"),
+        Input("dim_radio", "value"),
+        Input("legend_dd", "value"),
+        State("session_id", "data"),
+    )
+    def update_graph(
+        selected_value: str,
+        dim_red: str,
+        umap_paras_dd_value: str,
+        tsne_paras_dd_value: str,
+        dim: str,
+        promoted: list,
+        session_id: str,
+    ):
+        """
+        Renders the graph when another group is selected, dimensionality reduction or dimension has changed,
+        or other parameters are displayed. Highlighting is done in the browser.
+        :param selected_value: selected group in dropdown menu
+        :param dim_red: selected dimensionality reduction
+        :param umap_paras_dd_value: displayed UMAP parameters, already set in the session
+        :param tsne_paras_dd_value: displayed t-SNE parameters, already set in the session
+        :param dim: chosen dimension, 2D or 3D
+        :param promoted: groups displayed in the legend in addition to the largest ones
+        :param session_id: ID of the browser session
+        :return: graph and spinner variables
+        """
+        # Check whether an input is triggered
+        ctx = dash.callback_context
+        if not ctx.triggered:
             raise PreventUpdate
 
-        # Make redundant variable used
-        if recal_button_clicks or tsne_recal_button_clicks:
+        # Make redundant variables used
+        if umap_paras_dd_value or tsne_paras_dd_value:
             pass
 
         # In case dropdown menu is being cleared
         if selected_value is None:
             raise PreventUpdate
 
-        # load df into inner scope so that it can be modified
-        nonlocal df
-
-        # If plotly relayoutData is bugged and dict is empty for a reason, use last saved relayoutData
-        if not relayout_data or "scene.camera" not in relayout_data:
-            relayout_data = relayout_data_save
-
-        # convert original to mapped IDs
-        seq_ids = list()
-        if dd_molecules is not None:
-            if original_id_col is not None:
-                seq_ids = to_mapped_id(dd_molecules, original_id_col, df)
-            else:
-                seq_ids = dd_molecules
+        # views of UMAP & t-SNE are calculated the first time they are displayed
+        if dim_red != "PCA":
+            ensure_projection(dim_red, dim, session_id)
 
-        # triggered by click on graph
-        clicked_seq_id = last_clicked_mol
-        if ctx.triggered_id == "graph":
-            clicked_seq_id = clickdata_to_seqid(click_data)
+        fig = get_figure(
+            selected_value, dim_red, dim, session_id, promoted=promoted
+        )
 
-            if original_id_col is not None:
-                clicked_seq_id = to_mapped_id(
-                    [clicked_seq_id], original_id_col, df
-                )[0]
+        return fig, "Output for graph spinner"
 
-            # Add to seq ids or replace last clicked molecule
-            if last_clicked_mol is None:
-                seq_ids.append(clicked_seq_id)
-            else:
-                for idx, value in enumerate(seq_ids):
-                    if value == last_clicked_mol:
-                        seq_ids[idx] = clicked_seq_id
+    @app.callback(
+        Output("graph_data", "data", allow_duplicate=True),
+        Input("graph", "relayoutData"),
+        State("dd_menu", "value"),
+        State("dim_red_tabs", "active_tab"),
+        State("dim_radio", "value"),
+        State("session_id", "data"),
+        State("legend_dd", "value"),
+        prevent_initial_call=True,
+    )
+    def update_viewport(
+        relayout_data: dict,
+        selected_value: str,
+        dim_red: str,
+        dim: str,
+        session_id: str,
+        promoted: list,
+    ):
+        """
+        Views with more proteins than the level of detail threshold are drawn as a density grid. Zooming
+        into a 2D graph renders the proteins inside the viewport, at full resolution if they are few
+        enough, resetting the axes displays the whole view again. The level of detail only applies to 2D,
+        3D graphs stay a density grid when zoomed.
+        :param relayout_data: graph relayout data
+        :param selected_value: selected group in dropdown menu
+        :param dim_red: selected dimensionality reduction
+        :param dim: chosen dimension, 2D or 3D
+        :param session_id: ID of the browser session
+        :param promoted: groups displayed in the legend in addition to the largest ones
+        :return: graph
+        """
+        # 2D only: zooming a 3D graph moves the camera, its relayout data has no axis ranges the
+        # displayed proteins could be queried with
+        if (
+            len(df) <= Visualizator.LOD_THRESHOLD
+            or dim != "2D"
+            or selected_value is None
+        ):
+            raise PreventUpdate
 
-        # triggered by the molecule dropdown menu
-        if ctx.triggered_id == "molecules_dropdown":
-            # set clicked sequence id to None if the selection was deleted in the dropdown menu
-            if clicked_seq_id not in seq_ids:
-                clicked_seq_id = None
+        viewport = relayout_to_viewport(relayout_data)
+        if viewport is None:
+            raise PreventUpdate
 
-        mapped_seq_ids = seq_ids
-        if original_id_col is not None:
-            # back to original IDs
-            seq_ids = to_original_id(seq_ids, original_id_col, df)
+        if viewport == "reset":
+            return get_figure(
+                selected_value, dim_red, dim, session_id, promoted=promoted
+            )
 
-        # convert dictionary state of graph figure into go object
-        fig = go.Figure(fig)
+        return get_figure(
+            selected_value,
+            dim_red,
+            dim,
+            session_id,
+            viewport=viewport,
+            promoted=promoted,
+        )
 
-        umap_axis_names = ["x_umap_3D", "y_umap_3D", "z_umap_3D", "x_umap_2D", "y_umap_2D"]
+    @app.callback(
+        Output("legend_dd", "value"),
+        Input("dd_menu", "value"),
+        State("legend_dd", "value"),
+        prevent_initial_call=True,
+    )
+    def reset_legend(selected_value: str, promoted: list):
+        """
+        Groups promoted to the legend belong to the column they were searched in
+        :param selected_value: selected group in dropdown menu
+        :param promoted: groups displayed in the legend in addition to the largest ones
+        :return: no promoted groups
+        """
+        # Make redundant variable used
+        if selected_value:
+            pass
 
-        # If umap parameters are selected in the dropdown menu
-        if ctx.triggered_id == "last_umap_paras_dd":
-            splits = umap_paras_dd_value.split(" ; ")
-            umap_paras["n_neighbours"] = int(splits[0])
-            umap_paras["min_dist"] = float(splits[1])
-            umap_paras["metric"] = splits[2]
+        # an unchanged value would render the graph a second time
+        if not promoted:
+            raise PreventUpdate
 
-            df.drop(labels=umap_axis_names, axis="columns", inplace=True)
-            coords_df = umap_paras_dict[umap_paras_dd_value]
-            df = df.join(coords_df, how="left")
+        return []
 
-        # If UMAP parameters are changed and accepted
-        if ctx.triggered_id == "umap_recalculation_button":
-            umap_paras["n_neighbours"] = n_neighbours
-            umap_paras["min_dist"] = min_dist
-            umap_paras["metric"] = metric
+    @app.callback(
+        Output("legend_dd", "options"),
+        Input("legend_dd", "search_value"),
+        State("dd_menu", "value"),
+        State("legend_dd", "value"),
+    )
+    def search_legend(search_value: str, selected_value: str, promoted: list):
+        """
+        Searches the groups of the selected column on the server, the browser only gets the matches, so
+        columns with thousands of groups can be searched
+        :param search_value: text typed into the legend dropdown
+        :param selected_value: selected group in dropdown menu
+        :param promoted: groups displayed in the legend in addition to the largest ones
+        :return: matching groups and the promoted ones
+        """
+        promoted = promoted or []
+        if selected_value is None or not search_value:
+            return promoted
+
+        search_value = search_value.lower()
+        matches = list()
+        for group_value in column_catalogue.get(df, selected_value)["groups"]:
+            if pd.isna(group_value):
+                continue
+            group_value = str(group_value)
+            if group_value in promoted:
+                continue
+            if search_value in group_value.lower():
+                matches.append(group_value)
+                if len(matches) == 50:
+                    break
 
-            # String representation of the current UMAP parameters
-            umap_paras_string = (
-                str(n_neighbours) + " ; " + str(min_dist) + " ; " + metric
-            )
+        return promoted + matches
 
-            df.drop(labels=umap_axis_names, axis="columns", inplace=True)
+    @app.callback(
+        Output("selection_toast", "header"),
+        Output("selection_toast", "children"),
+        Output("selection_toast", "is_open"),
+        Input("graph", "selectedData"),
+        State("dd_menu", "value"),
+        State("dim_red_tabs", "active_tab"),
+        State("dim_radio", "value"),
+        State("session_id", "data"),
+        prevent_initial_call=True,
+    )
+    def show_selection_toast(
+        selected_data: dict,
+        selected_value: str,
+        dim_red: str,
+        dim: str,
+        session_id: str,
+    ):
+        """
+        Shows the number of proteins of each group in the box or lasso selection. The selection is looked
+        up in the spatial index of the view, also points not drawn individually are counted.
+        :param selected_data: graph selected data
+        :param selected_value: selected group in dropdown menu
+        :param dim_red: selected dimensionality reduction
+        :param dim: chosen dimension, 2D or 3D
+        :param session_id: ID of the browser session
+        :return: header, body and whether the toast is open
+        """
+        if selected_value is None or dim != "2D":
+            raise PreventUpdate
 
-            df_umap = DataPreprocessor.generate_umap(embeddings, umap_paras)
-            df_umap.index = embedding_uids
+        _, paras_string = get_paras(session_id, dim_red)
+        spatial_index = projection_store.spatial_index(
+            dim_red, dim, paras_string
+        )
+        if spatial_index is None:
+            raise PreventUpdate
 
-            df = df.join(df_umap, how="left")
+        rows = selection_to_rows(selected_data, spatial_index)
+        if rows is None:
+            return None, None, False
 
-            coords_df = df[umap_axis_names]
+        column_info = column_catalogue.get(df, selected_value)
+        counts = np.bincount(
+            column_info["codes"][rows], minlength=len(column_info["groups"])
+        )
 
-            umap_paras_dict[umap_paras_string] = coords_df
-        # String representation of UMAP parameters still to be created if not button used
-        else:
-            umap_paras_string = (
-                str(umap_paras["n_neighbours"])
-                + " ; "
-                + str(umap_paras["min_dist"])
-                + " ; "
-                + umap_paras["metric"]
+        # groups with most proteins first
+        items = list()
+        for group_idx in np.argsort(-counts, kind="stable"):
+            if counts[group_idx] == 0 or len(items) == 10:
+                break
+            items.append(
+                dbc.ListGroupItem(
+                    f"{column_info['groups'][group_idx]}: {counts[group_idx]}"
+                )
             )
-
-        tsne_axis_names = ["x_tsne_3D", "y_tsne_3D", "z_tsne_3D", "x_tsne_2D", "y_tsne_2D"]
-
-        # If umap parameters are selected in the dropdown menu
-        if ctx.triggered_id == "last_tsne_paras_dd":
-            splits = tsne_paras_dd_value.split(" ; ")
-            tsne_paras["iterations"] = int(splits[0])
-            tsne_paras["perplexity"] = float(splits[1])
-            tsne_paras["learning_rate"] = splits[2]
-            tsne_paras["tsne_metric"] = splits[3]
-
-            df.drop(labels=tsne_axis_names, axis="columns", inplace=True)
-            coords_df = tsne_paras_dict[tsne_paras_dd_value]
-            df = df.join(coords_df, how="left")
-
-        if ctx.triggered_id == "tsne_recalculation_button":
-            # check whether learning rate is auto or a number
-            learning_rate = learning_rate.replace(",", ".")
-            if is_number(learning_rate):
-                learning_rate = float(learning_rate)
-            elif learning_rate != "auto":
-                raise PreventUpdate
-
-            tsne_paras["iterations"] = iterations
-            tsne_paras["perplexity"] = perplexity
-            tsne_paras["learning_rate"] = learning_rate
-            tsne_paras["tsne_metric"] = tsne_metric
-
-            # String representation of the current TSNE parameters
-            tsne_paras_string = (
-                str(iterations)
-                + " ; "
-                + str(perplexity)
-                + " ; "
-                + str(learning_rate)
-                + " ; "
-                + str(tsne_metric)
+        if column_info["numeric"] and len(rows) > 0:
+            numbers = df[selected_value].to_numpy(
+                dtype=float, na_value=np.nan
+            )
+            items.append(
+                dbc.ListGroupItem(f"mean: {np.nanmean(numbers[rows]):.4g}")
             )
 
-            df.drop(labels=tsne_axis_names, axis="columns", inplace=True)
+        header = f"{len(rows)} proteins selected"
 
-            df_tsne = DataPreprocessor.generate_tsne(embeddings, tsne_paras)
-            df_tsne.index = embedding_uids
+        return header, dbc.ListGroup(items, flush=True), True
 
-            df = df.join(df_tsne, how="left")
+    # decoding of the figures, the points are highlighted in the hydrated figure
+    app.clientside_callback(
+        ClientsideFunction(namespace="figure", function_name="hydrate"),
+        Output("graph", "figure"),
+        Input("graph_data", "data"),
+        State("id_table", "data"),
+    )
 
-            coords_df = df[tsne_axis_names]
+    # highlighting of clicked and selected molecules, the browser already has their coordinates
+    app.clientside_callback(
+        ClientsideFunction(
+            namespace="highlighting", function_name="update_highlighting"
+        ),
+        Output("graph", "figure", allow_duplicate=True),
+        Output("molecules_dropdown", "value"),
+        Output("clicked_mol_storage", "data"),
+        Output("relayoutData_save", "data"),
+        Input("graph", "clickData"),
+        Input("molecules_dropdown", "value"),
+        State("clicked_mol_storage", "data"),
+        State("graph", "figure"),
+        State("graph", "relayoutData"),
+        State("relayoutData_save", "data"),
+        prevent_initial_call=True,
+    )
 
-            tsne_paras_dict[tsne_paras_string] = coords_df
+    @app.callback(
+        Output("projection_status", "data"),
+        Output("projection_interval", "disabled"),
+        Output("umap_tab", "disabled"),
+        Output("tsne_tab", "disabled"),
+        Output("projection_spinner", "hidden"),
+        Output("dim_red_tabs", "active_tab"),
+        Input("projection_interval", "n_intervals"),
+        Input("dim_red_tabs", "active_tab"),
+        State("projection_status", "data"),
+    )
+    def poll_projections(
+        n_intervals: int, active_tab: str, projection_status: dict
+    ):
+        """
+        Joins the views finished in the background into the dataframe, enables the tabs of their
+        dimensionality reductions and switches to the preferred one as soon as it is available
+        :param n_intervals: number of polls
+        :param active_tab: currently selected dimensionality reduction
+        :param projection_status: pending and preferred dimensionality reductions
+        :return: status, interval, tab and spinner variables
+        """
+        ctx = dash.callback_context
+        if not ctx.triggered or projection_worker is None:
+            raise PreventUpdate
 
-        # String representation still needed if not button used
-        else:
-            tsne_paras_string = (
-                str(tsne_paras["iterations"])
-                + " ; "
-                + str(tsne_paras["perplexity"])
-                + " ; "
-                + str(tsne_paras["learning_rate"])
-                + " ; "
-                + str(tsne_paras["tsne_metric"])
-            )
+        # Make redundant variable used
+        if n_intervals:
+            pass
 
-        if dim == "2D":
-            two_d = True
-        else:
-            two_d = False
+        # Don't switch away from a dimensionality reduction the user selected
+        if ctx.triggered_id == "dim_red_tabs":
+            if projection_status["preferred"] is None:
+                raise PreventUpdate
 
-        if (
-            ctx.triggered_id == "dd_menu"
-            or ctx.triggered_id == "umap_recalculation_button"
-            or ctx.triggered_id == "tsne_recalculation_button"
-            or ctx.triggered_id == "dim_red_tabs"
-            or ctx.triggered_id == "last_umap_paras_dd"
-            or ctx.triggered_id == "last_tsne_paras_dd"
-            or ctx.triggered_id == "dim_radio"
-        ):
-            fig = Visualizator.render(
-                df,
-                selected_column=selected_value,
-                original_id_col=original_id_col,
-                dim_red=dim_red,
-                umap_paras=umap_paras,
-                tsne_paras=tsne_paras,
-                two_d=two_d,
-            )
-            # Set highlighting_bool to False since new graph is displayed and highlighting circle is removed
-            highlighting_bool = False
-
-        # Add traces with open circles that have no values, but will be filled if something has to be highlighted
-        if dim == "3D":
-            fig.add_trace(
-                go.Scatter3d(
-                    x=[],
-                    y=[],
-                    z=[],
-                    mode="markers",
-                    marker=dict(
-                        size=15,
-                        color="black",
-                        symbol="circle-open",
-                    ),
-                    showlegend=False,
-                    hoverinfo="skip",
-                )
-            )
-            fig.add_trace(
-                go.Scatter3d(
-                    x=[],
-                    y=[],
-                    z=[],
-                    mode="markers",
-                    marker=dict(
-                        size=15,
-                        color="white",
-                        symbol="circle-open",
-                        line=dict(color="black", width=1),
-                    ),
-                    showlegend=False,
-                    hoverinfo="skip",
-                )
-            )
-        else:
-            fig.add_trace(
-                go.Scatter(
-                    x=[],
-                    y=[],
-                    mode="markers",
-                    marker=dict(
-                        size=15,
-                        color="black",
-                        symbol="circle-open",
-                        line=dict(color="black", width=1),
-                    ),
-                    showlegend=False,
-                    hoverinfo="skip",
-                )
-            )
-            fig.add_trace(
-                go.Scatter(
-                    x=[],
-                    y=[],
-                    mode="markers",
-                    marker=dict(
-                        size=15,
-                        color="white",
-                        symbol="circle-open",
-                    ),
-                    showlegend=False,
-                    hoverinfo="skip",
-                )
+            projection_status["preferred"] = None
+            return (
+                projection_status,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
             )
 
-        # Molecule is selected in graph and highlighting trace is now filled with x, y and/or z
-        if ctx.triggered_id == "graph":
-            seq_id = clickdata_to_seqid(click_data)
+        with collect_lock:
+            finished = projection_worker.collect()
 
-            if original_id_col is not None:
-                seq_id = to_mapped_id([seq_id], original_id_col, df)[0]
+            for key, (coords_df, paras) in finished.items():
+                add_projection(key.split("_")[0], coords_df, paras)
 
-            if dim == "3D":
-                if dim_red == "UMAP":
-                    x = df.at[seq_id, "x_umap_3D"]
-                    y = df.at[seq_id, "y_umap_3D"]
-                    z = df.at[seq_id, "z_umap_3D"]
-                elif dim_red == "PCA":
-                    x = df.at[seq_id, "x_pca_3D"]
-                    y = df.at[seq_id, "y_pca_3D"]
-                    z = df.at[seq_id, "z_pca_3D"]
-                else:
-                    x = df.at[seq_id, "x_tsne_3D"]
-                    y = df.at[seq_id, "y_tsne_3D"]
-                    z = df.at[seq_id, "z_tsne_3D"]
-
-                fig.update_traces(
-                    x=[x],
-                    y=[y],
-                    z=[z],
-                    selector=dict(
-                        marker_symbol="circle-open", marker_color="black"
-                    ),
-                    overwrite=True,
-                )
-            else:
-                if dim_red == "UMAP":
-                    x = df.at[seq_id, "x_umap_2D"]
-                    y = df.at[seq_id, "y_umap_2D"]
-                elif dim_red == "PCA":
-                    x = df.at[seq_id, "x_pca_3D"]
-                    y = df.at[seq_id, "y_pca_3D"]
-                else:
-                    x = df.at[seq_id, "x_tsne_2D"]
-                    y = df.at[seq_id, "y_tsne_2D"]
-
-                fig.update_traces(
-                    x=[x],
-                    y=[y],
-                    selector=dict(
-                        marker_symbol="circle-open", marker_color="black"
-                    ),
-                    overwrite=True,
-                )
+        # persist the finished views
+        if finished:
+            save_df()
 
-            # set highlighting_bool to true since highlighting circle is now displayed
-            highlighting_bool = True
-
-            # set camera to old settings so that camera stays in its position and doesn't reset
-            if relayout_data:
-                fig.update_layout(scene_camera=relayout_data["scene.camera"])
-
-            # save relayoutData for buggy plotly
-            relayout_data_save = relayout_data
-
-        # Process dropdown menu selection
-        if ctx.triggered_id == "molecules_dropdown":
-            # Remove highlighting of clicked molecule if deselected in the dropdown menu
-            if last_clicked_mol not in seq_ids and last_clicked_mol is not None:
-                if dim == "3D":
-                    fig.update_traces(
-                        x=[],
-                        y=[],
-                        z=[],
-                        selector=dict(
-                            marker_symbol="circle-open", marker_color="black"
-                        ),
-                        overwrite=True,
-                    )
-                else:
-                    fig.update_traces(
-                        x=[],
-                        y=[],
-                        selector=dict(
-                            marker_symbol="circle-open", marker_color="black"
-                        ),
-                        overwrite=True,
-                    )
+        pending = projection_worker.pending_dim_reds()
 
-            x_coords = list()
-            y_coords = list()
-            if dim == "3D":
-                z_coords = list()
-
-                for seq_id in seq_ids:
-                    if seq_id != last_clicked_mol:
-                        if original_id_col is not None:
-                            seq_id = to_mapped_id([seq_id], original_id_col, df)[0]
-
-                            if dim_red == "UMAP":
-                                x_coords.append(df.at[seq_id, "x_umap_3D"])
-                                y_coords.append(df.at[seq_id, "y_umap_3D"])
-                                z_coords.append(df.at[seq_id, "z_umap_3D"])
-                            elif dim_red == "PCA":
-                                x_coords.append(df.at[seq_id, "x_pca_3D"])
-                                y_coords.append(df.at[seq_id, "y_pca_3D"])
-                                z_coords.append(df.at[seq_id, "z_pca_3D"])
-                            else:
-                                x_coords.append(df.at[seq_id, "x_tsne_3D"])
-                                y_coords.append(df.at[seq_id, "y_tsne_3D"])
-                                z_coords.append(df.at[seq_id, "z_tsne_3D"])
-
-                fig.update_traces(
-                    x=x_coords,
-                    y=y_coords,
-                    z=z_coords,
-                    selector=dict(
-                        marker_symbol="circle-open", marker_color="white"
-                    ),
-                    overwrite=True,
-                )
-            else:
-                for seq_id in seq_ids:
-                    if seq_id != last_clicked_mol:
-                        if original_id_col is not None:
-                            seq_id = to_mapped_id([seq_id], original_id_col, df)[0]
-
-                            if dim_red == "UMAP":
-                                x_coords.append(df.at[seq_id, "x_umap_2D"])
-                                y_coords.append(df.at[seq_id, "y_umap_2D"])
-                            elif dim_red == "PCA":
-                                x_coords.append(df.at[seq_id, "x_pca_3D"])
-                                y_coords.append(df.at[seq_id, "y_pca_3D"])
-                            else:
-                                x_coords.append(df.at[seq_id, "x_tsne_2D"])
-                                y_coords.append(df.at[seq_id, "y_tsne_2D"])
-
-                fig.update_traces(
-                    x=x_coords,
-                    y=y_coords,
-                    selector=dict(
-                        marker_symbol="circle-open", marker_color="white"
-                    ),
-                    overwrite=True,
-                )
+        # Nothing changed since the last poll of this session
+        if pending == projection_status["pending"]:
+            raise PreventUpdate
 
-        # Disable UMAP parameter input or not?
-        disabled = False
-        if not dim_red == "UMAP":
-            disabled = True
+        # Switch to the preferred dimensionality reduction once it is calculated,
+        # failed calculations are not joined and their views are calculated when selected
+        active_tab = dash.no_update
+        preferred = projection_status["preferred"]
+        if preferred is not None and preferred not in pending:
+            active_tab = preferred
+            projection_status["preferred"] = None
+
+        projection_status["pending"] = pending
 
         return (
-            fig,
-            disabled,
-            disabled,
-            disabled,
-            list(umap_paras_dict.keys()),
-            disabled,
-            disabled,
-            umap_paras["n_neighbours"],
-            umap_paras["min_dist"],
-            umap_paras["metric"],
-            umap_paras_string,
-            tsne_paras["iterations"],
-            tsne_paras["perplexity"],
-            tsne_paras["learning_rate"],
-            tsne_paras["tsne_metric"],
-            tsne_paras_string,
-            list(tsne_paras_dict.keys()),
-            highlighting_bool,
-            relayout_data_save,
-            "Output for UMAP spinner",
-            "Output for graph spinner",
-            seq_ids,
-            clicked_seq_id,
+            projection_status,
+            len(pending) == 0,
+            "UMAP" in pending,
+            "TSNE" in pending,
+            len(pending) == 0,
+            active_tab,
         )
 
     @app.callback(
@@ -1233,9 +1547,17 @@ def get_callbacks(
         Input("button_graph_all", "n_clicks"),
         Input("dim_red_tabs", "active_tab"),
         Input("dim_radio", "value"),
+        State("session_id", "data"),
+        State("legend_dd", "value"),
     )
     def download_graph(
-        dd_value: str, button: int, all_button: int, dim_red: str, dim: str
+        dd_value: str,
+        button: int,
+        all_button: int,
+        dim_red: str,
+        dim: str,
+        session_id: str,
+        promoted: list,
     ):
         """
         Creates file(s) of the graph with the selected group on button click and indicates this with an download toast
@@ -1243,6 +1565,10 @@ def get_callbacks(
         :param button: graph download button
         :param all_button: button indicating all groups should be downloaded
         :param dim_red: selected dimensionality reduction
+        :param dim: selected dimension, 2D or 3D
+        :param session_id: ID of the browser session
+        :param promoted: groups displayed in the legend of the selected column in addition to the largest
+        ones
         :return: open download toast
         """
         # Check whether an input is triggered
@@ -1261,43 +1587,47 @@ def get_callbacks(
             two_d = False
 
         if ctx.triggered_id == "graph_download_button":
-            fig = Visualizator.render(
-                df,
+            fig = get_figure(
                 dd_value,
-                original_id_col,
-                umap_paras,
-                tsne_paras,
                 dim_red,
-                two_d,
-                True,
+                dim,
+                session_id,
+                download=True,
+                promoted=promoted,
             )
 
             if not two_d:
-                fig.write_html(output_d / f"3Dspace_{dd_value}_{dim_red}.html")
+                pio.write_html(
+                    fig,
+                    output_d / f"3Dspace_{dd_value}_{dim_red}.html",
+                    validate=False,
+                )
             else:
-                fig.write_image(output_d / f"2Dspace_{dd_value}_{dim_red}.png")
+                pio.write_image(
+                    fig,
+                    output_d / f"2Dspace_{dd_value}_{dim_red}.png",
+                    validate=False,
+                )
 
             return True
 
         if ctx.triggered_id == "button_graph_all":
             for header in csv_header:
-                fig = Visualizator.render(
-                    df,
-                    header,
-                    original_id_col,
-                    umap_paras,
-                    tsne_paras,
-                    dim_red,
-                    two_d,
-                    True,
+                fig = get_figure(
+                    header, dim_red, dim, session_id, download=True
                 )
+
                 if not two_d:
-                    fig.write_html(
-                        output_d / f"3Dspace_{header}_{dim_red}.html"
+                    pio.write_html(
+                        fig,
+                        output_d / f"3Dspace_{header}_{dim_red}.html",
+                        validate=False,
                     )
                 else:
-                    fig.write_image(
-                        output_d / f"2Dspace_{header}_{dim_red}.png"
+                    pio.write_image(
+                        fig,
+                        output_d / f"2Dspace_{header}_{dim_red}.png",
+                        validate=False,
                     )
 
             return True
@@ -1509,7 +1839,7 @@ def get_callbacks(
 
         seq_id = actual_seq_id
         if original_id_col is not None:
-            seq_id = to_mapped_id([seq_id], original_id_col, df)[0]
+            seq_id = id_index.to_mapped([seq_id])[0]
 
         info_header = actual_seq_id
 
@@ -1622,7 +1952,7 @@ def get_callbacks(
     #         # Convert embedding UIDS to original ID form if needed
     #         ids = embedding_uids
     #         if original_id_col is not None:
-    #             ids = to_original_id(embedding_uids, original_id_col, df)
+    #             ids = id_index.to_original(embedding_uids)
 
     #         # Get index of selected ID in the embedding IDs
     #         idx = ids.index(seq_id)
@@ -1751,49 +2081,40 @@ def get_callbacks(
         Output("load_correlation_scores_spinner", "children"),
         Input("correlation_collapse_switch", "value"),
         Input("dd_menu", "value"),
-        Input("dim_red_tabs", "active_tab")
+        Input("dim_red_tabs", "active_tab"),
+        State("session_id", "data"),
     )
-    def open_and_fill_correlation_collapse(switch: bool, selected_group: str, dim_red: str):
+    def open_and_fill_correlation_collapse(switch: bool, selected_group: str, dim_red: str, session_id: str):
         # Check whether an input is triggered
         ctx = dash.callback_context
         if not ctx.triggered:
             raise PreventUpdate
 
-        # Don't process stuff if switch is not activated but group is changed
-        if ctx.triggered_id == "dd_menu" and switch is False:
+        # Don't process stuff if switch is not activated but group or dimensionality reduction is changed
+        if ctx.triggered_id != "correlation_collapse_switch" and not switch:
             raise PreventUpdate
 
-        # get coordinates of current selected dimensionality reduction to transform them into nd-array
-        if dim_red == "UMAP":
-            x = "x_umap_3D"
-            y = "y_umap_3D"
-            z = "z_umap_3D"
-        elif dim_red == "PCA":
-            x = "x_pca_3D"
-            y = "y_pca_3D"
-            z = "z_pca_3D"
-        else:
-            x = "x_tsne_3D"
-            y = "y_tsne_3D"
-            z = "z_tsne_3D"
+        # imported here to keep the startup fast
+        from scipy.spatial.distance import cdist, squareform
+        from scipy.stats import spearmanr
+        from sklearn.manifold import trustworthiness
 
-        # fit = df[[x, y, z]].to_numpy()
+        # scores are calculated on the 3D view
+        if dim_red != "PCA":
+            ensure_projection(dim_red, "3D", session_id)
 
-        # get embeddings in order of the df
-        embeddings_dict = dict(zip(embedding_uids, embeddings))
+        # coordinates of current selected dimensionality reduction in the row order of the df
+        _, paras_string = get_paras(session_id, dim_red)
+        coords = projection_store.get(dim_red, "3D", paras_string)
 
-        ord_embeddings = list()
-        labels = list()
-        fit = list()
-        for idx in df.index.to_list():
-            if idx not in embeddings_dict:
-                continue
-            ord_embeddings.append(embeddings_dict[idx])
-            labels.append(df.loc[idx, selected_group])
-            fit.append(df.loc[idx, [x, y, z]].tolist())
-        ord_embeddings = numpy.asarray(ord_embeddings)
-        labels = np.array(labels)
-        fit = np.array(fit)
+        # positions of the embeddings in the row order of the df, -1 for proteins without embedding
+        emb_positions = embedding_index.get_indexer(df.index)
+        in_embeddings = emb_positions >= 0
+
+        # one gather each instead of looking up every protein
+        ord_embeddings = np.take(embeddings, emb_positions[in_embeddings], axis=0)
+        labels = np.array(df[selected_group].to_numpy()[in_embeddings].tolist())
+        fit = coords[in_embeddings]
 
         # create the distance matrix (for embeddings and reduced space)
         distmat_embs = ts_ss(ord_embeddings, ord_embeddings)
@@ -1835,6 +2156,8 @@ def get_callbacks(
         Stands for triangle area similarity (TS) and sector area similarity (SS)
         For more information: https://github.com/taki0112/Vector_Similarity
         """
+        from scipy.spatial.distance import cdist
+
         x1_norm = np.linalg.norm(x1, axis=-1)[:, np.newaxis]
         x2_norm = np.linalg.norm(x2, axis=-1)[:, np.newaxis]
         x_dot = x1_norm @ x2_norm.T
@@ -1863,6 +2186,8 @@ def get_callbacks(
     def silhouette(distmat, labels, ignore=[np.NaN]):
         """Calculates the silhouette score of a distance matrix.
         """
+        from sklearn.metrics import silhouette_score
+
         # exclude groups that have less than 2 grgroupsoups
         exclude = set(k for k, g in groupby(sorted(labels)) if sum(1 for _ in g) < 2)
         exclude.update(set(ignore))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.visualization.visualizator import Visualizator
+
+
+class ColumnCatalogue:
+    """
+    Descriptions of the metadata columns the graph can be colored by: sorted groups, group index of each
+    protein, nan mask, numeric range and colors, see Visualizator.describe_column. They are built once and
+    saved next to the dataframe of the projections, so selecting another column is a lookup. Saved
+    descriptions are only used if the IDs and the values of their column didn't change.
+    """
+
+    def __init__(self, path: Path = None, index_fingerprint: int = None):
+        """
+        :param path: pickle file the descriptions are saved in, None to keep them in memory only
+        :param index_fingerprint: fingerprint of the IDs in the row order of the descriptions
+        """
+        self.path = path
+        self.index_fingerprint = index_fingerprint
+
+        # column -> (fingerprint of the values, description)
+        self._columns = dict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_df(
+        cls,
+        df: DataFrame,
+        columns: list,
+        path: Path = None,
+        reset: bool = False,
+    ):
+        """
+        Loads the saved descriptions of the columns and describes the missing or changed ones
+        :param df: dataframe with the metadata
+        :param columns: columns the graph can be colored by
+        :param path: pickle file the descriptions are saved in, None to keep them in memory only
+        :param reset: if True the saved descriptions aren't used
+        :return: the column catalogue
+        """
+        # the IDs are unique, hashing them once per value is faster
+        catalogue = cls(path, cls.fingerprint(df.index, categorize=False))
+        if path is not None and path.is_file() and not reset:
+            catalogue.load()
+
+        described = [
+            catalogue.describe(df, column, save=False) for column in columns
+        ]
+        if any(described):
+            catalogue.save()
+
+        return catalogue
+
+    @staticmethod
+    def fingerprint(values, categorize: bool = True) -> int:
+        """
+        :param values: values of a column or the IDs
+        :param categorize: whether each unique value is hashed once, faster for columns with few groups
+        :return: hash of the values in their order
+        """
+        hashes = pd.util.hash_array(np.asarray(values), categorize=categorize)
+        # weighted by position, the order matters, overflows wrap around
+        positions = np.arange(1, len(hashes) + 1, dtype=np.uint64)
+        return int((hashes * positions).sum())
+
+    def describe(self, df: DataFrame, column: str, save: bool = True) -> bool:
+        """
+        Describes the column if it isn't described or its values changed
+        :param df: dataframe with the metadata
+        :param column: column of the dataframe
+        :param save: whether the catalogue is saved if the column is described
+        :return: whether the column was described
+        """
+        fingerprint = self.fingerprint(df[column])
+        with self._lock:
+            entry = self._columns.get(column)
+        if entry is not None and entry[0] == fingerprint:
+            return False
+
+        column_info = Visualizator.describe_column(df[column])
+        with self._lock:
+            self._columns[column] = (fingerprint, column_info)
+
+        if save:
+            self.save()
+
+        return True
+
+    def get(self, df: DataFrame, column: str) -> dict:
+        """
+        :param df: dataframe with the metadata
+        :param column: column of the dataframe
+        :return: description of the column, described first if it isn't in the catalogue
+        """
+        with self._lock:
+            entry = self._columns.get(column)
+        if entry is None:
+            self.describe(df, column)
+            with self._lock:
+                entry = self._columns[column]
+
+        return entry[1]
+
+    def columns(self) -> list:
+        """
+        :return: described columns
+        """
+        with self._lock:
+            return list(self._columns)
+
+    def load(self):
+        """
+        Loads the saved descriptions, an unreadable file or one of other IDs is ignored
+        :return: None
+        """
+        try:
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+
+        if saved["index"] != self.index_fingerprint:
+            return
+
+        with self._lock:
+            self._columns.update(saved["columns"])
+
+    def save(self):
+        """
+        Saves the descriptions if the catalogue has a file
+        :return: None
+        """
+        if self.path is None:
+            return
+
+        with self._lock:
+            columns = dict(self._columns)
+        with open(self.path, "wb") as f:
+            pickle.dump(dict(index=self.index_fingerprint, columns=columns), f)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+from plotly.io.json import from_json_plotly, to_json_plotly
+
+
+class FigureCache:
+    """
+    Bounded least recently used cache of rendered figures as json. The key describes the view:
+    (selected column, dimensionality reduction, parameters, dimension, download flag, groups promoted to the
+    legend).
+    """
+
+    def __init__(self, max_size: int = 16):
+        """
+        :param max_size: maximal number of cached figures, 0 disables the cache
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(
+        selected_column: str,
+        dim_red: str,
+        paras_string: str,
+        dim: str,
+        download: bool = False,
+        promoted: list = None,
+    ) -> tuple:
+        """
+        :param selected_column: column the graph is colored by
+        :param dim_red: dimensionality reduction
+        :param paras_string: string representation of the parameters of the dimensionality reduction
+        :param dim: 2D or 3D
+        :param download: whether the figure is rendered for downloading
+        :param promoted: groups displayed in the legend in addition to the largest ones
+        :return: key of the view
+        """
+        promoted = tuple(sorted(promoted)) if promoted else ()
+
+        return selected_column, dim_red, paras_string, dim, download, promoted
+
+    def get(self, key: tuple, render) -> dict:
+        """
+        Returns the cached figure of the view or renders and caches it
+        :param key: key of the view
+        :param render: function without arguments returning the figure of the view
+        :return: figure in dictionary format
+        """
+        with self._lock:
+            fig_json = self._figures.get(key)
+            if fig_json is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if fig_json is None:
+            # encoded with orjson if it is installed, NumPy arrays included
+            fig_json = to_json_plotly(render())
+
+            if self.max_size > 0:
+                with self._lock:
+                    self._figures[key] = fig_json
+                    self._figures.move_to_end(key)
+                    while len(self._figures) > self.max_size:
+                        self._figures.popitem(last=False)
+
+        return from_json_plotly(fig_json)
+
+    def invalidate(self, dim_red: str = None):
+        """
+        Removes the cached figures of a dimensionality reduction, e.g. because its coordinates changed
+        :param dim_red: dimensionality reduction, None to remove all figures
+        :return: None
+        """
+        with self._lock:
+            for key in list(self._figures):
+                if dim_red is None or key[1] == dim_red:
+                    del self._figures[key]
+
+    def stats(self) -> dict:
+        """
+        :return: hits, misses, hit rate, number of cached figures and their size in bytes
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                hit_rate=self.hits / requests if requests > 0 else 0.0,
+                size=len(self._figures),
+                max_size=self.max_size,
+                bytes=sum(len(fig_json) for fig_json in self._figures.values()),
+            )
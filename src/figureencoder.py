@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import base64
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+AXES = ["x", "y", "z"]
+
+
+class FigureEncoder:
+    """
+    Encodes the traces of a figure for sending it to the browser: the coordinates and numeric marker colors
+    as base64 float32 arrays and the hover text as indices into the ID table, which is sent once with the layout. The figure is
+    hydrated in the browser by figure.js before it is displayed. The URL-safe base64 alphabet is used,
+    since the JSON encoder of the responses escapes each "/" with six characters.
+    """
+
+    def __init__(self, ids: list):
+        """
+        :param ids: ID table, the IDs displayed as text of the points
+        """
+        self.ids = pd.Index(ids)
+        # texts can only be looked up in a table of unique IDs
+        self.encode_text = self.ids.is_unique
+        self.index_dtype = (
+            "u2" if len(self.ids) <= np.iinfo(np.uint16).max else "u4"
+        )
+
+    @staticmethod
+    def encode_array(values, dtype: str) -> dict:
+        """
+        :param values: numbers
+        :param dtype: numpy type code, e.g. f4 or u2, always little-endian
+        :return: typed array as dictionary with dtype and URL-safe base64 encoded data
+        """
+        data = np.asarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+        return dict(
+            dtype=dtype, bdata=base64.urlsafe_b64encode(data.tobytes()).decode()
+        )
+
+    @staticmethod
+    def decode_array(typed_array: dict) -> np.ndarray:
+        """
+        :param typed_array: typed array as dictionary with dtype and URL-safe base64 encoded data
+        :return: the numbers
+        """
+        dtype = np.dtype(typed_array["dtype"]).newbyteorder("<")
+        return np.frombuffer(
+            base64.urlsafe_b64decode(typed_array["bdata"]), dtype=dtype
+        )
+
+    def encode(self, fig) -> dict:
+        """
+        :param fig: figure as plotly graphical object or dictionary
+        :return: figure in dictionary format with encoded traces, the given figure isn't changed
+        """
+        if isinstance(fig, go.Figure):
+            fig = fig.to_plotly_json()
+
+        data = list()
+        for trace in fig.get("data", list()):
+            trace = dict(trace)
+
+            for axis in AXES:
+                values = trace.get(axis)
+                if (
+                    values is None
+                    or isinstance(values, (str, dict))
+                    or len(values) == 0
+                ):
+                    continue
+                trace[axis] = self.encode_array(values, "f4")
+
+            marker = trace.get("marker")
+            if isinstance(marker, dict):
+                color = marker.get("color")
+                # numbers of a colorscale, not color names
+                if (
+                    isinstance(color, (list, tuple, np.ndarray))
+                    and len(color) > 0
+                    and np.asarray(color).dtype.kind in "biuf"
+                ):
+                    trace["marker"] = dict(
+                        marker, color=self.encode_array(color, "f4")
+                    )
+
+            text = trace.get("text")
+            if (
+                self.encode_text
+                and text is not None
+                and not isinstance(text, str)
+                and len(text) > 0
+            ):
+                positions = self.ids.get_indexer(list(text))
+                # texts that aren't IDs are sent as they are
+                if (positions >= 0).all():
+                    trace["text"] = self.encode_array(
+                        positions, self.index_dtype
+                    )
+
+            data.append(trace)
+
+        return dict(fig, data=data)
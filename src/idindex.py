@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+
+class IdIndex:
+    """
+    Bidirectional index of the mapped IDs (index of the dataframe) and the original IDs of the
+    proteins, with their row positions in the dataframe. Lookups are hashed and done for all IDs at once.
+    Without mapped IDs both directions are the identity.
+    """
+
+    def __init__(self, mapped_ids, original_ids: list = None):
+        """
+        :param mapped_ids: index of the dataframe
+        :param original_ids: original IDs in the order of the dataframe, None if the IDs aren't mapped
+        """
+        self.mapped_ids = pd.Index(mapped_ids)
+        if original_ids is not None:
+            self.original_ids = pd.Index(original_ids)
+        else:
+            self.original_ids = self.mapped_ids
+
+        if len(self.original_ids) != len(self.mapped_ids):
+            raise ValueError(
+                "Number of original IDs doesn't match the number of proteins!"
+            )
+
+    @staticmethod
+    def _get_positions(index: pd.Index, ids: list) -> np.ndarray:
+        """
+        :param index: the searched index
+        :param ids: IDs to look up
+        :return: row positions of the IDs
+        """
+        positions = index.get_indexer(ids)
+        if (positions == -1).any():
+            missing = [ids[pos] for pos in np.flatnonzero(positions == -1)]
+            raise KeyError(f"Unknown ID(s): {', '.join(map(str, missing))}")
+
+        return positions
+
+    def positions(self, mapped_ids: list) -> np.ndarray:
+        """
+        :param mapped_ids: mapped IDs
+        :return: row positions of the IDs in the dataframe
+        """
+        return self._get_positions(self.mapped_ids, list(mapped_ids))
+
+    def original_positions(self, original_ids: list) -> np.ndarray:
+        """
+        :param original_ids: original IDs
+        :return: row positions of the IDs in the dataframe
+        """
+        return self._get_positions(self.original_ids, list(original_ids))
+
+    def to_mapped(self, original_ids: list) -> list:
+        """
+        Converts IDs from original to mapped
+        :param original_ids: original IDs
+        :return: mapped IDs
+        """
+        return self.mapped_ids[self.original_positions(original_ids)].tolist()
+
+    def to_original(self, mapped_ids: list) -> list:
+        """
+        Converts IDs from mapped to original
+        :param mapped_ids: mapped IDs
+        :return: original IDs
+        """
+        return self.original_ids[self.positions(mapped_ids)].tolist()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# number of points placed at once, bounds the memory of the distance matrices
+BATCH_SIZE = 4096
+
+
+def nearest_neighbours(
+    queries: np.ndarray,
+    points: np.ndarray,
+    k: int,
+    points_sq_norms: np.ndarray = None,
+):
+    """
+    Euclidean nearest neighbours of the queries in the points
+    :param queries: query vectors, n_queries x dim
+    :param points: searched vectors, n_points x dim
+    :param k: number of neighbours
+    :param points_sq_norms: squared norms of the points, calculated if not given
+    :return: indexes and distances of the neighbours, both n_queries x k and sorted by distance
+    """
+    k = min(k, len(points))
+    if points_sq_norms is None:
+        points_sq_norms = np.einsum("ij,ij->i", points, points)
+
+    # ||q - p||^2 = ||q||^2 + ||p||^2 - 2 q.p
+    sq_dist = (
+        np.einsum("ij,ij->i", queries, queries)[:, np.newaxis]
+        + points_sq_norms[np.newaxis, :]
+        - 2 * queries @ points.T
+    )
+
+    # unsorted k smallest, then sort only those
+    rows = np.arange(len(queries))[:, np.newaxis]
+    part = np.argpartition(sq_dist, k - 1, axis=1)[:, :k]
+    order = np.argsort(sq_dist[rows, part], axis=1)
+    part = part[rows, order]
+
+    return part, np.sqrt(np.maximum(sq_dist[rows, part], 0))
+
+
+def select_landmarks(
+    n_points: int, n_landmarks: int, labels=None, seed: int = 42
+) -> np.ndarray:
+    """
+    Draws a random sample of landmarks, stratified by the labels if given. Each group gets a share
+    proportional to its size and at least one landmark if there are enough landmarks.
+    :param n_points: number of points
+    :param n_landmarks: number of landmarks
+    :param labels: group of each point, e.g. a column of the csv file
+    :param seed: seed of the random sample
+    :return: sorted indexes of the landmarks
+    """
+    rng = np.random.default_rng(seed)
+
+    if n_landmarks >= n_points:
+        return np.arange(n_points)
+
+    if labels is None:
+        return np.sort(rng.choice(n_points, n_landmarks, replace=False))
+
+    # missing values are a group of their own
+    labels = pd.Series(labels).astype(str).to_numpy()
+    _, inverse, counts = np.unique(
+        labels, return_inverse=True, return_counts=True
+    )
+
+    # largest remainder allocation of the landmarks to the groups
+    quota = counts * n_landmarks / n_points
+    alloc = np.floor(quota).astype(int)
+    if len(counts) <= n_landmarks:
+        alloc = np.maximum(alloc, 1)
+
+    rest = n_landmarks - alloc.sum()
+    if rest > 0:
+        alloc[np.argsort(alloc - quota)[:rest]] += 1
+    for _ in range(-rest):
+        alloc[np.argmax(alloc)] -= 1
+
+    # indexes of the points sorted by group
+    by_group = np.split(np.argsort(inverse, kind="stable"), np.cumsum(counts)[:-1])
+    indexes = [
+        rng.choice(members, size, replace=False)
+        for members, size in zip(by_group, alloc)
+        if size > 0
+    ]
+
+    return np.sort(np.concatenate(indexes))
+
+
+class Landmarks:
+    """
+    Fits a dimensionality reduction on a sample of the embeddings (the landmarks) and places the
+    remaining points by interpolating the coordinates of their nearest landmarks or with the
+    transform of the fitted model.
+    """
+
+    PLACEMENTS = ["knn", "transform"]
+
+    def __init__(
+        self,
+        indexes: np.ndarray,
+        placement: str = "knn",
+        k: int = 10,
+        verbose: bool = False,
+    ):
+        """
+        :param indexes: indexes of the landmarks in the embeddings
+        :param placement: knn for the distance weighted mean of the nearest landmarks, transform to use the fitted model
+        :param k: number of landmarks interpolated for each point
+        :param verbose: print the quality of the placement
+        """
+        if placement not in self.PLACEMENTS:
+            raise ValueError(
+                f"Placement {placement} is not valid, use one of"
+                f" {', '.join(self.PLACEMENTS)}!"
+            )
+
+        self.indexes = np.asarray(indexes)
+        self.placement = placement
+        self.k = k
+        self.verbose = verbose
+
+        # neighbourhood preservation of the last calculation
+        self.last_quality = None
+
+    def fit_transform(self, model, data: np.ndarray, metric: str = "euclidean"):
+        """
+        Fits the model on the landmarks and places the remaining points
+        :param model: initialized UMAP or t-SNE object
+        :param data: all embeddings
+        :param metric: metric of the model, cosine is approximated by the euclidean distance of the normalized vectors
+        :return: coordinates of all points
+        """
+        landmark_coords = model.fit_transform(data[self.indexes])
+
+        others = np.ones(len(data), dtype=bool)
+        others[self.indexes] = False
+        other_idx = np.flatnonzero(others)
+
+        coords = np.empty((len(data), landmark_coords.shape[1]))
+        coords[self.indexes] = landmark_coords
+
+        if len(other_idx) > 0:
+            # t-SNE has no transform
+            if self.placement == "transform" and hasattr(model, "transform"):
+                # UMAP parallelizes the transform itself
+                coords[other_idx] = np.vstack(
+                    [
+                        model.transform(data[other_idx[start : start + BATCH_SIZE]])
+                        for start in range(0, len(other_idx), BATCH_SIZE)
+                    ]
+                )
+            else:
+                coords[other_idx] = self.interpolate(
+                    data, other_idx, landmark_coords, metric
+                )
+
+        if self.verbose:
+            self.last_quality = self.quality(data, coords)
+            print(
+                f"Landmarks: {len(self.indexes)} of {len(data)} points,"
+                f" {self.k}-NN preservation of the landmarks"
+                f" {self.last_quality['landmarks']:.3f}, of the placed points"
+                f" {self.last_quality['placed']:.3f}"
+            )
+
+        return coords
+
+    def interpolate(
+        self,
+        data: np.ndarray,
+        point_idx: np.ndarray,
+        landmark_coords: np.ndarray,
+        metric: str = "euclidean",
+    ) -> np.ndarray:
+        """
+        Places points at the inverse distance weighted mean of their nearest landmarks, in parallel batches
+        :param data: all embeddings
+        :param point_idx: indexes of the placed points
+        :param landmark_coords: coordinates of the landmarks
+        :param metric: cosine uses the normalized embeddings, any other metric the euclidean distance
+        :return: coordinates of the placed points
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if metric == "cosine":
+            data = data / np.maximum(
+                np.linalg.norm(data, axis=1, keepdims=True), 1e-12
+            )
+
+        landmarks = data[self.indexes]
+        sq_norms = np.einsum("ij,ij->i", landmarks, landmarks)
+
+        def place(start: int):
+            batch = data[point_idx[start : start + BATCH_SIZE]]
+            idx, dist = nearest_neighbours(batch, landmarks, self.k, sq_norms)
+
+            weights = 1 / np.maximum(dist, 1e-12)
+            weights /= weights.sum(axis=1, keepdims=True)
+
+            return np.einsum("ij,ijk->ik", weights, landmark_coords[idx])
+
+        # numpy releases the GIL for the matrix products
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            batches = executor.map(place, range(0, len(point_idx), BATCH_SIZE))
+
+            return np.vstack(list(batches))
+
+    def quality(
+        self, data: np.ndarray, coords: np.ndarray, n_samples: int = 200
+    ) -> dict:
+        """
+        Measures how many of the nearest neighbours in the embedding space are also nearest neighbours
+        in the map, separately for a sample of the landmarks and of the placed points. The difference
+        is the quality lost by placing instead of fitting the points.
+        :param data: all embeddings
+        :param coords: coordinates of all points
+        :param n_samples: number of sampled points of each kind
+        :return: mean k-NN preservation of the landmarks and the placed points
+        """
+        rng = np.random.default_rng(42)
+        data = np.asarray(data, dtype=np.float32)
+        coords = np.asarray(coords, dtype=np.float32)
+
+        others = np.ones(len(data), dtype=bool)
+        others[self.indexes] = False
+
+        quality = dict()
+        for kind, members in [
+            ("landmarks", self.indexes),
+            ("placed", np.flatnonzero(others)),
+        ]:
+            if len(members) == 0:
+                quality[kind] = float("nan")
+                continue
+
+            sample = rng.choice(
+                members, min(n_samples, len(members)), replace=False
+            )
+
+            # first neighbour is the point itself
+            emb_idx, _ = nearest_neighbours(data[sample], data, self.k + 1)
+            map_idx, _ = nearest_neighbours(coords[sample], coords, self.k + 1)
+
+            overlap = [
+                len(set(emb_row[1:]) & set(map_row[1:])) / self.k
+                for emb_row, map_row in zip(emb_idx, map_idx)
+            ]
+            quality[kind] = float(np.mean(overlap))
+
+        return quality
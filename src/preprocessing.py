@@ -8,13 +8,38 @@ import h5py
 import numpy as np
 import pandas
 import pandas as pd
-from Bio import SeqIO
 from pandas import DataFrame
-from scipy.spatial.distance import cdist, pdist, squareform
 
+from src.landmarks import Landmarks, select_landmarks
+from src.projectionworker import ProjectionWorker
 from src.visualization.visualizator import Visualizator
 
 
+class DistanceMatrices(dict):
+    """
+    Dictionary of the euclidean, cosine and manhattan distance matrices of the embeddings.
+    The n_proteins x n_proteins matrices are calculated on first access instead of at startup.
+    """
+
+    # key and the scipy name of the metric
+    METRICS = dict(euclidean="euclidean", cosine="cosine", manhattan="cityblock")
+
+    def __init__(self, embeddings: np.ndarray):
+        super().__init__()
+        self.embeddings = embeddings
+
+    def __missing__(self, metric: str):
+        from scipy.spatial.distance import cdist
+
+        if metric not in self.METRICS:
+            raise KeyError(metric)
+
+        dis_mat = cdist(self.embeddings, self.embeddings, self.METRICS[metric])
+        self[metric] = dis_mat
+
+        return dis_mat
+
+
 class DataPreprocessor:
     UMAP_AXIS_NAMES = ["x_umap_3D", "y_umap_3D", "z_umap_3D", "x_umap_2D", "y_umap_2D"]
     PCA_AXIS_NAMES = ["x_pca_3D", "y_pca_3D", "z_pca_3D"]
@@ -34,6 +59,15 @@ class DataPreprocessor:
         "x_tsne_2D",
         "y_tsne_2D",
     ]
+    # columns of each (dimensionality reduction, dimension) view, 2D PCA uses the first two components
+    VIEW_AXIS_NAMES = {
+        ("UMAP", "3D"): ["x_umap_3D", "y_umap_3D", "z_umap_3D"],
+        ("UMAP", "2D"): ["x_umap_2D", "y_umap_2D"],
+        ("PCA", "3D"): ["x_pca_3D", "y_pca_3D", "z_pca_3D"],
+        ("PCA", "2D"): ["x_pca_3D", "y_pca_3D"],
+        ("TSNE", "3D"): ["x_tsne_3D", "y_tsne_3D", "z_tsne_3D"],
+        ("TSNE", "2D"): ["x_tsne_2D", "y_tsne_2D"],
+    }
 
     def __init__(
         self,
@@ -49,6 +83,13 @@ class DataPreprocessor:
         umap_paras: dict,
         tsne_paras: dict,
         verbose: bool,
+        progressive: bool = False,
+        n_landmarks: int = None,
+        landmark_col: str = None,
+        landmark_placement: str = "knn",
+        dim: str = "3D",
+        webgl: bool = None,
+        legend_groups: int = None,
     ):
         self.output_d = output_d
         self.hdf_path = hdf_path
@@ -62,6 +103,27 @@ class DataPreprocessor:
         self.umap_paras = umap_paras
         self.tsne_paras = tsne_paras
         self.verbose = verbose
+        self.progressive = progressive
+        # dimension of the initial view, only this view of the dimensionality reduction is precomputed
+        self.dim = dim
+        # whether 2D graphs are drawn with WebGL, None to decide by the number of proteins
+        self.webgl = webgl
+        # number of groups shown in the legend, Visualizator.LEGEND_GROUPS if None
+        self.legend_groups = legend_groups
+
+        # dimensionality reduction of the initial figure, PCA while the others are calculated in the background
+        self.initial_dim_red = dim_red
+        # holds the UMAP & t-SNE background calculations in progressive mode
+        self.projection_worker = None
+
+        # fit UMAP & t-SNE only on a sample of the proteins
+        self.n_landmarks = n_landmarks
+        self.landmark_col = landmark_col
+        self.landmark_placement = landmark_placement
+        self.landmarks = None
+
+        # UMAP models fitted with the parameters of the start by dimension, reused by the query projection
+        self.umap_models = dict()
 
     def data_preprocessing(self):
         """
@@ -134,6 +196,45 @@ class DataPreprocessor:
             index_name,
         )
 
+        # views that are needed right away, the others are calculated when first displayed
+        views = [(self.dim_red, self.dim)]
+        if self.html_cols is not None and ("UMAP", "3D") not in views:
+            # html files show the 3D UMAP
+            views.append(("UMAP", "3D"))
+        missing_views = [
+            (dim_red, dim)
+            for dim_red, dim in views
+            if dim_red != "PCA"
+            and not all(
+                col in df_embeddings.columns
+                for col in self.VIEW_AXIS_NAMES[(dim_red, dim)]
+            )
+        ]
+
+        df_path = self.output_d / f"df_{self.hdf_path.stem}.csv"
+        if self.progressive:
+            # UMAP and t-SNE are calculated in the background and joined once finished
+            self.projection_worker = ProjectionWorker(
+                embeddings,
+                embedding_uids,
+                df_path,
+                index_name,
+                self.verbose,
+                landmarks=self.landmarks,
+                umap_models=self.umap_models,
+            )
+            for dim_red, dim in missing_views:
+                self.projection_worker.submit(
+                    dim_red, self._get_paras(dim_red), dim
+                )
+        elif missing_views:
+            for dim_red, dim in missing_views:
+                df_embeddings = self.add_view(
+                    df_embeddings, embeddings, embedding_uids, dim_red, dim
+                )
+
+            df_embeddings.to_csv(df_path, index_label=index_name)
+
         # handle html saving
         DataPreprocessor._handle_html(
             self,
@@ -147,6 +248,11 @@ class DataPreprocessor:
         # sort csv header alphabetically
         csv_header.sort(key=str.lower)
 
+        # show PCA until the selected dimensionality reduction is calculated in the background
+        if self.projection_worker is not None:
+            if self.dim_red in self.projection_worker.pending_dim_reds():
+                self.initial_dim_red = "PCA"
+
         # generate initial figure
         fig = Visualizator.render(
             df_embeddings,
@@ -154,8 +260,12 @@ class DataPreprocessor:
             original_id_col=original_id_col,
             umap_paras=self.umap_paras,
             tsne_paras=self.tsne_paras,
-            dim_red=self.dim_red,
+            dim_red=self.initial_dim_red,
+            two_d=self.dim == "2D",
+            webgl=self.webgl,
+            legend_groups=self.legend_groups,
         )
+        Visualizator.add_highlight_traces(fig, two_d=self.dim == "2D")
 
         # get distance matrices for displaying nearest neighbour
         distance_dic = self._get_distance_matrices(embeddings)
@@ -174,22 +284,12 @@ class DataPreprocessor:
     @staticmethod
     def _get_distance_matrices(embeddings):
         """
-        Create the distance matrices for displaying nearest neighbours of a selected point
+        Create the distance matrices for displaying nearest neighbours of a selected point,
+        each matrix is only calculated when first accessed
         :param embeddings: The embedding values
         :return: The distance matrices in a dictionary
         """
-
-        euclidean_dis_mat = cdist(embeddings, embeddings, "euclidean")
-        cosine_dis_mat = cdist(embeddings, embeddings, "cosine")
-        manhattan_dis_mat = cdist(embeddings, embeddings, "cityblock")
-
-        distance_dic = dict(
-            euclidean=euclidean_dis_mat,
-            cosine=cosine_dis_mat,
-            manhattan=manhattan_dis_mat,
-        )
-
-        return distance_dic
+        return DistanceMatrices(embeddings)
 
     def _check_files(
         self,
@@ -263,6 +363,8 @@ class DataPreprocessor:
         Reads in fasta file to a dictionary
         :return: fasta dictionary
         """
+        from Bio import SeqIO
+
         fasta_sequences = SeqIO.parse(open(self.fasta_path), "fasta")
         fasta_dict = SeqIO.to_dict(fasta_sequences)
         return fasta_dict
@@ -427,6 +529,8 @@ class DataPreprocessor:
         embedding_uids, embs = zip(*embs.items())
         embeddings = np.vstack(embs)
 
+        self.landmarks = self._select_landmarks(df_csv, embedding_uids)
+
         # load & read df.csv if present
         pres_df = output_d / f"df_{hdf_path.stem}.csv"
         if pres_df.is_file():
@@ -471,7 +575,10 @@ class DataPreprocessor:
                     # Update df in case new columns were added to the csv
                     if (
                         len(df_csv.columns)
-                        - (len(pres_df_csv.columns) - len(self.AXIS_NAMES))
+                        - (
+                            len(pres_df_csv.columns)
+                            - len(set(pres_df_csv.columns) & set(self.AXIS_NAMES))
+                        )
                         > 0
                     ):
                         if self.verbose:
@@ -511,6 +618,37 @@ class DataPreprocessor:
 
         return df_embeddings, csv_header, embeddings, embedding_uids
 
+    def _select_landmarks(self, df_csv: DataFrame, embedding_uids: list[str]):
+        """
+        Selects the landmarks UMAP & t-SNE are fitted on, stratified by the landmark column if given
+        :param df_csv: dataframe of given csv file
+        :param embedding_uids: unique IDs of the embeddings
+        :return: the landmarks or None if all proteins are used
+        """
+        if self.n_landmarks is None or self.n_landmarks >= len(embedding_uids):
+            return None
+
+        labels = None
+        if self.landmark_col is not None:
+            if self.landmark_col not in df_csv.columns:
+                raise Exception(
+                    f"Landmark column {self.landmark_col} is not a column of"
+                    " the csv file!"
+                )
+            labels = df_csv[self.landmark_col].reindex(list(embedding_uids))
+
+        indexes = select_landmarks(
+            len(embedding_uids), self.n_landmarks, labels
+        )
+
+        if self.verbose:
+            print(
+                f"UMAP & t-SNE are fitted on {len(indexes)} landmarks, the"
+                f" other proteins are placed by {self.landmark_placement}."
+            )
+
+        return Landmarks(indexes, self.landmark_placement, verbose=self.verbose)
+
     def _create_df(
         self,
         output_d: Path,
@@ -543,6 +681,8 @@ class DataPreprocessor:
             )
 
         if self.verbose:
+            from scipy.spatial.distance import squareform
+
             # get pairwise distances; should be n_proteins x n_proteins
             pairwise_dist = squareform(self._pairwise_distances(embs))
             print(
@@ -550,17 +690,13 @@ class DataPreprocessor:
                 f" num_proteins): {pairwise_dist.shape}"
             )
 
-        # generate dimensionality reduction components and merge it to CSV DataFrame
-        df_dim_red_umap = self.generate_umap(embs, self.umap_paras)
-        df_dim_red_umap.index = embs_uids
+        # PCA is fast and always calculated right away,
+        # the views of UMAP & t-SNE are calculated when needed
         df_dim_red_pca = self._generate_pca(embs)
         df_dim_red_pca.index = embs_uids
-        df_dim_red_tsne = self.generate_tsne(embs, self.tsne_paras)
-        df_dim_red_tsne.index = embs_uids
 
-        df_embeddings = df_csv.join(
-            [df_dim_red_umap, df_dim_red_pca, df_dim_red_tsne], how="outer"
-        )
+        df_embeddings = df_csv.join([df_dim_red_pca], how="outer")
+
         csv_header = [
             header
             for header in df_embeddings.columns
@@ -574,6 +710,49 @@ class DataPreprocessor:
 
         return df_embeddings, csv_header, embs
 
+    def _get_paras(self, dim_red: str) -> dict:
+        """
+        :param dim_red: UMAP or TSNE
+        :return: parameters of the dimensionality reduction
+        """
+        if dim_red == "UMAP":
+            return self.umap_paras
+
+        return self.tsne_paras
+
+    def add_view(
+        self,
+        df: DataFrame,
+        embeddings: np.ndarray,
+        embedding_uids: list[str],
+        dim_red: str,
+        dim: str,
+    ) -> DataFrame:
+        """
+        Calculates a single view of UMAP or t-SNE and joins it into the dataframe
+        :param df: dataframe the coordinates are joined into
+        :param embeddings: embeddings data
+        :param embedding_uids: unique IDs of the embeddings
+        :param dim_red: UMAP or TSNE
+        :param dim: 2D or 3D
+        :return: dataframe with the coordinates of the view
+        """
+        if dim_red == "UMAP":
+            df_view = self.generate_umap(
+                embeddings,
+                self.umap_paras,
+                self.landmarks,
+                [dim],
+                models=self.umap_models,
+            )
+        else:
+            df_view = self.generate_tsne(
+                embeddings, self.tsne_paras, self.landmarks, [dim]
+            )
+        df_view.index = embedding_uids
+
+        return df.join(df_view, how="left")
+
     def _get_embeddings(
         self, emb_h5file: Path, csv_uids: list[str]
     ) -> dict[str, np.ndarray]:
@@ -594,6 +773,9 @@ class DataPreprocessor:
         if self.verbose:
             print(f"Loading pre-computed embeddings from: {emb_h5file}")
 
+        # set for constant time lookups
+        csv_uids = set(csv_uids)
+
         with h5py.File(emb_h5file, "r") as hdf:
             for identifier, embd in hdf.items():
                 if identifier in csv_uids:
@@ -626,15 +808,26 @@ class DataPreprocessor:
         :param metric: metric used for calculation
         :return: calculated pairwise distance
         """
+        from scipy.spatial.distance import pdist
+
         # usually euclidean or cosine distance worked best
         return pdist(data, metric=metric)
 
     @staticmethod
-    def generate_umap(data: np.ndarray, umap_paras: dict) -> pd.DataFrame:
+    def generate_umap(
+        data: np.ndarray,
+        umap_paras: dict,
+        landmarks: Landmarks = None,
+        dims: list[str] = None,
+        models: dict = None,
+    ) -> pd.DataFrame:
         """
         generated umap for given data
         :param data: embeddings data
         :param umap_paras: parameters of the UMAP calculation
+        :param landmarks: if given, UMAP is fitted on the landmarks and the other points are placed
+        :param dims: dimensions to calculate, 2D and/or 3D, both if not given
+        :param models: if given, the fitted UMAP models are added by dimension
         :return: dataframe of the umap coordinates
         """
         # visualize high-dimensional embeddings with dimensionality reduction (here: umap)
@@ -642,37 +835,52 @@ class DataPreprocessor:
         # Parameters: https://umap-learn.readthedocs.io/en/latest/parameters.html
         import umap
 
-        # 3D
-        fit = umap.UMAP(
-            n_neighbors=umap_paras["n_neighbours"],
-            min_dist=umap_paras["min_dist"],
-            random_state=42,
-            n_components=3,
-            metric=umap_paras["metric"],
-        )  # initialize umap; use random_state=42 for reproducibility
-        umap_fit = fit.fit_transform(data)  # fit umap to our embeddings
-        df_umap_3D = DataFrame(
-            data=umap_fit, columns=["x_umap_3D", "y_umap_3D", "z_umap_3D"]
-        )
-
-        # 2D
-        fit = umap.UMAP(
-            n_neighbors=umap_paras["n_neighbours"],
-            min_dist=umap_paras["min_dist"],
-            random_state=42,
-            n_components=2,
-            metric=umap_paras["metric"],
-        )  # initialize umap; use random_state=42 for reproducibility
-        umap_fit = fit.fit_transform(data)  # fit umap to our embeddings
-        df_umap_2D = DataFrame(
-            data=umap_fit, columns=["x_umap_2D", "y_umap_2D"]
-        )
+        if dims is None:
+            dims = ["2D", "3D"]
+
+        df_umap_dims = list()
+        for dim in dims:
+            fit = umap.UMAP(
+                n_neighbors=umap_paras["n_neighbours"],
+                min_dist=umap_paras["min_dist"],
+                random_state=42,
+                n_components=3 if dim == "3D" else 2,
+                metric=umap_paras["metric"],
+            )  # initialize umap; use random_state=42 for reproducibility
+            umap_fit = DataPreprocessor._fit_transform(
+                fit, data, landmarks, umap_paras["metric"]
+            )  # fit umap to our embeddings
+            if models is not None:
+                models[dim] = fit
+            df_umap_dims.append(
+                DataFrame(
+                    data=umap_fit,
+                    columns=DataPreprocessor.VIEW_AXIS_NAMES[("UMAP", dim)],
+                )
+            )
 
         # Combine
-        df_umap = pd.concat([df_umap_2D, df_umap_3D], axis=1)
+        df_umap = pd.concat(df_umap_dims, axis=1)
 
         return df_umap
 
+    @staticmethod
+    def _fit_transform(
+        model, data: np.ndarray, landmarks: Landmarks, metric: str
+    ) -> np.ndarray:
+        """
+        Fits the dimensionality reduction on all points or only on the landmarks
+        :param model: initialized UMAP or t-SNE object
+        :param data: embeddings data
+        :param landmarks: landmarks or None to fit on all points
+        :param metric: metric of the dimensionality reduction
+        :return: coordinates of all points
+        """
+        if landmarks is None:
+            return model.fit_transform(data)
+
+        return landmarks.fit_transform(model, data, metric)
+
     def _generate_pca(self, data: np.ndarray):
         """
         generate PCA coords for given data
@@ -696,75 +904,86 @@ class DataPreprocessor:
         return df_pca
 
     @staticmethod
-    def generate_tsne(data: np.ndarray, tsne_paras: dict):
+    def generate_tsne(
+        data: np.ndarray,
+        tsne_paras: dict,
+        landmarks: Landmarks = None,
+        dims: list[str] = None,
+    ):
         """
         Generate tsne coordinates for given data
         :param data: embeddings data
         :param tsne_paras: hyperparameters of t-SNE saved in a dictionary
+        :param landmarks: if given, t-SNE is fitted on the landmarks and the other points are interpolated
+        :param dims: dimensions to calculate, 2D and/or 3D, both if not given
         :return: dataframe with t-sne coordinates
         """
         from sklearn.manifold import TSNE
 
-        # 3D
-        fit = TSNE(
-            n_components=3,
-            random_state=42,
-            init="random",
-            learning_rate=tsne_paras["learning_rate"],
-            n_iter=tsne_paras["iterations"],
-            perplexity=tsne_paras["perplexity"],
-            metric=tsne_paras["tsne_metric"],
-        )
-        tsne_fit = fit.fit_transform(data)
-        df_tsne_3D = DataFrame(
-            data=tsne_fit, columns=["x_tsne_3D", "y_tsne_3D", "z_tsne_3D"]
-        )
-
-        # 2D
-        fit = TSNE(
-            n_components=2,
-            random_state=42,
-            init="random",
-            learning_rate=tsne_paras["learning_rate"],
-            n_iter=tsne_paras["iterations"],
-            perplexity=tsne_paras["perplexity"],
-            metric=tsne_paras["tsne_metric"],
-        )
-        tsne_fit = fit.fit_transform(data)
-        df_tsne_2D = DataFrame(
-            data=tsne_fit, columns=["x_tsne_2D", "y_tsne_2D"]
-        )
+        if dims is None:
+            dims = ["2D", "3D"]
+
+        df_tsne_dims = list()
+        for dim in dims:
+            fit = TSNE(
+                n_components=3 if dim == "3D" else 2,
+                random_state=42,
+                init="random",
+                learning_rate=tsne_paras["learning_rate"],
+                n_iter=tsne_paras["iterations"],
+                perplexity=tsne_paras["perplexity"],
+                metric=tsne_paras["tsne_metric"],
+            )
+            tsne_fit = DataPreprocessor._fit_transform(
+                fit, data, landmarks, tsne_paras["tsne_metric"]
+            )
+            df_tsne_dims.append(
+                DataFrame(
+                    data=tsne_fit,
+                    columns=DataPreprocessor.VIEW_AXIS_NAMES[("TSNE", dim)],
+                )
+            )
 
         # Combine
-        df_tsne = pd.concat([df_tsne_2D, df_tsne_3D], axis=1)
+        df_tsne = pd.concat(df_tsne_dims, axis=1)
 
         return df_tsne
 
     def _check_coordinates(self, data_frame: DataFrame) -> bool:
         """
-        Checks whether x, y & z column are present and complete in given dataframe
+        Checks whether x, y & z columns are present and complete in given dataframe. PCA has to be present,
+        the views of UMAP & t-SNE are calculated when needed and may be missing, but not only partly.
         :param data_frame: given dataframe
         :return: False if corrupted, True if not
         """
         # Do the columns x, y and z exist?
-        if not all(x in list(data_frame.columns) for x in self.AXIS_NAMES):
-            if self.verbose:
-                print("Df corrupted as not all x,y & z columns are present!")
+        for view, axis_names in self.VIEW_AXIS_NAMES.items():
+            n_present = sum(col in data_frame.columns for col in axis_names)
+            if n_present == len(axis_names):
+                continue
+
+            if view[0] == "PCA" or n_present > 0:
+                if self.verbose:
+                    print(
+                        "Df corrupted as not all x,y & z columns are present!"
+                    )
 
-            return False
+                return False
 
         # Is the corresponding data complete ?
         for col in self.AXIS_NAMES:
-            for value in list(data_frame[col]):
-                if not isinstance(value, float):
-                    # Value is corrupted
-                    if self.verbose:
-                        print(
-                            f"At least one value of the {col} column is"
-                            " corrupted!"
-                        )
+            if col not in data_frame.columns:
+                continue
+
+            if data_frame[col].dtype.kind != "f":
+                # Value is corrupted
+                if self.verbose:
+                    print(
+                        f"At least one value of the {col} column is"
+                        " corrupted!"
+                    )
 
-                    return False
+                return False
 
         # All values of the x,y & z column are correct
         return True
@@ -783,10 +1002,13 @@ class DataPreprocessor:
         # get missing columns in present df
         missing_cols = df_cols - pres_df_cols
 
+        # not all views have to be present
+        n_axis_cols = len(pres_df_cols & set(self.AXIS_NAMES))
+
         # add missing columns to the present df
         for col in missing_cols:
             pres_df_csv.insert(
-                len(pres_df_cols) - len(self.AXIS_NAMES), col, df_csv[col]
+                len(pres_df_cols) - n_axis_cols, col, df_csv[col]
             )
             if self.verbose:
                 print(
@@ -816,47 +1038,3 @@ class DataPreprocessor:
             print(", ".join(missing[:10]))
             if nr_missed > 10:
                 print("...")
-
-    def get_umap_paras_dict(self, df: DataFrame):
-        """
-        Create dictionary that saves umap parameters and their coordinates
-        :param df: dataframe with all the data
-        :return: the wanted dictionary
-        """
-        umap_paras_dict = dict()
-        n_neighbours = self.umap_paras["n_neighbours"]
-        min_dist = self.umap_paras["min_dist"]
-        metric = self.umap_paras["metric"]
-        umap_paras_string = (
-            str(n_neighbours) + " ; " + str(min_dist) + " ; " + metric
-        )
-        coords_df = df[self.UMAP_AXIS_NAMES]
-        umap_paras_dict[umap_paras_string] = coords_df
-
-        return umap_paras_dict
-
-    def get_tsne_paras_dict(self, df: DataFrame):
-        """
-        Vreate dictionary that saves TSNE parameters and their corresponding coordinates
-        :param df: dataframe with all the data
-        :return: the wanted dictionary
-        """
-        tsne_paras_dict = dict()
-        iterations = self.tsne_paras["iterations"]
-        perplexity = self.tsne_paras["perplexity"]
-        learning_rate = self.tsne_paras["learning_rate"]
-        tsne_metric = self.tsne_paras["tsne_metric"]
-        # String representation of the current TSNE parameters
-        tsne_paras_string = (
-            str(iterations)
-            + " ; "
-            + str(perplexity)
-            + " ; "
-            + str(learning_rate)
-            + " ; "
-            + str(tsne_metric)
-        )
-        coords_df = df[self.TSNE_AXIS_NAMES]
-        tsne_paras_dict[tsne_paras_string] = coords_df
-
-        return tsne_paras_dict
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pandas as pd
+from pandas import DataFrame
+
+from src.preprocessing import DataPreprocessor
+from src.spatialindex import SpatialIndex
+
+
+class ProjectionStore:
+    """
+    Coordinates of the calculated views, kept apart from the metadata in the dataframe. Each projection,
+    a dimensionality reduction with its parameters, has one array per dimension in the row order of the
+    dataframe. Which parameters are displayed is part of the view state of each session, switching between
+    them only selects other arrays, neither the store nor the dataframe are changed. The spatial index of a
+    view is built when it is first needed and kept until the view is replaced.
+    """
+
+    DIM_REDS = ["PCA", "UMAP", "TSNE"]
+    DIMS = ["3D", "2D"]
+
+    def __init__(self, index):
+        """
+        :param index: index of the dataframe, gives the row order of the arrays
+        """
+        self.index = pd.Index(index)
+
+        # (dimensionality reduction, parameters string) -> {dimension: coordinates}
+        self._views = dict()
+        self._lock = threading.Lock()
+
+        # (dimensionality reduction, parameters string, dimension) -> spatial index
+        self._indexes = dict()
+        self._index_lock = threading.Lock()
+
+    @classmethod
+    def from_df(cls, df: DataFrame, paras_strings: dict):
+        """
+        Takes the coordinates of all views present as axis columns of the dataframe
+        :param df: dataframe with all the data
+        :param paras_strings: parameters string of each dimensionality reduction, PCA has none
+        :return: the projection store
+        """
+        store = cls(df.index)
+        for dim_red in cls.DIM_REDS:
+            paras_string = paras_strings.get(dim_red, "")
+            store.add(dim_red, paras_string, df)
+
+        return store
+
+    def add(self, dim_red: str, paras_string: str, coords_df: DataFrame):
+        """
+        Adds the views of a projection present in the data frame, aligned once to the row order
+        :param dim_red: dimensionality reduction
+        :param paras_string: string representation of the parameters
+        :param coords_df: coordinates of one or more views as axis columns, indexed by the IDs
+        :return: None
+        """
+        views = dict()
+        for dim in self.DIMS:
+            if (dim_red, dim) not in DataPreprocessor.VIEW_AXIS_NAMES:
+                continue
+
+            axis_names = DataPreprocessor.VIEW_AXIS_NAMES[(dim_red, dim)]
+            if not all(col in coords_df.columns for col in axis_names):
+                continue
+
+            coords = coords_df[axis_names]
+            if not coords.index.equals(self.index):
+                coords = coords.reindex(self.index)
+            views[dim] = coords.to_numpy(dtype=float)
+
+        if not views:
+            return
+
+        with self._lock:
+            self._views.setdefault((dim_red, paras_string), dict()).update(views)
+            for dim in views:
+                self._indexes.pop((dim_red, paras_string, dim), None)
+
+    def get(self, dim_red: str, dim: str, paras_string: str):
+        """
+        :param dim_red: dimensionality reduction
+        :param dim: 2D or 3D
+        :param paras_string: string representation of the parameters
+        :return: coordinates in the row order of the dataframe, None if the view isn't calculated
+        """
+        with self._lock:
+            return self._views.get((dim_red, paras_string), dict()).get(dim)
+
+    def spatial_index(
+        self, dim_red: str, dim: str, paras_string: str
+    ) -> SpatialIndex:
+        """
+        :param dim_red: dimensionality reduction
+        :param dim: 2D or 3D
+        :param paras_string: string representation of the parameters
+        :return: spatial index over the coordinates of the view, None if the view isn't calculated
+        """
+        key = (dim_red, paras_string, dim)
+        # built once, even if requested by several callbacks at the same time
+        with self._index_lock:
+            with self._lock:
+                index = self._indexes.get(key)
+            if index is not None:
+                return index
+
+            coords = self.get(dim_red, dim, paras_string)
+            if coords is None:
+                return None
+            index = SpatialIndex(coords)
+
+            with self._lock:
+                views = self._views.get((dim_red, paras_string), dict())
+                # not kept if the view was replaced in the meantime
+                if views.get(dim) is coords:
+                    self._indexes[key] = index
+
+        return index
+
+    def has_view(self, dim_red: str, dim: str, paras_string: str) -> bool:
+        """
+        :param dim_red: dimensionality reduction
+        :param dim: 2D or 3D
+        :param paras_string: string representation of the parameters
+        :return: whether the view is calculated
+        """
+        return self.get(dim_red, dim, paras_string) is not None
+
+    def paras_strings(self, dim_red: str) -> list:
+        """
+        :param dim_red: dimensionality reduction
+        :return: parameters of the calculated projections, in order of calculation
+        """
+        with self._lock:
+            return [
+                paras_string
+                for view_dim_red, paras_string in self._views
+                if view_dim_red == dim_red
+            ]
+
+    def to_frame(self, dim_red: str, paras_string: str) -> DataFrame:
+        """
+        :param dim_red: dimensionality reduction
+        :param paras_string: string representation of the parameters
+        :return: all calculated views of the projection as axis columns
+        """
+        with self._lock:
+            views = self._views.get((dim_red, paras_string), dict())
+
+            # the 2D view of PCA shares the columns of the 3D view
+            columns = dict()
+            for dim in self.DIMS:
+                if dim not in views:
+                    continue
+                axis_names = DataPreprocessor.VIEW_AXIS_NAMES[(dim_red, dim)]
+                for col_idx, col in enumerate(axis_names):
+                    columns.setdefault(col, views[dim][:, col_idx])
+
+        return DataFrame(columns, index=self.index)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+from pandas import DataFrame
+
+from src.landmarks import Landmarks
+
+
+class ProjectionWorker:
+    """
+    Computes the views (2D or 3D) of the slow dimensionality reductions (UMAP & t-SNE) in background
+    threads, so that the application can be served with the PCA view while these are still running.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        embedding_uids: list,
+        df_path: Path,
+        index_name: str,
+        verbose: bool,
+        max_workers: int = 2,
+        landmarks: Landmarks = None,
+        umap_models: dict = None,
+    ):
+        self.embeddings = embeddings
+        self.embedding_uids = embedding_uids
+        self.df_path = df_path
+        self.index_name = index_name
+        self.verbose = verbose
+        self.landmarks = landmarks
+        # the fitted UMAP models are added by dimension, if given
+        self.umap_models = umap_models
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="projection"
+        )
+        self._futures = dict()
+        self._paras = dict()
+        self._lock = threading.Lock()
+
+    def submit(self, dim_red: str, paras: dict, dim: str = "3D"):
+        """
+        Starts the calculation of a view of the given dimensionality reduction in the background
+        :param dim_red: the dimensionality reduction, UMAP or TSNE
+        :param paras: parameters of the calculation
+        :param dim: dimension of the view, 2D or 3D
+        :return: None
+        """
+        # import here to avoid a circular import with the preprocessing module
+        from src.preprocessing import DataPreprocessor
+
+        if dim_red == "UMAP":
+            generate = partial(
+                DataPreprocessor.generate_umap, models=self.umap_models
+            )
+        elif dim_red == "TSNE":
+            generate = DataPreprocessor.generate_tsne
+        else:
+            raise ValueError(
+                f"{dim_red} can't be calculated in the background!"
+            )
+
+        # copy, since the parameter dictionaries are changed by the callbacks
+        paras = dict(paras)
+        key = f"{dim_red}_{dim}"
+
+        with self._lock:
+            if key in self._futures:
+                return
+
+            self._paras[key] = paras
+            self._futures[key] = self._executor.submit(
+                generate, self.embeddings, paras, self.landmarks, [dim]
+            )
+
+        if self.verbose:
+            print(f"{dim} {dim_red} is calculated in the background.")
+
+    def pending(self) -> list[str]:
+        """
+        :return: views (e.g. UMAP_3D) that are submitted but not collected yet
+        """
+        with self._lock:
+            return list(self._futures.keys())
+
+    def pending_dim_reds(self) -> list[str]:
+        """
+        :return: dimensionality reductions with at least one pending view
+        """
+        return sorted({key.split("_")[0] for key in self.pending()})
+
+    def _pop(self, key: str):
+        """
+        Takes a finished calculation out of the worker, has to be called with the lock
+        :param key: the view, e.g. UMAP_3D
+        :return: coordinates and parameters, None if the calculation failed
+        """
+        future: Future = self._futures.pop(key)
+        paras = self._paras.pop(key)
+
+        if future.exception() is not None:
+            print(f"Background calculation of {key} failed: {future.exception()}")
+            return None
+
+        coords_df = future.result()
+        coords_df.index = self.embedding_uids
+
+        if self.verbose:
+            print(f"Background calculation of {key} finished.")
+
+        return coords_df, paras
+
+    def collect(self) -> dict[str, tuple[DataFrame, dict]]:
+        """
+        Takes the finished calculations out of the worker
+        :return: dictionary with the view (e.g. UMAP_3D) as key and its coordinates and parameters as value
+        """
+        finished = dict()
+        with self._lock:
+            done = [
+                key for key, future in self._futures.items() if future.done()
+            ]
+            for key in done:
+                result = self._pop(key)
+                if result is not None:
+                    finished[key] = result
+
+        return finished
+
+    def wait(self, dim_red: str, dim: str):
+        """
+        Waits for a pending view and takes it out of the worker
+        :param dim_red: the dimensionality reduction, UMAP or TSNE
+        :param dim: dimension of the view, 2D or 3D
+        :return: coordinates and parameters, None if the view isn't pending or failed
+        """
+        key = f"{dim_red}_{dim}"
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None:
+            return None
+
+        # wait without the lock, so that other views can be collected meanwhile
+        wait([future])
+
+        with self._lock:
+            if key not in self._futures:
+                # collected by another callback meanwhile
+                return None
+
+            return self._pop(key)
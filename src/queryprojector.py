@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+import threading
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from src.landmarks import nearest_neighbours
+
+
+class QueryProjector:
+    """
+    Places new (query) embeddings into an existing RostSpace map without refitting it. The fitted
+    UMAP and PCA models are persisted in the output directory and reused.
+    """
+
+    # number of queries transformed at once, bounds the memory of the distance matrices
+    BATCH_SIZE = 2048
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        ids: list[str],
+        model_path: Path,
+        umap_paras: dict,
+        verbose: bool,
+        landmark_idx: np.ndarray = None,
+        fitted_models: dict = None,
+    ):
+        """
+        :param embeddings: embeddings of the map
+        :param ids: IDs of the embeddings, displayed as nearest neighbours
+        :param model_path: pickle file the fitted models are saved in
+        :param umap_paras: UMAP parameters of the start, the map of these parameters is projected into
+        :param verbose: print internal operations
+        :param landmark_idx: indexes of the landmarks, the UMAP model is only fitted on these
+        :param fitted_models: UMAP models the map was generated with by dimension, filled while the views
+        are calculated, reused instead of fitting the models again
+        """
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.ids = np.asarray(ids, dtype=object)
+        self.model_path = model_path
+        self.umap_paras = umap_paras
+        self.verbose = verbose
+        self.landmark_idx = landmark_idx
+        self.fitted_models = fitted_models if fitted_models is not None else dict()
+
+        # squared norms of the map embeddings, reused for every nearest neighbour search
+        self._sq_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+
+        self._lock = threading.Lock()
+        self._models = self._load_models()
+        # models are fitted only once, with a lock per model, so fitting one doesn't block the others
+        self._fit_locks = dict()
+
+        # models of the views generated before the start
+        self.save_fitted_models()
+
+    def _load_models(self) -> dict:
+        """
+        Loads the persisted models if present
+        :return: dictionary with the model key and the fitted model
+        """
+        if self.model_path.is_file():
+            with open(self.model_path, "rb") as f:
+                models = pickle.load(f)
+
+            if self.verbose:
+                print(f"Fitted models loaded from {self.model_path}")
+
+            return models
+
+        return dict()
+
+    def _save_models(self):
+        """
+        Persists the fitted models in the output directory
+        :return: None
+        """
+        with open(self.model_path, "wb") as f:
+            pickle.dump(self._models, f)
+
+    def save_fitted_models(self):
+        """
+        Persists the UMAP models the map was generated with, so that they are reused after a restart
+        :return: None
+        """
+        with self._lock:
+            new_models = dict()
+            for dim, model in list(self.fitted_models.items()):
+                key = self._model_key("UMAP", dim)
+                if self._models.get(key) is not model:
+                    new_models[key] = model
+
+            if new_models:
+                self._models.update(new_models)
+                self._save_models()
+
+    def _model_key(self, dim_red: str, dim: str) -> str:
+        """
+        :param dim_red: dimensionality reduction, UMAP or PCA
+        :param dim: dimension, 2D or 3D
+        :return: key of the model, contains the UMAP parameters
+        """
+        if dim_red == "PCA":
+            # 2D uses the first two components of the 3D PCA
+            return "PCA"
+
+        key = (
+            f"UMAP_{dim} ; {self.umap_paras['n_neighbours']} ;"
+            f" {self.umap_paras['min_dist']} ; {self.umap_paras['metric']}"
+        )
+        if self.landmark_idx is not None:
+            key += f" ; landmarks {len(self.landmark_idx)}"
+
+        return key
+
+    def get_model(self, dim_red: str, dim: str):
+        """
+        Returns the fitted model of the map. The UMAP model the map was generated with is reused, other
+        models are fitted on first use. Both are persisted. Fitting is deterministic, so the fitted model
+        reproduces the displayed coordinates.
+        :param dim_red: dimensionality reduction, UMAP or PCA
+        :param dim: dimension, 2D or 3D
+        :return: the fitted model
+        """
+        if dim_red not in ["UMAP", "PCA"]:
+            raise ValueError(
+                f"Queries can't be projected with {dim_red}, only UMAP and PCA"
+                " are supported!"
+            )
+        if dim not in ["2D", "3D"]:
+            raise ValueError(f"Dimension {dim} is not valid, use 2D or 3D!")
+
+        key = self._model_key(dim_red, dim)
+
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+
+            fit_lock = self._fit_locks.setdefault(key, threading.Lock())
+
+        # fitted without the lock, so that queries of the other models aren't blocked meanwhile
+        with fit_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+
+            model = self.fitted_models.get(dim) if dim_red == "UMAP" else None
+            if model is None:
+                model = self._fit(dim_red, dim)
+
+            with self._lock:
+                self._models[key] = model
+                self._save_models()
+
+            return model
+
+    def _fit(self, dim_red: str, dim: str):
+        """
+        Fits the model of the map
+        :param dim_red: dimensionality reduction, UMAP or PCA
+        :param dim: dimension, 2D or 3D
+        :return: the fitted model
+        """
+        if self.verbose:
+            print(
+                f"Fit {self._model_key(dim_red, dim)} model for query"
+                " projection."
+            )
+
+        if dim_red == "PCA":
+            from sklearn.decomposition import PCA
+
+            model = PCA(n_components=3, random_state=42)
+        else:
+            import umap
+
+            model = umap.UMAP(
+                n_neighbors=self.umap_paras["n_neighbours"],
+                min_dist=self.umap_paras["min_dist"],
+                random_state=42,
+                n_components=3 if dim == "3D" else 2,
+                metric=self.umap_paras["metric"],
+            )
+        if dim_red == "UMAP" and self.landmark_idx is not None:
+            model.fit(self.embeddings[self.landmark_idx])
+        else:
+            model.fit(self.embeddings)
+
+        return model
+
+    def nearest_neighbours(self, queries: np.ndarray, k: int):
+        """
+        Euclidean nearest neighbours of the queries in the embeddings of the map, calculated in batches
+        :param queries: query embeddings, n_queries x embedding dim
+        :param k: number of neighbours
+        :return: indexes and distances of the neighbours, both n_queries x k and sorted by distance
+        """
+        k = min(k, len(self.embeddings))
+
+        indexes = np.empty((len(queries), k), dtype=np.int64)
+        distances = np.empty((len(queries), k), dtype=np.float32)
+
+        for start in range(0, len(queries), self.BATCH_SIZE):
+            batch = queries[start : start + self.BATCH_SIZE]
+            (
+                indexes[start : start + len(batch)],
+                distances[start : start + len(batch)],
+            ) = nearest_neighbours(batch, self.embeddings, k, self._sq_norms)
+
+        return indexes, distances
+
+    def project(
+        self,
+        queries: np.ndarray,
+        dim_red: str = "UMAP",
+        dim: str = "3D",
+        k: int = 10,
+    ):
+        """
+        Projects query embeddings into the map and finds their nearest neighbours
+        :param queries: query embeddings, n_queries x embedding dim
+        :param dim_red: dimensionality reduction, UMAP or PCA
+        :param dim: dimension, 2D or 3D
+        :param k: number of nearest neighbours
+        :return: coordinates (n_queries x 2 or 3), neighbour IDs and their distances (n_queries x k)
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+
+        if queries.shape[1] != self.embeddings.shape[1]:
+            raise ValueError(
+                f"Query embeddings have dimension {queries.shape[1]}, the map"
+                f" has dimension {self.embeddings.shape[1]}!"
+            )
+
+        model = self.get_model(dim_red, dim)
+
+        coords = np.vstack(
+            [
+                model.transform(queries[start : start + self.BATCH_SIZE])
+                for start in range(0, len(queries), self.BATCH_SIZE)
+            ]
+        )
+        if dim_red == "PCA" and dim == "2D":
+            coords = coords[:, :2]
+
+        indexes, distances = self.nearest_neighbours(queries, k)
+
+        return coords, self.ids[indexes], distances
+
+    def project_h5(
+        self,
+        h5_file,
+        dim_red: str = "UMAP",
+        dim: str = "3D",
+        k: int = 10,
+    ):
+        """
+        Projects the embeddings of a h5 file into the map
+        :param h5_file: path or file object of the h5 file, IDs as keys and per protein embeddings as values
+        :param dim_red: dimensionality reduction, UMAP or PCA
+        :param dim: dimension, 2D or 3D
+        :param k: number of nearest neighbours
+        :return: query IDs, coordinates, neighbour IDs and their distances
+        """
+        query_ids = list()
+        queries = list()
+        with h5py.File(h5_file, "r") as hdf:
+            for identifier, embd in hdf.items():
+                query_ids.append(identifier)
+                queries.append(embd[:])
+
+        if len(queries) == 0:
+            raise ValueError("The h5 file holds no embeddings!")
+
+        coords, neighbour_ids, distances = self.project(
+            np.vstack(queries), dim_red, dim, k
+        )
+
+        return query_ids, coords, neighbour_ids, distances
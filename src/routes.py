@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+
+import dash
+from flask import jsonify, request
+
+from src.figurecache import FigureCache
+from src.queryprojector import QueryProjector
+
+
+def to_response(
+    query_ids: list,
+    coords,
+    neighbour_ids,
+    distances,
+    dim_red: str,
+    dim: str,
+):
+    """
+    Brings the projection of the queries into the json response format
+    :param query_ids: IDs of the queries
+    :param coords: coordinates of the queries in the map
+    :param neighbour_ids: IDs of the nearest neighbours of each query
+    :param distances: distances of the nearest neighbours of each query
+    :param dim_red: used dimensionality reduction
+    :param dim: used dimension
+    :return: response dictionary
+    """
+    queries = list()
+    for idx, query_id in enumerate(query_ids):
+        queries.append(
+            dict(
+                id=query_id,
+                coordinates=coords[idx].tolist(),
+                neighbours=[
+                    dict(id=str(n_id), distance=float(dist))
+                    for n_id, dist in zip(neighbour_ids[idx], distances[idx])
+                ],
+            )
+        )
+
+    return dict(dim_red=dim_red, dim=dim, queries=queries)
+
+
+def get_routes(
+    app: dash.Dash,
+    query_projector: QueryProjector,
+    figure_cache: FigureCache = None,
+):
+    """
+    Adds the HTTP API routes to the flask server of the application
+    :param app: dash application
+    :param query_projector: projects query embeddings into the map
+    :param figure_cache: cache of the rendered figures, its statistics are served if given
+    :return: None
+    """
+
+    @app.server.route("/api/project", methods=["POST"])
+    def project_queries():
+        """
+        Projects query embeddings into the map with the persisted UMAP/PCA models.
+        Either a json body {"embeddings": {ID: [values]}, "dim_red": "UMAP", "dim": "3D", "k": 10}
+        or a multipart upload of a h5 file in the field "h5", with the options as form fields.
+        :return: coordinates and nearest neighbours of the queries in json format
+        """
+        if "h5" in request.files:
+            options = request.form
+        else:
+            options = request.get_json(silent=True)
+            if options is None or "embeddings" not in options:
+                return (
+                    jsonify(
+                        error="Expected a json body with embeddings or a h5"
+                        " file upload!"
+                    ),
+                    400,
+                )
+
+        dim_red = options.get("dim_red", "UMAP")
+        dim = options.get("dim", "3D")
+
+        try:
+            k = int(options.get("k", 10))
+
+            if "h5" in request.files:
+                h5_file = io.BytesIO(request.files["h5"].read())
+                (
+                    query_ids,
+                    coords,
+                    neighbour_ids,
+                    distances,
+                ) = query_projector.project_h5(h5_file, dim_red, dim, k)
+            else:
+                embeddings = options["embeddings"]
+                if isinstance(embeddings, dict):
+                    query_ids = list(embeddings.keys())
+                    embeddings = list(embeddings.values())
+                else:
+                    query_ids = [str(idx) for idx in range(len(embeddings))]
+
+                coords, neighbour_ids, distances = query_projector.project(
+                    embeddings, dim_red, dim, k
+                )
+        except (ValueError, OSError) as error:
+            return jsonify(error=str(error)), 400
+
+        return jsonify(
+            to_response(
+                query_ids, coords, neighbour_ids, distances, dim_red, dim
+            )
+        )
+
+    @app.server.route("/api/figure_cache", methods=["GET"])
+    def figure_cache_stats():
+        """
+        Statistics of the figure cache for monitoring
+        :return: hits, misses, hit rate and size of the cache in json format
+        """
+        if figure_cache is None:
+            return jsonify(error="No figure cache in use!"), 404
+
+        return jsonify(figure_cache.stats())
@@ -1,7 +1,13 @@
 from pathlib import Path
 
-from src.callbacks import get_callbacks, get_callbacks_pdb
+from src.callbacks import (
+    get_callbacks,
+    get_callbacks_pdb,
+    tsne_paras_to_string,
+    umap_paras_to_string,
+)
 from src.preprocessing import DataPreprocessor
+from src.projectionstore import ProjectionStore
 from src.structurecontainer import StructureContainer
 from src.visualization.visualizator import Visualizator
 
@@ -59,8 +65,14 @@ data_preprocessor = DataPreprocessor(
     fasta_dict,
 ) = data_preprocessor.data_preprocessing()
 
-umap_paras_dict = data_preprocessor.get_umap_paras_dict(df)
-tsne_paras_dict = data_preprocessor.get_tsne_paras_dict(df)
+projection_store = ProjectionStore.from_df(
+    df,
+    {
+        "UMAP": umap_paras_to_string(umap_paras),
+        "TSNE": tsne_paras_to_string(tsne_paras),
+    },
+)
+df = df.drop(columns=DataPreprocessor.AXIS_NAMES, errors="ignore")
 
 structure_container = StructureContainer(pdb_d=pdb_dir, json_d=None)
 ids = df.index.to_list()
@@ -92,8 +104,7 @@ get_callbacks(
     embeddings=embeddings,
     embedding_uids=embedding_uids,
     distance_dic=distance_dic,
-    umap_paras_dict=umap_paras_dict,
-    tsne_paras_dict=tsne_paras_dict,
+    projection_store=projection_store,
     fasta_dict=fasta_dict,
     struct_container=structure_container,
 )
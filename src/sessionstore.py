@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import threading
+from collections import OrderedDict
+
+
+class SessionStore:
+    """
+    Bounded least recently used store of the view state of each browser session, the parameters of the
+    displayed UMAP and t-SNE projection. The data shared by all sessions is never changed by a session.
+    A session that isn't known (anymore) starts with the default state.
+    """
+
+    def __init__(self, defaults: dict, max_size: int = 256):
+        """
+        :param defaults: parameters of each dimensionality reduction a new session starts with
+        :param max_size: maximal number of stored sessions, the least recently used one is removed first
+        """
+        self.defaults = copy.deepcopy(defaults)
+        self.max_size = max_size
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def paras(self, session_id: str, dim_red: str) -> dict:
+        """
+        :param session_id: ID of the browser session, None for the default state
+        :param dim_red: dimensionality reduction
+        :return: copy of the parameters displayed in the session
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+            else:
+                state = self.defaults
+
+            return dict(state[dim_red])
+
+    def set_paras(self, session_id: str, dim_red: str, paras: dict):
+        """
+        Sets the parameters displayed in the session
+        :param session_id: ID of the browser session, the state of None isn't stored
+        :param dim_red: dimensionality reduction
+        :param paras: parameters in dictionary
+        :return: None
+        """
+        if session_id is None or self.max_size <= 0:
+            return
+
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = copy.deepcopy(self.defaults)
+                self._sessions[session_id] = state
+            state[dim_red] = dict(paras)
+
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
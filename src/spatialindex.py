@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from matplotlib.path import Path
+from scipy.spatial import cKDTree
+
+
+class SpatialIndex:
+    """
+    Index over the coordinates of a view for finding the proteins in a box, e.g. the zoomed viewport, in a
+    lasso and nearest to a point. The points are sorted into a uniform grid of cells, a box only checks
+    the points of the cells it overlaps. Nearest points are found with a k-d tree. Points without
+    coordinates are left out.
+    """
+
+    # average number of points per cell of the grid
+    POINTS_PER_CELL = 64
+
+    def __init__(self, coords: np.ndarray):
+        """
+        :param coords: coordinates of the points, one row per point
+        """
+        coords = np.asarray(coords, dtype=float)
+        self.n_dims = coords.shape[1]
+
+        # positions of the points with coordinates
+        rows = np.flatnonzero(np.isfinite(coords).all(axis=1))
+        coords = coords[rows]
+
+        n_points = len(rows)
+        n_cells = n_points / self.POINTS_PER_CELL
+        self.bins = max(1, int(round(n_cells ** (1 / self.n_dims))))
+        if n_points > 0:
+            self.lows = coords.min(axis=0)
+            highs = coords.max(axis=0)
+        else:
+            self.lows = highs = np.zeros(self.n_dims)
+        self.widths = np.where(
+            highs > self.lows, (highs - self.lows) / self.bins, 1.0
+        )
+
+        # points sorted by their cell, the points of a cell are a contiguous slice
+        cells = np.ravel_multi_index(
+            self.cell_of(coords).T, (self.bins,) * self.n_dims
+        )
+        order = np.argsort(cells, kind="stable")
+        self.rows = rows[order]
+        self.coords = coords[order]
+        self.cell_starts = np.searchsorted(
+            cells[order], np.arange(self.bins**self.n_dims + 1)
+        )
+
+        self._tree = None
+
+    def cell_of(self, coords: np.ndarray) -> np.ndarray:
+        """
+        :param coords: coordinates, one row per point
+        :return: cell of the grid along each axis, points outside are in the nearest cell
+        """
+        return np.clip(
+            np.floor((coords - self.lows) / self.widths), 0, self.bins - 1
+        ).astype(np.int64)
+
+    def box(self, bounds: list) -> np.ndarray:
+        """
+        :param bounds: minimum and maximum of each axis, None for an axis without limits
+        :return: positions of the points inside the box, sorted
+        """
+        return np.sort(self.rows[self._box_points(bounds)])
+
+    def _box_points(self, bounds: list) -> np.ndarray:
+        """
+        :param bounds: minimum and maximum of each axis, None for an axis without limits
+        :return: positions of the points inside the box in the cell order of the index
+        """
+        lows = np.full(self.n_dims, -np.inf)
+        highs = np.full(self.n_dims, np.inf)
+        for axis_idx, axis_range in enumerate(bounds):
+            if axis_range is not None:
+                lows[axis_idx], highs[axis_idx] = sorted(axis_range)
+
+        # the cells overlapping the box, the cells along the last axis are one slice of the points
+        first_cells = self.cell_of(lows[None])[0]
+        last_cells = self.cell_of(highs[None])[0]
+        leading = np.stack(
+            np.meshgrid(
+                *[
+                    np.arange(first, last + 1)
+                    for first, last in zip(first_cells[:-1], last_cells[:-1])
+                ],
+                indexing="ij",
+            ),
+            axis=-1,
+        ).reshape(-1, self.n_dims - 1)
+        shape = (self.bins,) * self.n_dims
+        first_last_axis = np.full(len(leading), first_cells[-1])
+        last_last_axis = np.full(len(leading), last_cells[-1])
+        starts = np.ravel_multi_index(
+            np.column_stack([leading, first_last_axis]).T, shape
+        )
+        ends = np.ravel_multi_index(
+            np.column_stack([leading, last_last_axis]).T, shape
+        )
+        slices = [
+            np.arange(self.cell_starts[start], self.cell_starts[end + 1])
+            for start, end in zip(starts, ends)
+        ]
+        candidates = np.concatenate(slices + [np.empty(0, dtype=np.int64)])
+
+        # the cells at the border of the box are only partly inside
+        candidate_coords = self.coords[candidates]
+        inside = (
+            (candidate_coords >= lows) & (candidate_coords <= highs)
+        ).all(axis=1)
+
+        return candidates[inside]
+
+    def lasso(self, polygon: np.ndarray) -> np.ndarray:
+        """
+        :param polygon: corners of the lasso in the first two axes
+        :return: positions of the points inside the lasso, sorted
+        """
+        polygon = np.asarray(polygon, dtype=float)
+        candidates = self._box_points(
+            [
+                [polygon[:, 0].min(), polygon[:, 0].max()],
+                [polygon[:, 1].min(), polygon[:, 1].max()],
+            ]
+        )
+        if len(candidates) == 0:
+            return self.rows[candidates]
+
+        inside = Path(polygon).contains_points(self.coords[candidates, :2])
+
+        return np.sort(self.rows[candidates[inside]])
+
+    def nearest(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: coordinates, one row per point
+        :return: position of the nearest point of each
+        """
+        if self._tree is None:
+            self._tree = cKDTree(self.coords)
+
+        _, nearest = self._tree.query(np.asarray(points, dtype=float))
+
+        return self.rows[nearest]
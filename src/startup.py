@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# numba reads its cache directory at import time, the default next to the installed packages is often read only
+NUMBA_CACHE_DIR = Path.home() / ".cache" / "rostspace" / "numba"
+
+
+class StartupTimer:
+    """
+    Collects the duration of the startup phases and reports them
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = list()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measures the duration of the enclosed block
+        :param name: name of the phase in the report
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        """
+        Adds a measured phase, also used by background threads
+        :param name: name of the phase in the report
+        :param seconds: duration of the phase
+        """
+        with self._lock:
+            self.phases.append((name, seconds))
+
+    def report(self) -> str:
+        """
+        :return: the timing report of all phases so far
+        """
+        with self._lock:
+            phases = list(self.phases)
+
+        lines = ["Startup timing:"]
+        for name, seconds in phases:
+            lines.append(f"  {name:<32}{seconds:8.2f}s")
+        lines.append(
+            f"  {'total until now':<32}"
+            f"{time.perf_counter() - self.start:8.2f}s"
+        )
+
+        return "\n".join(lines)
+
+
+def enable_numba_cache(
+    cache_dir: Path = NUMBA_CACHE_DIR,
+) -> threading.Thread:
+    """
+    Compiled numba functions are cached on disk, so that UMAP is only compiled on the very first start.
+    Most of the UMAP and pynndescent kernels are not declared with cache=True, hence it is made the
+    default of numba.njit and numba.jit only while UMAP is imported in a background thread. numba is
+    restored afterwards, other numba users are not affected. Imports of UMAP in other threads wait for this
+    import. Has to be called before UMAP is imported, otherwise its kernels are not cached.
+    :param cache_dir: directory of the cache, overwritten by the NUMBA_CACHE_DIR environment variable
+    :return: the thread importing UMAP, None if UMAP is already imported
+    """
+    if "NUMBA_CACHE_DIR" not in os.environ:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.environ["NUMBA_CACHE_DIR"] = str(cache_dir)
+
+    if "umap" in sys.modules:
+        return None
+
+    import numba
+
+    njit = numba.njit
+    jit = numba.jit
+
+    def cached_njit(*args, **kwargs):
+        kwargs.setdefault("cache", True)
+        return njit(*args, **kwargs)
+
+    def cached_jit(*args, **kwargs):
+        kwargs.setdefault("cache", True)
+        return jit(*args, **kwargs)
+
+    def import_umap():
+        try:
+            import umap
+        finally:
+            numba.njit = njit
+            numba.jit = jit
+
+    # the kernels are decorated when UMAP and pynndescent are imported
+    numba.njit = cached_njit
+    numba.jit = cached_jit
+
+    thread = threading.Thread(
+        target=import_umap, name="umap-import", daemon=True
+    )
+    thread.start()
+
+    return thread
+
+
+def warm_up_umap(timer: StartupTimer, verbose: bool) -> threading.Thread:
+    """
+    Imports UMAP and compiles its numba kernels by fitting and transforming a tiny dataset in a
+    background thread, so that the first UMAP calculation of the user doesn't wait for it.
+    :param timer: timer the duration of the warm-up is added to
+    :param verbose: print the duration when finished
+    :return: the started thread
+    """
+
+    def warm_up():
+        start = time.perf_counter()
+
+        import umap
+
+        data = np.random.default_rng(42).random((64, 8), dtype=np.float32)
+        for n_components in [2, 3]:
+            fit = umap.UMAP(
+                n_neighbors=5,
+                n_components=n_components,
+                random_state=42,
+                n_epochs=10,
+            )
+            fit.fit(data)
+            fit.transform(data[:4])
+
+        seconds = time.perf_counter() - start
+        timer.add("UMAP warm-up (background)", seconds)
+        if verbose:
+            print(f"UMAP warm-up finished after {seconds:.2f}s.")
+
+    thread = threading.Thread(target=warm_up, name="umap-warm-up", daemon=True)
+    thread.start()
+
+    return thread
@@ -0,0 +1,57 @@
+// Hydration of the figures sent by the server: coordinates and numeric marker colors are base64 encoded
+// typed arrays and the hover texts are indices into the ID table, which is only sent once with the
+// layout. The base64 data uses the URL-safe alphabet.
+
+const TYPED_ARRAYS = {
+    f4: Float32Array,
+    f8: Float64Array,
+    u1: Uint8Array,
+    u2: Uint16Array,
+    u4: Uint32Array,
+    i4: Int32Array,
+};
+
+function isTypedArray(value) {
+    return value !== null && typeof value === "object" && "bdata" in value;
+}
+
+function decodeArray(value) {
+    const binary = atob(value.bdata.replace(/-/g, "+").replace(/_/g, "/"));
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+
+    const TypedArray = TYPED_ARRAYS[value.dtype];
+    return new TypedArray(bytes.buffer, 0, bytes.length / TypedArray.BYTES_PER_ELEMENT);
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    figure: {
+        hydrate: function (graphData, idTable) {
+            if (!graphData) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+
+            const data = (graphData.data || []).map((trace) => {
+                const hydrated = Object.assign({}, trace);
+                ["x", "y", "z"].forEach((axis) => {
+                    if (isTypedArray(trace[axis])) {
+                        hydrated[axis] = decodeArray(trace[axis]);
+                    }
+                });
+                if (trace.marker && isTypedArray(trace.marker.color)) {
+                    hydrated.marker = Object.assign({}, trace.marker, {
+                        color: decodeArray(trace.marker.color),
+                    });
+                }
+                if (isTypedArray(trace.text)) {
+                    hydrated.text = Array.from(decodeArray(trace.text), (idx) => idTable[idx]);
+                }
+                return hydrated;
+            });
+
+            return Object.assign({}, graphData, { data: data });
+        },
+    },
+});
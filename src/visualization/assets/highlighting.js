@@ -0,0 +1,139 @@
+// Highlighting of clicked and selected molecules, done in the browser since the figure holds all coordinates.
+// The last two traces of the figure are the highlighting traces, the clicked molecule first and the
+// dropdown selection second.
+
+// coordinates of all points in one table per axis and the positions of the IDs in it, cached per
+// rendered figure so that highlighting many IDs is a single gather
+const tableCache = new WeakMap();
+
+function getTable(figure, axes) {
+    const key = figure.data[0];
+    let table = tableCache.get(key);
+
+    if (table === undefined) {
+        table = { positions: new Map(), coords: {} };
+        axes.forEach((axis) => {
+            table.coords[axis] = [];
+        });
+
+        figure.data.slice(0, -2).forEach((trace) => {
+            (trace.text || []).forEach((seqId, pointIdx) => {
+                table.positions.set(String(seqId), table.coords[axes[0]].length);
+                axes.forEach((axis) => {
+                    table.coords[axis].push(trace[axis][pointIdx]);
+                });
+            });
+        });
+        tableCache.set(key, table);
+    }
+
+    return table;
+}
+
+function setCoordinates(trace, axes, points) {
+    const coords = {};
+    axes.forEach((axis) => {
+        coords[axis] = points.map((point) => point[axis]);
+    });
+
+    return Object.assign({}, trace, coords);
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    highlighting: {
+        update_highlighting: function (
+            clickData,
+            ddMolecules,
+            lastClickedMol,
+            figure,
+            relayoutData,
+            relayoutDataSave
+        ) {
+            const noUpdate = window.dash_clientside.no_update;
+            const triggered = window.dash_clientside.callback_context.triggered.map(
+                (trigger) => trigger.prop_id
+            );
+
+            if (!figure || figure.data.length < 2) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+
+            // If plotly relayoutData is bugged and dict is empty for a reason, use last saved relayoutData
+            if (!relayoutData || !("scene.camera" in relayoutData)) {
+                relayoutData = relayoutDataSave;
+            }
+
+            const data = figure.data.slice();
+            const clickedTrace = data.length - 2;
+            const ddTrace = data.length - 1;
+            const threeD = data[ddTrace].type === "scatter3d";
+            const axes = threeD ? ["x", "y", "z"] : ["x", "y"];
+
+            let seqIds = ddMolecules ? ddMolecules.slice() : [];
+            let clickedMol = lastClickedMol;
+            let relayoutDataOut = noUpdate;
+
+            if (triggered.includes("graph.clickData")) {
+                const point = clickData.points[0];
+                if (point.text === undefined) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                clickedMol = point.text;
+
+                // Add to seq ids or replace last clicked molecule
+                if (lastClickedMol === null || lastClickedMol === undefined) {
+                    seqIds.push(clickedMol);
+                } else {
+                    seqIds = seqIds.map((seqId) =>
+                        seqId === lastClickedMol ? clickedMol : seqId
+                    );
+                }
+
+                data[clickedTrace] = setCoordinates(data[clickedTrace], axes, [point]);
+
+                // save relayoutData for buggy plotly
+                relayoutDataOut = relayoutData;
+            } else {
+                // Remove highlighting of clicked molecule if deselected in the dropdown menu
+                if (!seqIds.includes(clickedMol)) {
+                    if (clickedMol !== null && clickedMol !== undefined) {
+                        data[clickedTrace] = setCoordinates(data[clickedTrace], axes, []);
+                    }
+                    clickedMol = null;
+                }
+
+                // highlighted molecules of the dropdown menu without the clicked one
+                const table = getTable(figure, axes);
+                const positions = [];
+                seqIds.forEach((seqId) => {
+                    const position = table.positions.get(String(seqId));
+                    if (seqId !== clickedMol && position !== undefined) {
+                        positions.push(position);
+                    }
+                });
+                const coords = {};
+                axes.forEach((axis) => {
+                    coords[axis] = positions.map((position) => table.coords[axis][position]);
+                });
+                data[ddTrace] = Object.assign({}, data[ddTrace], coords);
+            }
+
+            // set camera to old settings so that camera stays in its position and doesn't reset
+            let layout = figure.layout;
+            if (threeD && relayoutData && relayoutData["scene.camera"]) {
+                layout = Object.assign({}, layout, {
+                    scene: Object.assign({}, layout.scene, {
+                        camera: relayoutData["scene.camera"],
+                    }),
+                });
+            }
+
+            return [
+                Object.assign({}, figure, { data: data, layout: layout }),
+                seqIds,
+                clickedMol,
+                relayoutDataOut,
+            ];
+        },
+    },
+});
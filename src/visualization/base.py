@@ -40,16 +40,28 @@ help_modal_icon_style = {
     "bottom": "8px",
 }
 
+# figures are compressed on each response, the fastest levels still shrink them several times
+COMPRESS_CONFIG = dict(
+    COMPRESS_LEVEL=1,
+    COMPRESS_BR_LEVEL=1,
+    COMPRESS_ZSTD_LEVEL=1,
+    COMPRESS_MIN_SIZE=1000,
+)
 
-def get_app():
+
+def get_app(compress: bool = False):
     """
     Initializes dash application
+    :param compress: compress the responses with flask-compress, needs dash[compress]
     :return: application
     """
     app = Dash(
         __name__,
         external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP],
+        compress=compress,
     )
+    # flask-compress reads the levels on each response, so they are set after it is registered
+    app.server.config.update(COMPRESS_CONFIG)
 
     return app
 
@@ -61,17 +73,23 @@ def init_app(
     dim_red: str,
     tsne_paras: dict,
     original_id_col: list,
+    pending_dim_reds: list[str] = None,
+    dim: str = "3D",
+    compress: bool = False,
 ):
     """
     Set up the layout of the application
     :return: application
     """
-    app = get_app()
+    if pending_dim_reds is None:
+        pending_dim_reds = []
+
+    app = get_app(compress)
 
     app.layout = dbc.Container(
         [
             # get all side components like header, toasts etc
-            get_side_components(app),
+            get_side_components(app, pending_dim_reds),
             # modal with disclaimer that opens on startup
             get_disclaimer_modal(),
             # graph and controls
@@ -86,6 +104,8 @@ def init_app(
                             dim_red,
                             tsne_paras,
                             original_id_col,
+                            pending_dim_reds,
+                            dim,
                         ),
                         width=12,
                     ),
@@ -98,17 +118,18 @@ def init_app(
     return app
 
 
-def get_side_components(app: Dash):
+def get_side_components(app: Dash, pending_dim_reds: list[str]):
     """
     Collection of side components like header, toasts etc. shared by normal and pdb app
     :param app: the Dash application
+    :param pending_dim_reds: dimensionality reductions still calculated in the background
     :return: side components in a html Div object
     """
 
     side_components = html.Div(
         children=[
             # Header
-            get_header(app),
+            get_header(app, pending_dim_reds),
             # Storage to save the clicked on molecule in the graph,
             # needed for replacing the clicked molecule in the list
             dcc.Store(id="clicked_mol_storage"),
@@ -122,6 +143,9 @@ def get_side_components(app: Dash):
                     html.Br(),
                     # toast that displays the nearest neighbours of the selected points
                     get_neighbour_toast(),
+                    html.Br(),
+                    # toast that displays the groups of the proteins selected with box or lasso
+                    get_selection_toast(),
                 ],
                 style={
                     "position": "fixed",
@@ -142,6 +166,8 @@ def get_graph_offcanvas(
     dim_red: str,
     tsne_paras: dict,
     tsne_paras_string: str,
+    pending_dim_reds: list[str],
+    dim: str = "3D",
 ):
     """
     Creates layout of the offcanvas for the graph.
@@ -149,6 +175,8 @@ def get_graph_offcanvas(
     :param umap_paras_string: UMAP parameters in string format.
     :param dim_red: the initial dimensionality reduction
     :param tsne_paras: Parameters of the TSNE calculation
+    :param pending_dim_reds: dimensionality reductions still calculated in the background, their tabs are disabled
+    :param dim: the initial dimension
     :return: graph offcanvas layout
     """
     offcanvas = dbc.Offcanvas(
@@ -177,13 +205,23 @@ def get_graph_offcanvas(
             ),
             html.Br(),
             html.Br(),
+            dcc.Markdown("Legend"),
+            # options are searched on the server, columns can have thousands of groups
+            dcc.Dropdown(
+                id="legend_dd",
+                options=[],
+                value=[],
+                multi=True,
+                placeholder="Search groups to show besides the largest ones",
+            ),
+            html.Br(),
             dcc.Markdown("Dimensions"),
             dbc.RadioItems(
                 options=[
                     {"label": "3D", "value": "3D"},
                     {"label": "2D", "value": "2D"},
                 ],
-                value="3D",
+                value=dim,
                 id="dim_radio",
                 inline=True,
             ),
@@ -208,6 +246,8 @@ def get_graph_offcanvas(
                     dbc.Tab(
                         label="UMAP",
                         tab_id="UMAP",
+                        id="umap_tab",
+                        disabled="UMAP" in pending_dim_reds,
                         children=[
                             html.Br(),
                             dbc.Row(
@@ -278,6 +318,8 @@ def get_graph_offcanvas(
                     dbc.Tab(
                         label="t-SNE",
                         tab_id="TSNE",
+                        id="tsne_tab",
+                        disabled="TSNE" in pending_dim_reds,
                         children=[
                             html.Br(),
                             dbc.Row(
@@ -392,16 +434,20 @@ def get_graph_container(
     dim_red: str,
     tsne_paras: dict,
     original_id_col: list,
+    pending_dim_reds: list[str],
+    dim: str = "3D",
 ):
     """
     Creates the layout for the graph Row
     :param umap_paras: umap parameters
     :param pdb: flag whether pdb layout is needed or not.
     :param csv_header: headers of the csv file
-    :param fig: graph Figure
+    :param fig: graph Figure, its traces may be encoded by the FigureEncoder
     :param dim_red: initial dimensionality reduction
     :param tsne_paras: TSNE parameters
-    :param original_id_col: list with the original IDs
+    :param original_id_col: list with the original IDs, the ID table of the encoded traces
+    :param pending_dim_reds: dimensionality reductions still calculated in the background
+    :param dim: initial dimension
     :return: Layout of the offcanvas
     """
     # UMAP parameters in string format
@@ -471,16 +517,33 @@ def get_graph_container(
         )
 
     graph_container = (
-        # Storage to save whether Highlighting circle is already displayed or not
-        dcc.Store(id="highlighting_bool", storage_type="memory", data=False),
+        # ID of the browser session, its view state is kept on the server
+        dcc.Store(id="session_id", storage_type="session"),
         # Storage to save last camera data (relayoutData)
         dcc.Store(id="relayoutData_save", storage_type="memory", data={}),
+        # Polling of the dimensionality reductions calculated in the background,
+        # "preferred" is switched to as soon as it is finished
+        dcc.Interval(
+            id="projection_interval",
+            interval=1000,
+            disabled=len(pending_dim_reds) == 0,
+        ),
+        dcc.Store(
+            id="projection_status",
+            storage_type="memory",
+            data=dict(
+                pending=pending_dim_reds,
+                preferred=dim_red if dim_red in pending_dim_reds else None,
+            ),
+        ),
         get_graph_offcanvas(
             umap_paras,
             umap_paras_string,
-            dim_red,
+            "PCA" if dim_red in pending_dim_reds else dim_red,
             tsne_paras,
             tsne_paras_string,
+            pending_dim_reds,
+            dim,
         ),
         get_settings_button_tooltip(button_id="graph_settings_button"),
         get_graph_download_button_tooltip(button_id="graph_download_button"),
@@ -527,9 +590,11 @@ def get_graph_container(
                 ),
             ],
         ),
+        # figure with encoded traces, hydrated in the browser with the table of the IDs
+        dcc.Store(id="graph_data", storage_type="memory", data=fig),
+        dcc.Store(id="id_table", storage_type="memory", data=original_id_col),
         dcc.Graph(
             id="graph",
-            figure=fig,
             clear_on_unhover=True,
             style={
                 "width": "100%",
@@ -869,6 +934,25 @@ def get_neighbour_toast():
     return toast
 
 
+def get_selection_toast():
+    """
+    Layout for the toast (window showing the groups of the selected proteins) shown when selecting with the
+    box or lasso in the graph.
+    :return: selection toast layout
+    """
+    toast = dbc.Toast(
+        id="selection_toast",
+        is_open=False,
+        dismissable=True,
+        body_style={
+            "max-height": "35vh",
+            "overflow": "auto",
+        },
+    )
+
+    return toast
+
+
 def get_help_button_tooltip(button_id: str):
     """
     Returns the tooltip for the help button
@@ -883,10 +967,11 @@ def get_help_button_tooltip(button_id: str):
     return tooltip
 
 
-def get_header(app: Dash):
+def get_header(app: Dash, pending_dim_reds: list[str]):
     """
     Layout for the black header of the application
     :param app: the application itself
+    :param pending_dim_reds: dimensionality reductions still calculated in the background
     :return: layout of the header
     """
     header = dbc.Row(
@@ -907,6 +992,19 @@ def get_header(app: Dash):
                                 )
                             ],
                         ),
+                        # spins as long as dimensionality reductions are calculated in the background
+                        html.Div(
+                            id="projection_spinner",
+                            hidden=len(pending_dim_reds) == 0,
+                            children=[
+                                dbc.Spinner(color="light", size="sm"),
+                                dbc.Tooltip(
+                                    "Calculating UMAP & t-SNE",
+                                    target="projection_spinner",
+                                    placement="bottom",
+                                ),
+                            ],
+                        ),
                         dcc.Loading(
                             color="white",
                             style={},
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import dash_bio as dashbio
-
 from .base import *
 
 representation_options = [
@@ -194,17 +192,26 @@ def init_app_pdb(
     fig: go.Figure,
     dim_red: str,
     tsne_paras: dict,
+    pending_dim_reds: list[str] = None,
+    dim: str = "3D",
+    compress: bool = False,
 ):
     """
     Layout for the molecule displaying, in general the right column in pdb mode
     :return: application layout
     """
-    app = get_app()
+    # imported here, takes seconds and is only needed for the pdb layout
+    import dash_bio as dashbio
+
+    if pending_dim_reds is None:
+        pending_dim_reds = []
+
+    app = get_app(compress)
 
     app.layout = dbc.Container(
         [
             # side components like header and the toasts
-            get_side_components(app),
+            get_side_components(app, pending_dim_reds),
             # sizing of the molecule viewer
             dcc.Location(id="url"),
             html.Div(id="molviewer_sizing_div", hidden=True),
@@ -231,6 +238,8 @@ def init_app_pdb(
                             dim_red,
                             tsne_paras,
                             original_id_col,
+                            pending_dim_reds,
+                            dim,
                         ),
                         id="left_col",
                         width=6,
@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import sys
 from colorsys import hls_to_rgb
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from matplotlib import cm
 from pandas import DataFrame
 
+from src.spatialindex import SpatialIndex
 from .base import init_app
 from .pdb import init_app_pdb
 
@@ -24,10 +24,82 @@ class Visualizator:
         "square-open",
     ]
 
-    def __init__(self, fig: go.Figure, csv_header: list[str], dim_red: str):
+    # customized colors
+    CUSTOM_COLORS = {
+        # 3FTx
+        "frog Ly6": (0, 167, 157),
+        "GPIHBP1": (177, 224, 225),
+        "Ly6 unique": (230, 214, 214),
+        "Ly6D": (224, 131, 182),
+        "Ly6E": (237, 32, 36),
+        "Ly6H": (154, 76, 157),
+        "Ly6K": (236, 185, 185),
+        "Ly6L": (144, 35, 35),
+        "LYNX1": (214, 185, 217),
+        "LYPD2": (61, 91, 169),
+        "PSCA": (150, 138, 194),
+        "Reptilian Ly6 group 6": (241, 90, 41),
+        "Reptilian Ly6 group 4": (244, 119, 69),
+        "Non-human mammalian Ly6": (107, 44, 140),
+        "Reptilian Ly6 group 1": (189, 82, 42),
+        "Reptilian Ly6 group 1-2": (189, 82, 42),
+        "Reptilian Ly6 group 2": (248, 172, 79),
+        "Reptilian Ly6 group 3": (247, 146, 30),
+        "Reptilian Ly6 group 5": (255, 201, 25),
+        "SLURP1": (72, 139, 202),
+        "SLURP2": (232, 56, 149),
+        "Reptilian Ly6 group 7": (247, 236, 19),
+        "Non-standard": (120, 142, 66),
+        "Plesiotypic": (103, 189, 69),
+        "Short-chain": (99, 203, 229),
+        "Long-chain": (36, 99, 143),
+        "LYNX1-SLURP2 readthrough": (0, 0, 0),
+        "Ly6 other": (64, 64, 64),
+    }
+
+    # columns with more groups are displayed as a single trace
+    SINGLE_TRACE_THRESHOLD = 100
+
+    # columns with more groups show only the most frequent ones, the others are folded into one group
+    LEGEND_GROUPS = 50
+    # start of the label of the folded group, followed by the number of folded groups
+    OTHER_GROUP = "other"
+    OTHER_COLOR = (128, 128, 128)
+
+    # colorbar of numeric columns
+    COLORBAR = dict(
+        title="Colorbar",
+        lenmode="fraction",
+        len=0.5,
+        yanchor="bottom",
+        ypad=50,
+    )
+
+    # 2D graphs with more points are drawn with WebGL, SVG gets slow with tens of thousands of points
+    WEBGL_THRESHOLD = 10000
+
+    # views with more points are drawn as a density grid, the browser can't display every protein
+    LOD_THRESHOLD = 500000
+    # cells per axis of the density grid
+    LOD_BINS = {"2D": 200, "3D": 40}
+
+    def __init__(
+        self,
+        fig: go.Figure,
+        csv_header: list[str],
+        dim_red: str,
+        pending_dim_reds: list[str] = None,
+        dim: str = "3D",
+    ):
         self.fig = fig
         self.csv_header = csv_header
         self.dim_red = dim_red
+        # dimensionality reductions that are still calculated in the background
+        self.pending_dim_reds = (
+            pending_dim_reds if pending_dim_reds is not None else []
+        )
+        # initially displayed dimension
+        self.dim = dim
 
     @staticmethod
     def n_symbols_equation(n: int):
@@ -75,25 +147,40 @@ class Visualizator:
     def gen_distinct_colors(n: int, sort: bool = True):
         """
         Creates are list in rgb format that holds the most distinct colors for the number of groups.
+        The palettes are memoized, see distinct_palette.
         :param n: number of groups
         :param sort: Whether colors should be sorted or not.
         :return: list with colors
         """
-        color_list = list()
-        np.random.seed(42)
+        return list(Visualizator.distinct_palette(n, sort))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def distinct_palette(n: int, sort: bool = True) -> tuple:
+        """
+        Generates the distinct colors for the number of groups once. A local random state with a fixed
+        seed picks the same colors as before without changing the global random state.
+        :param n: number of groups
+        :param sort: Whether colors should be sorted or not.
+        :return: tuple with colors in rgb format
+        """
+        random_state = np.random.RandomState(42)
         hues = np.arange(0, 360, 360 / n)
-        hues = hues[np.random.permutation(hues.size)]
-        for hue in hues:
-            # default saturation is 100 and range from 100-50
-            standard_sat = 100
-            sat_range = Visualizator.n_samples_equation(n, val_range=50)
-            saturation = standard_sat - np.random.ranf() * sat_range
-            # default luminosity is 50 and range from 35-65
-            standard_lum = 50
-            lum_range = Visualizator.n_samples_equation(n, val_range=30)
-            luminosity = (
-                standard_lum - lum_range / 2
-            ) + np.random.ranf() * lum_range
+        hues = hues[random_state.permutation(hues.size)]
+        # one value for the saturation and one for the luminosity per hue
+        draws = random_state.random_sample((hues.size, 2))
+
+        # default saturation is 100 and range from 100-50
+        standard_sat = 100
+        sat_range = Visualizator.n_samples_equation(n, val_range=50)
+        # default luminosity is 50 and range from 35-65
+        standard_lum = 50
+        lum_range = Visualizator.n_samples_equation(n, val_range=30)
+
+        color_list = list()
+        for hue, (sat_draw, lum_draw) in zip(hues, draws):
+            saturation = standard_sat - sat_draw * sat_range
+            luminosity = (standard_lum - lum_range / 2) + lum_draw * lum_range
             # color list in hls style
             color_list.append(
                 tuple([hue / 360, luminosity / 100, saturation / 100])
@@ -108,125 +195,135 @@ class Visualizator:
             rgb = hls_to_rgb(round(h, 2), round(l, 2), round(s, 2))
 
             # change value range from 0-1 to 0-255, otherwise saturation=100 is black
-            rgb = list(rgb)
-            for idx, value in enumerate(rgb):
-                rgb[idx] = value * 255
-            rgb = tuple(rgb)
+            rgb_list.append(tuple(value * 255 for value in rgb))
+        return tuple(rgb_list)
+
+    @staticmethod
+    def numeric_colors(n: int) -> list:
+        """
+        Colors of the viridis colormap for the values of a numeric column
+        :param n: number of values without nan
+        :return: list with colors in rgb format, values from 0 to 255
+        """
+        from matplotlib import colormaps
 
-            rgb_list.append(rgb)
-        return rgb_list
+        # n evenly spaced colors, Colormap.resampled would need matplotlib 3.6
+        positions = np.linspace(0, 1, max(n, 1))
+        # one more value than colors gets the last color
+        positions = np.append(positions, positions[-1])[: n + 1]
+        # change rgba to rgb and range of values from 0-1 to 0-255
+        return [
+            tuple(value * 255 for value in rgba[:3])
+            for rgba in colormaps["viridis"](positions)
+        ]
 
     @staticmethod
-    def handle_colorbar(
-        col_groups: list,
-        fig: go.Figure,
-        n_symbols: int,
-        color_list: list,
-        two_d: bool,
-    ):
+    def describe_column(values: pd.Series) -> dict:
         """
-        Creates a colorbar trace for the plot if only numeric values are in the group.
-        :param col_groups: the column groups
-        :param fig: the graph figure
-        :param n_symbols: number of different symbols to be displayed.
-        :param color_list: list with the different colors to be displayed.
-        :param two_d: if True graph should be displayed in 2D
-        :return: flag whether only numeric values are in the column and number of symbols to be used
+        Collects everything rendering needs to know about a column, independent of the displayed view
+        :param values: values of the column
+        :return: dictionary with the sorted groups (np.nan last), the group index of each row, the row
+        positions of each group, the nan mask, whether the column is numeric, its range if it is, the
+        colors of the groups and the number of symbols
         """
-        numeric_flag = False
-        if all(
-            [
-                isinstance(item, int) or isinstance(item, float)
-                for item in col_groups
-            ]
-        ):
-            # Only numeric values and np.nan in the group
-            numeric_flag = True
+        col_groups, codes, group_rows = Visualizator.group_column(values)
+        nan_mask = values.isna().to_numpy()
 
+        # get nr of col groups without nan
+        n_col_groups = len(col_groups) - 1 if nan_mask.any() else len(col_groups)
+
+        # only numeric values and np.nan in the column
+        numeric = pd.api.types.is_numeric_dtype(
+            values
+        ) or pd.api.types.infer_dtype(values, skipna=True) in [
+            "integer",
+            "floating",
+            "mixed-integer-float",
+            "boolean",
+            "empty",
+        ]
+
+        if numeric:
+            # Find min and max value of the column, excluding np.nan
+            numbers = values[~nan_mask].astype(float)
+            value_range = (
+                (float(numbers.min()), float(numbers.max()))
+                if len(numbers) > 0
+                else (0.0, 0.0)
+            )
+            color_list = Visualizator.numeric_colors(n_col_groups)[
+                : len(col_groups)
+            ]
             # Only one symbol to be used
             n_symbols = 1
+        else:
+            value_range = None
+            color_list = Visualizator.gen_distinct_colors(n=n_col_groups)
+            # Figure out how many symbols to use depending on number of column groups
+            n_symbols = Visualizator.n_symbols_equation(n=n_col_groups)
 
-            # Find min and max value of the group, excluding np.nan
-            min_val = sys.float_info.max
-            max_val = sys.float_info.min
-            for item in col_groups:
-                if (
-                    isinstance(item, int)
-                    or isinstance(item, float)
-                    and not pd.isna(item)
-                ):
-                    if min_val > item:
-                        min_val = item
-                    if max_val < item:
-                        max_val = item
-
-            if np.nan in col_groups:
-                no_na_len = len(col_groups) - 1
-            else:
-                no_na_len = len(col_groups)
-
-            viridis = cm.get_cmap("viridis", no_na_len)
-            color_list = list()
-            for i in range(len(col_groups)):
-                # change rgba to rgb and range of values from 0-1 to 0-255
-                rgba_tuple = viridis(i)
-                rgba_list = list(rgba_tuple)
-                red = rgba_list[0] * 255
-                green = rgba_list[1] * 255
-                blue = rgba_list[2] * 255
-                rgb_list = [red, green, blue]
-                rgb_tuple = tuple(rgb_list)
-
-                color_list.append(rgb_tuple)
-
-            # Use plotly Viridis as colorscale
-            colorscale = list()
-            for col in color_list:
-                colorscale.append(f"rgb{col}")
-
-            # create colorbar
-            colorbar = dict(
-                title="Colorbar",
-                lenmode="fraction",
-                len=0.5,
-                yanchor="bottom",
-                ypad=50,
-            )
+        return dict(
+            groups=col_groups,
+            codes=codes,
+            group_rows=group_rows,
+            nan_mask=nan_mask,
+            numeric=numeric,
+            range=value_range,
+            colors=color_list,
+            n_symbols=n_symbols,
+        )
 
-            # create and add a dummy trace that holds the colorbar
-            if not two_d:
-                color_trace = go.Scatter3d(
-                    x=[None],
-                    y=[None],
-                    z=[None],
-                    mode="markers",
-                    marker=dict(
-                        colorscale=colorscale,
-                        showscale=True,
-                        colorbar=colorbar,
-                        cmin=min_val,
-                        cmax=max_val,
-                    ),
-                    showlegend=False,
-                )
-            else:
-                color_trace = go.Scatter(
-                    x=[None],
-                    y=[None],
-                    mode="markers",
-                    marker=dict(
-                        colorscale=colorscale,
-                        showscale=True,
-                        colorbar=colorbar,
-                        cmin=min_val,
-                        cmax=max_val,
-                    ),
-                    showlegend=False,
-                )
+    @staticmethod
+    def handle_colorbar(column_info: dict, fig: go.Figure, two_d: bool):
+        """
+        Creates a colorbar trace for the plot if only numeric values are in the column.
+        :param column_info: description of the column, see describe_column
+        :param fig: the graph figure
+        :param two_d: if True graph should be displayed in 2D
+        :return: None
+        """
+        if not column_info["numeric"]:
+            return
 
-            fig.add_trace(color_trace)
+        min_val, max_val = column_info["range"]
 
-        return numeric_flag, n_symbols, color_list
+        # Use plotly Viridis as colorscale
+        colorscale = list()
+        for col in column_info["colors"]:
+            colorscale.append(f"rgb{col}")
+
+        # create and add a dummy trace that holds the colorbar
+        if not two_d:
+            color_trace = go.Scatter3d(
+                x=[None],
+                y=[None],
+                z=[None],
+                mode="markers",
+                marker=dict(
+                    colorscale=colorscale,
+                    showscale=True,
+                    colorbar=Visualizator.COLORBAR,
+                    cmin=min_val,
+                    cmax=max_val,
+                ),
+                showlegend=False,
+            )
+        else:
+            color_trace = go.Scatter(
+                x=[None],
+                y=[None],
+                mode="markers",
+                marker=dict(
+                    colorscale=colorscale,
+                    showscale=True,
+                    colorbar=Visualizator.COLORBAR,
+                    cmin=min_val,
+                    cmax=max_val,
+                ),
+                showlegend=False,
+            )
+
+        fig.add_trace(color_trace)
 
     @staticmethod
     def customize_axis_titles(
@@ -357,6 +454,642 @@ class Visualizator:
         # change margins of the graph
         fig.update_layout(margin=dict(l=1, r=1, t=1, b=1))
 
+    @staticmethod
+    def get_group_style(
+        group_idx: int,
+        group_value: object,
+        color_list: list,
+        n_symbols: int,
+        numeric_flag: bool,
+    ) -> tuple:
+        """
+        Style of the points of a group
+        :param group_idx: position of the group in the sorted groups
+        :param group_value: value of the group
+        :param color_list: colors of the groups
+        :param n_symbols: number of different symbols to be displayed
+        :param numeric_flag: whether a colorbar is displayed for the column
+        :return: color, symbol, opacity and whether the group is shown in the legend
+        """
+        # Show only nan in legend if colorbar is shown
+        show_legend = True
+        if numeric_flag:
+            if not pd.isna(group_value):
+                show_legend = False
+
+        # set up opacity dependent on nan or not
+        if pd.isna(group_value):
+            opacity = 0.3
+            symbol = "circle"
+            # lightgrey
+            color = "rgb(211, 211, 211)"
+        else:
+            opacity = 1.0
+            symbol = Visualizator.SYMBOLS[group_idx % n_symbols]
+            if group_value in Visualizator.CUSTOM_COLORS:
+                color = f"rgb{Visualizator.CUSTOM_COLORS[group_value]}"
+            else:
+                color = f"rgb{color_list[group_idx]}"
+
+        return color, symbol, opacity, show_legend
+
+    @staticmethod
+    def group_legend(
+        col_groups: list,
+        color_list: list,
+        n_symbols: int,
+        numeric_flag: bool,
+        two_d: bool,
+        webgl: bool = False,
+    ) -> tuple:
+        """
+        Styles of the groups for traces colored by the group index of their points
+        :param col_groups: sorted values of the column
+        :param color_list: colors of the groups
+        :param n_symbols: number of different symbols to be displayed
+        :param numeric_flag: whether a colorbar is displayed for the column
+        :param two_d: if True graph should be displayed in 2D
+        :param webgl: if True a 2D graph is drawn with WebGL
+        :return: legend traces without points, colorscale with a step per group, symbol and name of each
+        group
+        """
+        legend_traces = list()
+        colorscale, symbols, group_names = list(), list(), list()
+        for group_idx, group_value in enumerate(col_groups):
+            color, symbol, opacity, show_legend = Visualizator.get_group_style(
+                group_idx, group_value, color_list, n_symbols, numeric_flag
+            )
+            if opacity < 1.0:
+                # plotly has no opacity per point
+                color = f"rgba{color[3:-1]}, {opacity})"
+
+            # a step of the colorscale per group, the points are colored by their group index
+            colorscale.append([group_idx / len(col_groups), color])
+            colorscale.append([(group_idx + 1) / len(col_groups), color])
+            symbols.append(symbol)
+            group_names.append(str(group_value))
+
+            if show_legend:
+                legend_trace = dict(
+                    x=[None],
+                    y=[None],
+                    mode="markers",
+                    name=group_value,
+                    marker=dict(
+                        size=10,
+                        color=color,
+                        symbol=symbol,
+                        line=dict(color="black", width=1),
+                    ),
+                    showlegend=True,
+                )
+                if not two_d:
+                    legend_trace.update(type="scatter3d", z=[None])
+                else:
+                    legend_trace.update(
+                        type="scattergl" if webgl else "scatter"
+                    )
+                legend_traces.append(legend_trace)
+
+        return legend_traces, colorscale, symbols, group_names
+
+    @staticmethod
+    def add_single_trace(
+        fig: go.Figure,
+        ids: np.ndarray,
+        codes: np.ndarray,
+        col_groups: list,
+        coords: np.ndarray,
+        color_list: list,
+        n_symbols: int,
+        numeric_flag: bool,
+        two_d: bool,
+        webgl: bool = False,
+    ):
+        """
+        Adds all points as one trace with the colors and symbols of their groups, and a legend of traces
+        without points. Used for columns with many groups, since the browser is slow with many traces.
+        :param fig: the graph figure
+        :param ids: displayed IDs of the points
+        :param codes: group index of each point
+        :param col_groups: sorted values of the column
+        :param coords: coordinates of the points
+        :param color_list: colors of the groups
+        :param n_symbols: number of different symbols to be displayed
+        :param numeric_flag: whether a colorbar is displayed for the column
+        :param two_d: if True graph should be displayed in 2D
+        :param webgl: if True a 2D graph is drawn with WebGL
+        :return: None
+        """
+        legend_traces, colorscale, symbols, group_names = (
+            Visualizator.group_legend(
+                col_groups, color_list, n_symbols, numeric_flag, two_d, webgl
+            )
+        )
+
+        # all traces at once, adding them one by one is slow
+        fig.add_traces(legend_traces)
+
+        # numbers are validated much faster than a color string per point
+        marker = dict(
+            size=10,
+            color=codes,
+            colorscale=colorscale,
+            # group indices in the middle of their steps
+            cmin=-0.5,
+            cmax=len(col_groups) - 0.5,
+            symbol=np.array(symbols, dtype=object)[codes],
+            line=dict(color="black", width=1),
+        )
+        customdata = np.array(group_names, dtype=object)[codes]
+        text = ids.tolist()
+
+        if not two_d:
+            trace = go.Scatter3d(
+                x=coords[:, 0],
+                y=coords[:, 1],
+                z=coords[:, 2],
+                mode="markers",
+                marker=marker,
+                customdata=customdata,
+                text=text,
+                showlegend=False,
+                hoverlabel=dict(namelength=-1),
+                # the group of a point is its customdata instead of the trace name
+                hovertemplate="%{text}<extra>%{customdata}</extra>",
+            )
+        else:
+            scatter_2d = go.Scattergl if webgl else go.Scatter
+            trace = scatter_2d(
+                x=coords[:, 0],
+                y=coords[:, 1],
+                mode="markers",
+                marker=marker,
+                customdata=customdata,
+                text=text,
+                showlegend=False,
+                hoverlabel=dict(namelength=-1),
+                hovertemplate="%{text}<extra>%{customdata}</extra>",
+            )
+        fig.add_trace(trace)
+
+        # the legend entries have no points that could be hidden
+        fig.update_layout(legend=dict(itemclick=False, itemdoubleclick=False))
+
+    @staticmethod
+    def add_continuous_traces(
+        fig: go.Figure,
+        values: pd.Series,
+        ids: np.ndarray,
+        column_info: dict,
+        coords: np.ndarray,
+        two_d: bool,
+        webgl: bool = False,
+    ):
+        """
+        Adds the points of a numeric column as one trace colored by their values with the viridis
+        colorscale and its colorbar, and the points without value as a grey trace
+        :param fig: the graph figure
+        :param values: values of the column
+        :param ids: displayed IDs of the points
+        :param column_info: description of the column, see describe_column
+        :param coords: coordinates of the points
+        :param two_d: if True graph should be displayed in 2D
+        :param webgl: if True a 2D graph is drawn with WebGL
+        :return: None
+        """
+        if not two_d:
+            scatter = go.Scatter3d
+        else:
+            scatter = go.Scattergl if webgl else go.Scatter
+
+        def get_axes(mask: np.ndarray) -> dict:
+            axes = dict(x=coords[mask, 0], y=coords[mask, 1])
+            if not two_d:
+                axes["z"] = coords[mask, 2]
+            return axes
+
+        nan_mask = column_info["nan_mask"]
+        has_value = ~nan_mask
+        min_val, max_val = column_info["range"]
+
+        fig.add_trace(
+            scatter(
+                **get_axes(has_value),
+                mode="markers",
+                marker=dict(
+                    size=10,
+                    color=values.to_numpy(dtype=float, na_value=np.nan)[
+                        has_value
+                    ],
+                    colorscale="Viridis",
+                    cmin=min_val,
+                    cmax=max_val,
+                    showscale=True,
+                    colorbar=Visualizator.COLORBAR,
+                    symbol="circle",
+                    line=dict(color="black", width=1),
+                ),
+                # colors are sent as float32, the hover shows the values of the column
+                customdata=values.to_numpy()[has_value].astype(str),
+                text=ids[has_value].tolist(),
+                showlegend=False,
+                hoverlabel=dict(namelength=-1),
+                hovertemplate="%{text}<extra>%{customdata}</extra>",
+            )
+        )
+
+        if nan_mask.any():
+            color, symbol, opacity, _ = Visualizator.get_group_style(
+                len(column_info["groups"]) - 1,
+                np.nan,
+                column_info["colors"],
+                column_info["n_symbols"],
+                True,
+            )
+            fig.add_trace(
+                scatter(
+                    **get_axes(nan_mask),
+                    mode="markers",
+                    name="nan",
+                    opacity=opacity,
+                    marker=dict(
+                        size=10,
+                        color=color,
+                        symbol=symbol,
+                        line=dict(color="black", width=1),
+                    ),
+                    text=ids[nan_mask].tolist(),
+                    showlegend=True,
+                    hoverinfo=["name", "text"],
+                    hoverlabel=dict(namelength=-1),
+                    hovertemplate="%{text}",
+                )
+            )
+
+    @staticmethod
+    def fold_groups(
+        column_info: dict, legend_groups: int, promoted: list = None
+    ) -> dict:
+        """
+        Keeps the groups with the most proteins and folds the others into one "other" group, so the
+        number of traces and legend entries is bounded. Kept groups keep their colors, nan stays a group.
+        The label of the folded group differs from all values of the column, see other_label.
+        :param column_info: description of the column, see describe_column
+        :param legend_groups: number of kept groups, all are kept if not positive
+        :param promoted: groups kept in addition, compared by their string
+        :return: description of the column with the folded groups, the given one if nothing is folded
+        """
+        col_groups = column_info["groups"]
+        group_rows = column_info["group_rows"]
+        has_nan = bool(column_info["nan_mask"].any())
+        n_col_groups = len(col_groups) - int(has_nan)
+        if legend_groups <= 0 or n_col_groups <= legend_groups:
+            return column_info
+
+        # most proteins first, the first in the sorted groups win ties
+        sizes = np.array([len(rows) for rows in group_rows[:n_col_groups]])
+        kept = np.zeros(n_col_groups, dtype=bool)
+        kept[np.argsort(-sizes, kind="stable")[:legend_groups]] = True
+        if promoted:
+            promoted = set(str(value) for value in promoted)
+            kept |= np.array(
+                [str(value) in promoted for value in col_groups[:n_col_groups]]
+            )
+        kept_idx = np.flatnonzero(kept)
+        folded_idx = np.flatnonzero(~kept)
+        if len(folded_idx) == 0:
+            return column_info
+
+        # new index of each group, "other" after the kept groups and before nan
+        other_idx = len(kept_idx)
+        new_idx = np.full(len(col_groups), other_idx + 1, dtype=np.int32)
+        new_idx[kept_idx] = np.arange(len(kept_idx))
+        new_idx[folded_idx] = other_idx
+
+        folded_groups = [col_groups[idx] for idx in kept_idx]
+        folded_groups.append(
+            Visualizator.other_label(col_groups, len(folded_idx))
+        )
+        folded_rows = [group_rows[idx] for idx in kept_idx]
+        folded_rows.append(
+            np.sort(np.concatenate([group_rows[idx] for idx in folded_idx]))
+        )
+        if has_nan:
+            folded_groups.append(col_groups[-1])
+            folded_rows.append(group_rows[-1])
+
+        return dict(
+            column_info,
+            groups=folded_groups,
+            codes=new_idx[column_info["codes"]],
+            group_rows=folded_rows,
+            colors=[column_info["colors"][idx] for idx in kept_idx]
+            + [Visualizator.OTHER_COLOR],
+            n_symbols=Visualizator.n_symbols_equation(n=len(kept_idx) + 1),
+        )
+
+    @staticmethod
+    def other_label(col_groups: list, n_folded: int) -> str:
+        """
+        :param col_groups: values of the column
+        :param n_folded: number of folded groups
+        :return: label of the folded group that no value of the column has
+        """
+        values = set(str(value) for value in col_groups)
+        plural = "s" if n_folded != 1 else ""
+        label = f"{Visualizator.OTHER_GROUP} ({n_folded} group{plural})"
+        while label in values:
+            label = f"{label}*"
+
+        return label
+
+    @staticmethod
+    def subset_column(column_info: dict, rows: np.ndarray) -> dict:
+        """
+        Restricts the description of a column to some rows, the groups and their colors stay the same
+        :param column_info: description of the column, see describe_column
+        :param rows: positions of the rows
+        :return: description of the column for the rows
+        """
+        codes = column_info["codes"][rows]
+        row_order = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.cumsum(
+            np.bincount(codes, minlength=len(column_info["groups"]))
+        )
+
+        return dict(
+            column_info,
+            codes=codes,
+            group_rows=np.split(row_order, bounds[:-1]),
+            nan_mask=column_info["nan_mask"][rows],
+        )
+
+    @staticmethod
+    def density_grid(
+        coords: np.ndarray,
+        codes: np.ndarray,
+        bins: int,
+        values: np.ndarray = None,
+    ) -> dict:
+        """
+        Bins the points into a grid of equally sized cells over their bounds, vectorized without a loop
+        over the points or cells
+        :param coords: coordinates of the points
+        :param codes: group index of each point
+        :param bins: number of cells per axis
+        :param values: numeric values of the points, their mean is calculated per cell if given
+        :return: dictionary with the centroid, the number of points and the group with the most points of
+        each occupied cell, and the mean value if values are given
+        """
+        valid = np.isfinite(coords).all(axis=1)
+        coords, codes = coords[valid], codes[valid]
+
+        if len(coords) > 0:
+            lows, highs = coords.min(axis=0), coords.max(axis=0)
+        else:
+            lows = highs = np.zeros(coords.shape[1])
+        widths = np.where(highs > lows, (highs - lows) / bins, 1.0)
+        # the points at the maximum belong to the last cell
+        cell_idx = np.clip(
+            ((coords - lows) / widths).astype(np.int64), 0, bins - 1
+        )
+        flat_idx = np.ravel_multi_index(cell_idx.T, (bins,) * coords.shape[1])
+
+        _, cell_of_point, counts = np.unique(
+            flat_idx, return_inverse=True, return_counts=True
+        )
+        cell_of_point = cell_of_point.reshape(-1)
+        centroids = np.stack(
+            [
+                np.bincount(cell_of_point, weights=axis, minlength=len(counts))
+                for axis in coords.T
+            ],
+            axis=1,
+        ) / counts[:, None]
+
+        # points per group and cell, the most frequent group of a cell is its last pair sorted by
+        # count, the smaller group index wins ties
+        n_groups = int(codes.max()) + 1 if len(codes) > 0 else 1
+        pairs, pair_counts = np.unique(
+            cell_of_point * n_groups + codes, return_counts=True
+        )
+        pair_cells, pair_codes = np.divmod(pairs, n_groups)
+        order = np.lexsort((-pair_codes, pair_counts, pair_cells))
+        last_of_cell = np.append(
+            np.flatnonzero(np.diff(pair_cells[order])), len(order) - 1
+        )
+        majority = pair_codes[order][last_of_cell].astype(np.int32)
+
+        grid = dict(centroids=centroids, counts=counts, majority=majority)
+
+        if values is not None:
+            values = values[valid]
+            has_value = ~np.isnan(values)
+            sums = np.bincount(
+                cell_of_point[has_value],
+                weights=values[has_value],
+                minlength=len(counts),
+            )
+            n_values = np.bincount(
+                cell_of_point[has_value], minlength=len(counts)
+            )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                grid["means"] = sums / n_values
+
+        return grid
+
+    @staticmethod
+    def add_density_traces(
+        fig: go.Figure,
+        values: pd.Series,
+        column_info: dict,
+        coords: np.ndarray,
+        two_d: bool,
+        webgl: bool = False,
+        continuous: bool = False,
+        nearest_ids=None,
+    ):
+        """
+        Adds the points as a density grid, one marker per occupied cell at the centroid of its points,
+        sized by their number. The cells are colored by the group with the most points, or by their mean
+        value for a continuous numeric column. A cell has the ID of the protein nearest to its centroid
+        as text, so clicking it selects that protein.
+        :param fig: the graph figure
+        :param values: values of the column
+        :param column_info: description of the column, see describe_column
+        :param coords: coordinates of the points
+        :param two_d: if True graph should be displayed in 2D
+        :param webgl: if True a 2D graph is drawn with WebGL
+        :param continuous: if True the cells are colored by the mean value of their points
+        :param nearest_ids: function giving the IDs of the proteins nearest to the centroids, the cells
+        have no text if None
+        :return: None
+        """
+        if not two_d:
+            scatter = go.Scatter3d
+        else:
+            scatter = go.Scattergl if webgl else go.Scatter
+
+        grid = Visualizator.density_grid(
+            coords,
+            column_info["codes"],
+            Visualizator.LOD_BINS["2D" if two_d else "3D"],
+            values.to_numpy(dtype=float, na_value=np.nan)
+            if continuous
+            else None,
+        )
+        counts = grid["counts"]
+        centroids = grid["centroids"]
+
+        # between 4 and 16 pixels, logarithmic in the number of points
+        sizes = 4 + 12 * np.log1p(counts) / np.log1p(counts.max(initial=1))
+
+        texts = (
+            nearest_ids(centroids)
+            if nearest_ids is not None and len(centroids) > 0
+            else None
+        )
+
+        def get_axes(mask: np.ndarray) -> dict:
+            axes = dict(x=centroids[mask, 0], y=centroids[mask, 1])
+            if not two_d:
+                axes["z"] = centroids[mask, 2]
+            if texts is not None:
+                axes["text"] = texts[mask].tolist()
+            return axes
+
+        if continuous:
+            has_value = ~np.isnan(grid["means"])
+            min_val, max_val = column_info["range"]
+            fig.add_trace(
+                scatter(
+                    **get_axes(has_value),
+                    mode="markers",
+                    marker=dict(
+                        size=sizes[has_value],
+                        color=grid["means"][has_value],
+                        colorscale="Viridis",
+                        cmin=min_val,
+                        cmax=max_val,
+                        showscale=True,
+                        colorbar=Visualizator.COLORBAR,
+                        symbol="circle",
+                    ),
+                    customdata=counts[has_value],
+                    showlegend=False,
+                    # means are sent as float32, four significant digits hide the rounding
+                    hovertemplate="%{customdata} proteins<extra>mean "
+                    "%{marker.color:.4~g}</extra>",
+                )
+            )
+            if not has_value.all():
+                fig.add_trace(
+                    scatter(
+                        **get_axes(~has_value),
+                        mode="markers",
+                        name="nan",
+                        opacity=0.3,
+                        marker=dict(
+                            size=sizes[~has_value],
+                            color="rgb(211, 211, 211)",
+                            symbol="circle",
+                        ),
+                        customdata=counts[~has_value],
+                        showlegend=True,
+                        hovertemplate="%{customdata} proteins"
+                        "<extra>nan</extra>",
+                    )
+                )
+            return
+
+        col_groups = column_info["groups"]
+        legend_traces, colorscale, symbols, group_names = (
+            Visualizator.group_legend(
+                col_groups,
+                column_info["colors"],
+                column_info["n_symbols"],
+                column_info["numeric"],
+                two_d,
+                webgl,
+            )
+        )
+        fig.add_traces(legend_traces)
+
+        majority = grid["majority"]
+        everything = np.ones(len(counts), dtype=bool)
+        fig.add_trace(
+            scatter(
+                **get_axes(everything),
+                mode="markers",
+                marker=dict(
+                    size=sizes,
+                    color=majority,
+                    colorscale=colorscale,
+                    cmin=-0.5,
+                    cmax=len(col_groups) - 0.5,
+                    symbol=np.array(symbols, dtype=object)[majority],
+                ),
+                customdata=np.stack(
+                    [np.array(group_names, dtype=object)[majority], counts],
+                    axis=1,
+                ),
+                showlegend=False,
+                hoverlabel=dict(namelength=-1),
+                hovertemplate="%{customdata[1]} proteins<extra>mostly "
+                "%{customdata[0]}</extra>",
+            )
+        )
+
+        # the legend entries have no points that could be hidden
+        fig.update_layout(legend=dict(itemclick=False, itemdoubleclick=False))
+
+    @staticmethod
+    def group_column(values: pd.Series) -> tuple:
+        """
+        Groups the values of a column in one pass. The groups are sorted: 1. int and float 2. str
+        (case-insensitive) 3. rest 4. np.nan, values of the same key keep the order of their first
+        occurrence.
+        :param values: values of the column
+        :return: sorted groups, group index of each row and the row positions of each group
+        """
+        codes, uniques = pd.factorize(values)
+        uniques = np.asarray(uniques, dtype=object)
+
+        # sort keys of the unique values, one type check per group
+        is_number = np.array(
+            [isinstance(val, (int, float)) for val in uniques], dtype=bool
+        )
+        is_str = np.array([isinstance(val, str) for val in uniques], dtype=bool)
+        category = np.where(is_number, 0, np.where(is_str, 1, 2))
+        numbers = np.zeros(len(uniques))
+        numbers[is_number] = uniques[is_number].astype(float)
+        texts = uniques.astype(str)
+        texts[is_str] = np.char.lower(texts[is_str])
+        # rank of the texts, lexsort needs numbers
+        _, texts = np.unique(texts, return_inverse=True)
+        order = np.lexsort((texts, numbers, category))
+
+        col_groups = uniques[order].tolist()
+        # position of each unique value in the sorted groups
+        ranks = np.empty(len(order), dtype=np.int32)
+        ranks[order] = np.arange(len(order))
+
+        # missing values are the last group
+        is_nan = codes < 0
+        sorted_codes = np.full(len(codes), len(col_groups), dtype=np.int32)
+        sorted_codes[~is_nan] = ranks[codes[~is_nan]]
+        codes = sorted_codes
+        if is_nan.any():
+            col_groups.append(np.nan)
+
+        # positions of the rows of each group, in the order of the rows
+        row_order = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.cumsum(np.bincount(codes, minlength=len(col_groups)))
+        group_rows = np.split(row_order, bounds[:-1])
+
+        return col_groups, codes, group_rows
+
     @staticmethod
     # https://github.com/sacdallago/bio_embeddings/blob/develop/bio_embeddings/visualize/plotly_plots.py
     def render(
@@ -368,63 +1101,81 @@ class Visualizator:
         dim_red: str = "UMAP",
         two_d: bool = False,
         download: bool = False,
+        coords: np.ndarray = None,
+        single_trace: bool = None,
+        webgl: bool = None,
+        column_info: dict = None,
+        continuous: bool = None,
+        lod: bool = None,
+        viewport: list = None,
+        spatial_index: SpatialIndex = None,
+        legend_groups: int = None,
+        promoted: list = None,
     ):
         """
-        Renders the plotly graph with the selected column in the dataframe df
+        Renders the plotly graph with the selected column in the dataframe df. The dataframe is only
+        read, so views can be rendered concurrently.
         :param df: dataframe
         :param selected_column: column of the dataframe
-        :param original_id_col: the colum "original id" of the mapped csv file
+        :param original_id_col: the colum "original id" of the mapped csv file, displayed instead of the
+        index of df if given, best as NumPy array, which is used as it is
         :param umap_paras: dictionary holding the parameters of UMAP
         :param dim_red: to be displayed dimensionality reduction
         :param two_d: if True plot should be in 2D
         :param download: boolean  whether it is rendered for downloading or not
+        :param coords: coordinates of the view in the row order of df, taken from the axis columns of df if None
+        :param single_trace: if True all points are one trace, if None only if there are more groups than
+        SINGLE_TRACE_THRESHOLD
+        :param webgl: if True a 2D graph is drawn with WebGL, if None only if there are more points than
+        WEBGL_THRESHOLD
+        :param column_info: description of the selected column, e.g. from the column catalogue, described
+        if None
+        :param continuous: if True a numeric column is colored by a colorscale in one trace, otherwise
+        with a color per value, if None all numeric columns are
+        :param lod: if True the points are drawn as a density grid, if None only if there are more points
+        than LOD_THRESHOLD
+        :param viewport: minimum and maximum of each axis, None for an axis without limits, only the points
+        inside are drawn, with the axes of a 2D graph set to it
+        :param spatial_index: spatial index over the coordinates, e.g. from the projection store, built if
+        None and needed
+        :param legend_groups: number of groups with most proteins displayed in the legend, the others are
+        folded into "other", LEGEND_GROUPS if None, all groups if not positive
+        :param promoted: groups displayed in the legend in addition, e.g. searched for by the user
         :return: plotly graphical object
         """
 
-        # custom separator to sort str, int and float (str case-insensitive)
-        # order: 1. int and float 2. str 3. rest 4. np.nan
-        def my_comparator(val):
-            if (
-                isinstance(val, float)
-                and not pd.isna(val)
-                or isinstance(val, int)
-            ):
-                return 0, val
-            elif pd.isna(val):
-                return 3, val
-            elif isinstance(val, str):
-                val = val.lower()
-                return 1, val
-            else:
-                return 2, val
-
-        mapped_index = None
-        if original_id_col is not None:
-            # swap index
-            mapped_index = df.index
-            df.index = original_id_col
+        # displayed IDs in the row order of df
+        ids = np.asarray(
+            original_id_col if original_id_col is not None else df.index,
+            dtype=object,
+        )
 
-        col_groups = df[selected_column].unique().tolist()
-        col_groups.sort(key=my_comparator)
+        if column_info is None:
+            column_info = Visualizator.describe_column(df[selected_column])
+        if legend_groups is None:
+            legend_groups = Visualizator.LEGEND_GROUPS
 
-        # get nr of col groups without nan
-        if np.nan in col_groups:
-            n_col_groups = len(col_groups) - 1
-        else:
-            n_col_groups = len(col_groups)
-
-        color_list = Visualizator.gen_distinct_colors(n=n_col_groups)
+        # get nr of col groups without nan, before folding, many groups are drawn as a single trace
+        n_col_groups = len(column_info["groups"]) - int(
+            column_info["nan_mask"].any()
+        )
 
-        # Figure out how many symbols to use depending on number of column groups
-        n_symbols = Visualizator.n_symbols_equation(n=n_col_groups)
+        if not column_info["numeric"]:
+            column_info = Visualizator.fold_groups(
+                column_info, legend_groups, promoted
+            )
+        col_groups = column_info["groups"]
+        codes = column_info["codes"]
+        group_rows = column_info["group_rows"]
+        numeric_flag = column_info["numeric"]
+        color_list = column_info["colors"]
+        n_symbols = column_info["n_symbols"]
 
         fig = go.Figure()
 
-        numeric_flag, n_symbols, color_list = Visualizator.handle_colorbar(
-            col_groups, fig, n_symbols, color_list, two_d
-        )
-
-        df["class_index"] = np.ones(len(df)) * -100
+        continuous = numeric_flag and continuous is not False
+        if not continuous:
+            Visualizator.handle_colorbar(column_info, fig, two_d)
 
         if not two_d:
             if dim_red == "UMAP":
@@ -450,111 +1201,125 @@ class Visualizator:
                 x = "x_tsne_2D"
                 y = "y_tsne_2D"
 
-                # customized colors
-        colors_custom = {
-            # 3FTx
-            "frog Ly6": (0, 167, 157),
-            "GPIHBP1": (177, 224, 225),
-            "Ly6 unique": (230, 214, 214),
-            "Ly6D": (224, 131, 182),
-            "Ly6E": (237, 32, 36),
-            "Ly6H": (154, 76, 157),
-            "Ly6K": (236, 185, 185),
-            "Ly6L": (144, 35, 35),
-            "LYNX1": (214, 185, 217),
-            "LYPD2": (61, 91, 169),
-            "PSCA": (150, 138, 194),
-            "Reptilian Ly6 group 6": (241, 90, 41),
-            "Reptilian Ly6 group 4": (244, 119, 69),
-            "Non-human mammalian Ly6": (107, 44, 140),
-            "Reptilian Ly6 group 1": (189, 82, 42),
-            "Reptilian Ly6 group 1-2": (189, 82, 42),
-            "Reptilian Ly6 group 2": (248, 172, 79),
-            "Reptilian Ly6 group 3": (247, 146, 30),
-            "Reptilian Ly6 group 5": (255, 201, 25),
-            "SLURP1": (72, 139, 202),
-            "SLURP2": (232, 56, 149),
-            "Reptilian Ly6 group 7": (247, 236, 19),
-            "Non-standard": (120, 142, 66),
-            "Plesiotypic": (103, 189, 69),
-            "Short-chain": (99, 203, 229),
-            "Long-chain": (36, 99, 143),
-            "LYNX1-SLURP2 readthrough": (0, 0, 0),
-            "Ly6 other": (64, 64, 64),
-        }
-
-        # iterate over different values of the selected column
-        for group_idx, group_value in enumerate(col_groups):
-            # Show only nan in legend if colorbar is shown
-            show_legend = True
-            if numeric_flag:
-                if not pd.isna(group_value):
-                    show_legend = False
-
-            # set up opacity dependent on nan or not
-            if pd.isna(group_value):
-                opacity = 0.3
-                symbol = "circle"
-                color = "lightgrey"
-            else:
-                opacity = 1.0
-                symbol = Visualizator.SYMBOLS[group_idx % n_symbols]
-                if group_value in colors_custom:
-                    color = f"rgb{colors_custom[group_value]}"
-                else:
-                    color = f"rgb{color_list[group_idx]}"
+        if coords is None:
+            axis_names = [x, y] if two_d else [x, y, z]
+            coords = df[axis_names].to_numpy()
 
-            # extract df with only group value
-            if not pd.isna(group_value):
-                df_group = df[df[selected_column] == group_value]
-            else:
-                df_group = df[df[selected_column].isna()]
+        if single_trace is None:
+            single_trace = n_col_groups > Visualizator.SINGLE_TRACE_THRESHOLD
+        if webgl is None:
+            webgl = len(df) > Visualizator.WEBGL_THRESHOLD
 
-            if not two_d:
-                trace = go.Scatter3d(
-                    x=df_group[x],
-                    y=df_group[y],
-                    z=df_group[z],
-                    mode="markers",
-                    name=group_value,
-                    opacity=opacity,
-                    marker=dict(
-                        size=10,
-                        color=color,
-                        symbol=symbol,
-                        line=dict(color="black", width=1),
-                    ),
-                    text=df_group.index.to_list(),
-                    showlegend=show_legend,
-                )
-            else:
-                trace = go.Scatter(
-                    x=df_group[x],
-                    y=df_group[y],
-                    mode="markers",
-                    name=group_value,
-                    opacity=opacity,
-                    marker=dict(
-                        size=10,
-                        color=color,
-                        symbol=Visualizator.SYMBOLS[group_idx % n_symbols],
-                        line=dict(color="black", width=1),
-                    ),
-                    text=df_group.index.to_list(),
-                    showlegend=show_legend,
+        if lod is None:
+            lod = len(coords) > Visualizator.LOD_THRESHOLD
+        if spatial_index is None and (lod or viewport is not None):
+            spatial_index = SpatialIndex(coords)
+
+        values = df[selected_column]
+        all_ids = ids
+        if viewport is not None:
+            rows = spatial_index.box(viewport)
+            ids, coords, values = ids[rows], coords[rows], values.iloc[rows]
+            column_info = Visualizator.subset_column(column_info, rows)
+            codes = column_info["codes"]
+            group_rows = column_info["group_rows"]
+
+            # only the points in the viewport are drawn individually if they are few enough
+            lod = len(coords) > Visualizator.LOD_THRESHOLD
+
+        if lod:
+            Visualizator.add_density_traces(
+                fig,
+                values,
+                column_info,
+                coords,
+                two_d,
+                webgl,
+                continuous,
+                lambda centroids: all_ids[spatial_index.nearest(centroids)],
+            )
+        elif continuous:
+            Visualizator.add_continuous_traces(
+                fig,
+                values,
+                ids,
+                column_info,
+                coords,
+                two_d,
+                webgl,
+            )
+        elif single_trace:
+            Visualizator.add_single_trace(
+                fig,
+                ids,
+                codes,
+                col_groups,
+                coords,
+                color_list,
+                n_symbols,
+                numeric_flag,
+                two_d,
+                webgl,
+            )
+        else:
+            # iterate over different values of the selected column
+            for group_idx, group_value in enumerate(col_groups):
+                (
+                    color,
+                    symbol,
+                    opacity,
+                    show_legend,
+                ) = Visualizator.get_group_style(
+                    group_idx, group_value, color_list, n_symbols, numeric_flag
                 )
-            fig.add_trace(trace)
-            # Give the different group values a number
-            df.loc[
-                df[selected_column] == group_value, "class_index"
-            ] = group_idx
-
-        # Set hover-info
-        fig.update_traces(
-            hoverinfo=["name", "text"],
-            hoverlabel=dict(namelength=-1),
-            hovertemplate="%{text}",
-        )
+
+                # extract the rows with only group value
+                group_ids = ids[group_rows[group_idx]].tolist()
+                group_coords = coords[group_rows[group_idx]]
+
+                if not two_d:
+                    trace = go.Scatter3d(
+                        x=group_coords[:, 0],
+                        y=group_coords[:, 1],
+                        z=group_coords[:, 2],
+                        mode="markers",
+                        name=group_value,
+                        opacity=opacity,
+                        marker=dict(
+                            size=10,
+                            color=color,
+                            symbol=symbol,
+                            line=dict(color="black", width=1),
+                        ),
+                        text=group_ids,
+                        showlegend=show_legend,
+                    )
+                else:
+                    scatter_2d = go.Scattergl if webgl else go.Scatter
+                    trace = scatter_2d(
+                        x=group_coords[:, 0],
+                        y=group_coords[:, 1],
+                        mode="markers",
+                        name=group_value,
+                        opacity=opacity,
+                        marker=dict(
+                            size=10,
+                            color=color,
+                            symbol=symbol,
+                            line=dict(color="black", width=1),
+                        ),
+                        text=group_ids,
+                        showlegend=show_legend,
+                    )
+                fig.add_trace(trace)
+
+        # Set hover-info, the single, continuous and density traces have their own
+        if not single_trace and not continuous and not lod:
+            fig.update_traces(
+                hoverinfo=["name", "text"],
+                hoverlabel=dict(namelength=-1),
+                hovertemplate="%{text}",
+            )
 
         if not two_d:
             Visualizator.update_layout(fig)
@@ -567,20 +1332,105 @@ class Visualizator:
 
         Visualizator.customize_axis_titles(dim_red, fig, df, two_d)
 
-        # swap index again
-        if original_id_col is not None:
-            df.index = mapped_index
+        if viewport is not None and two_d:
+            fig.update_xaxes(range=viewport[0])
+            fig.update_yaxes(range=viewport[1])
 
         return fig
 
+    @staticmethod
+    def add_highlight_traces(fig: go.Figure, two_d: bool = False):
+        """
+        Adds the two empty traces with open circles that are filled if molecules are highlighted. They are
+        the last traces of the figure, the clicked molecule first and the dropdown selection second, so
+        highlighting only has to update their coordinates.
+        :param fig: graph figure
+        :param two_d: if True the graph is 2D
+        :return: None
+        """
+        # drawn on top of the points with the same renderer
+        scatter_2d = (
+            go.Scattergl
+            if any(trace.type == "scattergl" for trace in fig.data)
+            else go.Scatter
+        )
+
+        if not two_d:
+            fig.add_trace(
+                go.Scatter3d(
+                    x=[],
+                    y=[],
+                    z=[],
+                    mode="markers",
+                    marker=dict(
+                        size=15,
+                        color="black",
+                        symbol="circle-open",
+                    ),
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter3d(
+                    x=[],
+                    y=[],
+                    z=[],
+                    mode="markers",
+                    marker=dict(
+                        size=15,
+                        color="white",
+                        symbol="circle-open",
+                        line=dict(color="black", width=1),
+                    ),
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+        else:
+            fig.add_trace(
+                scatter_2d(
+                    x=[],
+                    y=[],
+                    mode="markers",
+                    marker=dict(
+                        size=15,
+                        color="black",
+                        symbol="circle-open",
+                        line=dict(color="black", width=1),
+                    ),
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                scatter_2d(
+                    x=[],
+                    y=[],
+                    mode="markers",
+                    marker=dict(
+                        size=15,
+                        color="white",
+                        symbol="circle-open",
+                    ),
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+
     def get_base_app(
-        self, umap_paras: dict, tsne_paras: dict, original_id_col: list
+        self,
+        umap_paras: dict,
+        tsne_paras: dict,
+        original_id_col: list,
+        compress: bool = False,
     ):
         """
         Initializes the dash app in base.py
         :param umap_paras: Parameters of the UMAP calculation
         :param tsne_paras: Parameters of the TSNE calculation
         :param original_id_col: list with the original IDs
+        :param compress: compress the responses, needs dash[compress]
         :return: the application layout
         """
         return init_app(
@@ -590,16 +1440,24 @@ class Visualizator:
             self.dim_red,
             tsne_paras,
             original_id_col,
+            self.pending_dim_reds,
+            self.dim,
+            compress,
         )
 
     def get_pdb_app(
-        self, orig_id_col: list[str], umap_paras: dict, tsne_paras: dict
+        self,
+        orig_id_col: list[str],
+        umap_paras: dict,
+        tsne_paras: dict,
+        compress: bool = False,
     ):
         """
         Initializes the dash app in pdb.py
         :param orig_id_col: List of the original IDs
         :param umap_paras: Parameters of the UMAP calculation
         :param tsne_paras: Parameters of the TSNE calculation
+        :param compress: compress the responses, needs dash[compress]
         :return: the application layout
         """
         return init_app_pdb(
@@ -609,4 +1467,7 @@ class Visualizator:
             self.fig,
             self.dim_red,
             tsne_paras,
+            self.pending_dim_reds,
+            self.dim,
+            compress,
         )
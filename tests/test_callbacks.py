@@ -4,8 +4,14 @@ from pathlib import Path
 import numpy
 import numpy as np
 
-from src.callbacks import get_callbacks, get_callbacks_pdb
+from src.callbacks import (
+    get_callbacks,
+    get_callbacks_pdb,
+    tsne_paras_to_string,
+    umap_paras_to_string,
+)
 from src.preprocessing import DataPreprocessor
+from src.projectionstore import ProjectionStore
 from src.structurecontainer import StructureContainer
 from src.visualization.visualizator import Visualizator
 
@@ -101,8 +107,14 @@ def setup():
     else:
         ids = df.index.to_list()
 
-    umap_paras_dict = data_preprocessor.get_umap_paras_dict(df)
-    tsne_paras_dict = data_preprocessor.get_tsne_paras_dict(df)
+    projection_store = ProjectionStore.from_df(
+        df,
+        {
+            "UMAP": umap_paras_to_string(umap_paras),
+            "TSNE": tsne_paras_to_string(tsne_paras),
+        },
+    )
+    df = df.drop(columns=DataPreprocessor.AXIS_NAMES, errors="ignore")
 
     # --- APP creation ---
     if structure_container.pdb_flag:
@@ -110,7 +122,7 @@ def setup():
     else:
         application = visualizator.get_base_app(umap_paras, tsne_paras, ids)
 
-    download_graph, expand_sequence, handle_graph_canvas, ts_ss, silhouette = get_callbacks(application, df, original_id_col, umap_paras, tsne_paras, output_d, csv_header, embeddings, embedding_uids, distance_dic, umap_paras_dict, tsne_paras_dict, fasta_dict, structure_container)
+    download_graph, expand_sequence, handle_graph_canvas, ts_ss, silhouette = get_callbacks(application, df, original_id_col, umap_paras, tsne_paras, output_d, csv_header, embeddings, embedding_uids, distance_dic, projection_store, fasta_dict, structure_container)
 
     return download_graph, expand_sequence, handle_graph_canvas, ts_ss, silhouette
 
@@ -123,7 +135,7 @@ def setup():
 def test_download_graph():
     def run_callback():
         context_value.set(AttributeDict(**{"triggered_inputs": [{"prop_id": "graph_download_button.n_clicks"}, {"prop_id": "button_graph_all.n_clicks"}]}))
-        return download_graph("Assigned group", 1, 1, "UMAP", "2D")
+        return download_graph("Assigned group", 1, 1, "UMAP", "2D", None, [])
 
     download_graph, two, three, four, five = setup()
     ctx = copy_context()
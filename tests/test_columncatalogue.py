@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from src.columncatalogue import ColumnCatalogue
+
+
+def create_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        dict(
+            group=["b", "a", np.nan, "b"],
+            length=[120.0, 80.0, np.nan, 100.0],
+        ),
+        index=["P0", "P1", "P2", "P3"],
+    )
+
+
+def test_describe_columns():
+    catalogue = ColumnCatalogue.from_df(create_df(), ["group", "length"])
+    assert catalogue.columns() == ["group", "length"]
+
+    group = catalogue.get(create_df(), "group")
+    assert group["groups"][:2] == ["a", "b"]
+    assert group["codes"].tolist() == [1, 0, 2, 1]
+    assert group["nan_mask"].tolist() == [False, False, True, False]
+    assert not group["numeric"]
+    assert len(group["colors"]) == 2
+
+    length = catalogue.get(create_df(), "length")
+    assert length["numeric"]
+    assert length["range"] == (80.0, 120.0)
+    assert length["n_symbols"] == 1
+
+
+def test_saved_descriptions(tmp_path):
+    path = tmp_path / "columns.pkl"
+    df = create_df()
+    ColumnCatalogue.from_df(df, ["group"], path)
+
+    index_fingerprint = ColumnCatalogue.fingerprint(
+        df.index, categorize=False
+    )
+    catalogue = ColumnCatalogue(path, index_fingerprint)
+    catalogue.load()
+    assert catalogue.columns() == ["group"]
+    # unchanged values aren't described again
+    assert not catalogue.describe(df, "group")
+
+    df.loc["P2", "group"] = "c"
+    assert catalogue.describe(df, "group")
+    assert catalogue.get(df, "group")["groups"] == ["a", "b", "c"]
+
+    # the changed description is saved
+    catalogue = ColumnCatalogue(path, index_fingerprint)
+    catalogue.load()
+    assert catalogue.get(df, "group")["groups"] == ["a", "b", "c"]
+
+    # descriptions of other IDs aren't used
+    catalogue = ColumnCatalogue(path, index_fingerprint + 1)
+    catalogue.load()
+    assert catalogue.columns() == []
@@ -0,0 +1,47 @@
+import gzip
+
+import pytest
+from dash import html
+from flask import jsonify
+
+from src.visualization.base import get_app
+
+
+def get_client():
+    app = get_app(compress=True)
+    app.layout = html.Div()
+    server = app.server
+
+    @server.route("/large")
+    def large():
+        return jsonify(x=list(range(1000)))
+
+    @server.route("/small")
+    def small():
+        return jsonify(x=1)
+
+    return server.test_client()
+
+
+def test_large_response_is_compressed():
+    pytest.importorskip("flask_compress")
+
+    response = get_client().get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data).startswith(b'{"x":[0,1,2')
+
+
+def test_not_compressed():
+    pytest.importorskip("flask_compress")
+    client = get_client()
+
+    # below the threshold
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+    # not accepted by the browser
+    response = client.get("/large")
+    assert "Content-Encoding" not in response.headers
+    assert response.json["x"][-1] == 999
@@ -0,0 +1,51 @@
+import plotly.graph_objects as go
+
+from src.figurecache import FigureCache
+
+
+def render(name: str):
+    return lambda: go.Figure(go.Scatter(x=[1, 2], y=[3, 4], name=name))
+
+
+def test_figure_cache_hits_and_misses():
+    cache = FigureCache(max_size=2)
+    key = FigureCache.key("group", "PCA", "", "3D")
+
+    fig = cache.get(key, render("a"))
+    assert fig["data"][0]["name"] == "a"
+
+    # cached figure is returned without rendering
+    fig = cache.get(key, render("b"))
+    assert fig["data"][0]["name"] == "a"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_figure_cache_lru_eviction():
+    cache = FigureCache(max_size=2)
+    keys = [FigureCache.key(col, "PCA", "", "3D") for col in ["a", "b", "c"]]
+
+    cache.get(keys[0], render("a"))
+    cache.get(keys[1], render("b"))
+    # a is used more recently than b
+    cache.get(keys[0], render("a"))
+    cache.get(keys[2], render("c"))
+
+    assert cache.get(keys[0], render("new"))["data"][0]["name"] == "a"
+    assert cache.get(keys[1], render("new"))["data"][0]["name"] == "new"
+
+
+def test_figure_cache_invalidate():
+    cache = FigureCache()
+    umap_key = FigureCache.key("group", "UMAP", "25 ; 0.5 ; euclidean", "3D")
+    pca_key = FigureCache.key("group", "PCA", "", "3D")
+    cache.get(umap_key, render("umap"))
+    cache.get(pca_key, render("pca"))
+
+    cache.invalidate("UMAP")
+
+    assert cache.get(umap_key, render("new"))["data"][0]["name"] == "new"
+    assert cache.get(pca_key, render("new"))["data"][0]["name"] == "pca"
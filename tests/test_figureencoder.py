@@ -0,0 +1,74 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from src.figureencoder import FigureEncoder
+
+
+def test_encode_traces():
+    encoder = FigureEncoder(["P0", "P1", "P2"])
+    fig = go.Figure(
+        [
+            go.Scatter3d(
+                x=[0.5, 1.0], y=[2.0, np.nan], z=[3.0, 4.0], text=["P2", "P0"]
+            ),
+            go.Scatter3d(x=[], y=[], z=[]),
+        ]
+    )
+
+    encoded = encoder.encode(fig)
+    trace = encoded["data"][0]
+
+    assert trace["x"]["dtype"] == "f4"
+    assert FigureEncoder.decode_array(trace["x"]).tolist() == [0.5, 1.0]
+    assert np.isnan(FigureEncoder.decode_array(trace["y"])[1])
+    assert trace["text"]["dtype"] == "u2"
+    assert FigureEncoder.decode_array(trace["text"]).tolist() == [2, 0]
+    # empty traces and the layout are kept
+    assert list(encoded["data"][1]["x"]) == []
+    assert encoded["layout"] == fig.to_plotly_json()["layout"]
+
+
+def test_encode_marker_colors():
+    encoder = FigureEncoder(["P0", "P1"])
+    fig = go.Figure(
+        [
+            go.Scatter(x=[0.0, 1.0], marker=dict(color=[3.5, 1.0])),
+            go.Scatter(x=[2.0], marker=dict(color="rgb(1, 2, 3)")),
+        ]
+    )
+
+    encoded = encoder.encode(fig)
+
+    colors = encoded["data"][0]["marker"]["color"]
+    assert FigureEncoder.decode_array(colors).tolist() == [3.5, 1.0]
+    assert encoded["data"][1]["marker"]["color"] == "rgb(1, 2, 3)"
+
+
+def test_hover_values_are_exact():
+    encoder = FigureEncoder(["P0", "P1"])
+    fig = go.Figure(
+        [
+            go.Scatter(
+                x=[0.0, 1.0],
+                marker=dict(color=[87.3, 64.1]),
+                customdata=["87.3", "64.1"],
+                hovertemplate="%{text}<extra>%{customdata}</extra>",
+            )
+        ]
+    )
+
+    encoded = encoder.encode(fig)["data"][0]
+
+    # float32 can't represent the values, the hover shows them from the customdata
+    colors = FigureEncoder.decode_array(encoded["marker"]["color"])
+    assert colors.tolist() != [87.3, 64.1]
+    assert np.allclose(colors, [87.3, 64.1])
+    assert list(encoded["customdata"]) == ["87.3", "64.1"]
+
+
+def test_unknown_text_is_kept():
+    encoder = FigureEncoder(["P0", "P1"])
+
+    encoded = encoder.encode(dict(data=[dict(x=[1.0], text=["not an ID"])]))
+
+    assert encoded["data"][0]["text"] == ["not an ID"]
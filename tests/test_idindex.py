@@ -0,0 +1,29 @@
+import pytest
+
+from src.idindex import IdIndex
+
+
+def test_mapped_and_original():
+    id_index = IdIndex(["M0", "M1", "M2"], ["P0", "P1", "P2"])
+
+    assert id_index.to_mapped(["P2", "P0"]) == ["M2", "M0"]
+    assert id_index.to_original(["M1", "M2"]) == ["P1", "P2"]
+    assert id_index.positions(["M2", "M1"]).tolist() == [2, 1]
+    assert id_index.original_positions(["P1"]).tolist() == [1]
+
+
+def test_not_mapped():
+    id_index = IdIndex(["P0", "P1"])
+
+    assert id_index.to_mapped(["P1"]) == ["P1"]
+    assert id_index.to_original(["P0"]) == ["P0"]
+
+
+def test_unknown_id():
+    id_index = IdIndex(["M0", "M1"], ["P0", "P1"])
+
+    with pytest.raises(KeyError):
+        id_index.to_mapped(["P5"])
+
+    with pytest.raises(ValueError):
+        IdIndex(["M0", "M1"], ["P0"])
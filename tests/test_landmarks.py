@@ -0,0 +1,49 @@
+import numpy as np
+from sklearn.decomposition import PCA
+
+from src.landmarks import Landmarks, nearest_neighbours, select_landmarks
+
+
+def test_select_landmarks_stratified():
+    labels = ["a"] * 900 + ["b"] * 95 + ["c"] * 5
+    indexes = select_landmarks(len(labels), 100, labels)
+
+    assert len(indexes) == 100
+    assert len(np.unique(indexes)) == 100
+
+    sampled = np.asarray(labels)[indexes]
+    assert (sampled == "a").sum() == 90
+    assert (sampled == "b").sum() in [9, 10]
+    # small groups keep at least one landmark
+    assert (sampled == "c").sum() >= 1
+
+
+def test_select_landmarks_all_points():
+    assert select_landmarks(10, 20).tolist() == list(range(10))
+
+
+def test_nearest_neighbours():
+    rng = np.random.default_rng(42)
+    points = rng.normal(size=(200, 8))
+    queries = rng.normal(size=(5, 8))
+
+    idx, dist = nearest_neighbours(queries, points, 4)
+    full = np.linalg.norm(queries[:, None] - points[None], axis=2)
+
+    assert np.array_equal(idx, np.argsort(full, axis=1)[:, :4])
+    assert np.allclose(dist, np.sort(full, axis=1)[:, :4])
+
+
+def test_landmark_fit_transform():
+    rng = np.random.default_rng(42)
+    data = rng.normal(size=(500, 16)).astype(np.float32)
+    indexes = select_landmarks(len(data), 100)
+
+    landmarks = Landmarks(indexes, "knn", verbose=True)
+    coords = landmarks.fit_transform(PCA(n_components=2), data)
+
+    assert coords.shape == (500, 2)
+    assert np.allclose(
+        coords[indexes], PCA(n_components=2).fit_transform(data[indexes])
+    )
+    assert set(landmarks.last_quality.keys()) == {"landmarks", "placed"}
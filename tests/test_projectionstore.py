@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from src.projectionstore import ProjectionStore
+
+
+def get_df():
+    return pd.DataFrame(
+        {
+            "group": ["a", "b", "c"],
+            "x_pca_3D": [0.0, 1.0, 2.0],
+            "y_pca_3D": [3.0, 4.0, 5.0],
+            "z_pca_3D": [6.0, 7.0, 8.0],
+        },
+        index=["P0", "P1", "P2"],
+    )
+
+
+def test_from_df():
+    store = ProjectionStore.from_df(get_df(), {"UMAP": "25 ; 0.5 ; euclidean"})
+
+    assert store.get("PCA", "3D", "").tolist() == [[0, 3, 6], [1, 4, 7], [2, 5, 8]]
+    assert store.get("PCA", "2D", "").tolist() == [[0, 3], [1, 4], [2, 5]]
+    assert not store.has_view("UMAP", "3D", "25 ; 0.5 ; euclidean")
+    assert store.paras_strings("UMAP") == []
+
+
+def test_add():
+    store = ProjectionStore.from_df(get_df(), {"UMAP": "25 ; 0.5 ; euclidean"})
+
+    # coordinates in another row order are aligned to the dataframe
+    coords_df = pd.DataFrame(
+        {"x_umap_2D": [2.0, 0.0, 1.0], "y_umap_2D": [5.0, 3.0, 4.0]},
+        index=["P2", "P0", "P1"],
+    )
+    store.add("UMAP", "25 ; 0.5 ; euclidean", coords_df)
+    store.add("UMAP", "10 ; 0.1 ; euclidean", coords_df * 2)
+
+    assert store.get("UMAP", "2D", "25 ; 0.5 ; euclidean").tolist() == [
+        [0, 3],
+        [1, 4],
+        [2, 5],
+    ]
+    assert store.paras_strings("UMAP") == [
+        "25 ; 0.5 ; euclidean",
+        "10 ; 0.1 ; euclidean",
+    ]
+
+    coords = store.get("UMAP", "2D", "10 ; 0.1 ; euclidean")
+    assert coords[:, 0].tolist() == [0, 2, 4]
+    assert not store.has_view("UMAP", "3D", "10 ; 0.1 ; euclidean")
+
+
+def test_to_frame():
+    store = ProjectionStore.from_df(get_df(), dict())
+
+    frame = store.to_frame("PCA", "")
+
+    assert list(frame.columns) == ["x_pca_3D", "y_pca_3D", "z_pca_3D"]
+    assert frame.index.tolist() == ["P0", "P1", "P2"]
+    assert np.array_equal(frame.to_numpy(), store.get("PCA", "3D", ""))
+
+
+def test_spatial_index():
+    store = ProjectionStore.from_df(get_df(), dict())
+
+    index = store.spatial_index("PCA", "2D", "")
+    assert index.box([[0.5, 2.5], None]).tolist() == [1, 2]
+    # built once per view
+    assert store.spatial_index("PCA", "2D", "") is index
+    assert store.spatial_index("UMAP", "2D", "") is None
+
+    # replaced with the view
+    store.add("PCA", "", get_df() * 1)
+    assert store.spatial_index("PCA", "2D", "") is not index
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+
+from src.queryprojector import QueryProjector
+
+
+def setup(tmp_path: Path):
+    rng = np.random.default_rng(42)
+    embeddings = rng.normal(size=(50, 16)).astype(np.float32)
+    ids = [f"P{idx}" for idx in range(50)]
+    umap_paras = dict(n_neighbours=10, min_dist=0.5, metric="euclidean")
+
+    query_projector = QueryProjector(
+        embeddings, ids, tmp_path / "models.pkl", umap_paras, False
+    )
+
+    return query_projector, embeddings
+
+
+def test_project_pca(tmp_path):
+    query_projector, embeddings = setup(tmp_path)
+
+    coords, neighbour_ids, distances = query_projector.project(
+        embeddings[:5], dim_red="PCA", dim="2D", k=3
+    )
+    expected = PCA(n_components=3, random_state=42).fit_transform(embeddings)
+
+    assert coords.shape == (5, 2)
+    assert np.allclose(coords, expected[:5, :2], atol=1e-4)
+    # each map protein is its own nearest neighbour
+    assert neighbour_ids[:, 0].tolist() == ["P0", "P1", "P2", "P3", "P4"]
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+
+def test_models_are_persisted(tmp_path):
+    query_projector, embeddings = setup(tmp_path)
+    query_projector.project(embeddings[0], dim_red="PCA", dim="3D")
+
+    assert (tmp_path / "models.pkl").is_file()
+
+    reloaded, _ = setup(tmp_path)
+    assert reloaded.get_model("PCA", "3D") is not None
+
+
+def test_dimension_mismatch(tmp_path):
+    query_projector, _ = setup(tmp_path)
+
+    with pytest.raises(ValueError):
+        query_projector.project(np.ones((2, 8)), dim_red="PCA")
+
+    with pytest.raises(ValueError):
+        query_projector.project(np.ones((2, 16)), dim_red="TSNE")
+
+
+def test_fitted_models_are_reused(tmp_path):
+    rng = np.random.default_rng(42)
+    embeddings = rng.normal(size=(50, 16)).astype(np.float32)
+    ids = [f"P{idx}" for idx in range(50)]
+    umap_paras = dict(n_neighbours=10, min_dist=0.5, metric="euclidean")
+    # stands in for the UMAP model the map was generated with
+    fitted = PCA(n_components=2, random_state=42).fit(embeddings)
+
+    query_projector = QueryProjector(
+        embeddings,
+        ids,
+        tmp_path / "models.pkl",
+        umap_paras,
+        False,
+        fitted_models={"2D": fitted},
+    )
+
+    assert query_projector.get_model("UMAP", "2D") is fitted
+    # persisted at the start, before any query
+    reloaded, _ = setup(tmp_path)
+    assert isinstance(reloaded.get_model("UMAP", "2D"), PCA)
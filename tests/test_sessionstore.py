@@ -0,0 +1,43 @@
+from src.sessionstore import SessionStore
+
+
+def get_defaults():
+    return dict(
+        UMAP=dict(n_neighbours=25, min_dist=0.5, metric="euclidean"),
+        TSNE=dict(
+            iterations=1000,
+            perplexity=30.0,
+            learning_rate="auto",
+            tsne_metric="euclidean",
+        ),
+    )
+
+
+def test_sessions_are_independent():
+    defaults = get_defaults()
+    store = SessionStore(defaults)
+
+    paras = store.paras("a", "UMAP")
+    paras["n_neighbours"] = 10
+    store.set_paras("a", "UMAP", paras)
+
+    assert store.paras("a", "UMAP")["n_neighbours"] == 10
+    assert store.paras("b", "UMAP")["n_neighbours"] == 25
+    assert store.paras("a", "TSNE") == defaults["TSNE"]
+    # the defaults aren't changed by a session
+    assert defaults["UMAP"]["n_neighbours"] == 25
+    assert store.paras(None, "UMAP")["n_neighbours"] == 25
+
+
+def test_least_recently_used_session_is_removed():
+    store = SessionStore(get_defaults(), max_size=2)
+
+    for session_id, n_neighbours in [("a", 5), ("b", 10)]:
+        store.set_paras(session_id, "UMAP", dict(n_neighbours=n_neighbours))
+    # a is used more recently than b
+    store.paras("a", "UMAP")
+    store.set_paras("c", "UMAP", dict(n_neighbours=15))
+
+    assert len(store) == 2
+    assert store.paras("a", "UMAP")["n_neighbours"] == 5
+    assert store.paras("b", "UMAP")["n_neighbours"] == 25
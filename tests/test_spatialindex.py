@@ -0,0 +1,44 @@
+import numpy as np
+from matplotlib.path import Path
+
+from src.spatialindex import SpatialIndex
+
+
+def test_box():
+    rng = np.random.default_rng(42)
+    coords = rng.normal(size=(5000, 3))
+    coords[7] = np.nan
+    index = SpatialIndex(coords)
+
+    bounds = [[-0.5, 1.0], [0.2, 0.0], None]
+    inside = (
+        (coords[:, 0] >= -0.5)
+        & (coords[:, 0] <= 1.0)
+        & (coords[:, 1] >= 0.0)
+        & (coords[:, 1] <= 0.2)
+    )
+    assert index.box(bounds).tolist() == np.flatnonzero(inside).tolist()
+    # points without coordinates are left out
+    assert len(index.box([None, None, None])) == 4999
+    assert len(index.box([[10.0, 11.0], None, None])) == 0
+
+
+def test_lasso():
+    rng = np.random.default_rng(42)
+    coords = rng.normal(size=(5000, 2))
+    index = SpatialIndex(coords)
+
+    polygon = np.array([[0.0, 0.0], [1.5, 0.0], [0.0, 1.5]])
+    inside = Path(polygon).contains_points(coords)
+    assert index.lasso(polygon).tolist() == np.flatnonzero(inside).tolist()
+
+
+def test_nearest():
+    coords = np.array([[0.0, 0.0], [np.nan, 0.0], [1.0, 1.0], [5.0, 5.0]])
+    index = SpatialIndex(coords)
+
+    assert index.nearest([[0.2, 0.1], [0.9, 1.2], [4.0, 4.0]]).tolist() == [
+        0,
+        2,
+        3,
+    ]
@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+
+from src.visualization.visualizator import Visualizator
+
+
+def create_df(groups: list) -> pd.DataFrame:
+    df = pd.DataFrame(
+        np.arange(len(groups) * 3, dtype=float).reshape(-1, 3),
+        index=[f"P{i}" for i in range(len(groups))],
+        columns=["x_pca_3D", "y_pca_3D", "z_pca_3D"],
+    )
+    df["group"] = groups
+    df["variance"] = np.nan
+    df.iloc[:3, df.columns.get_loc("variance")] = [40.0, 30.0, 20.0]
+
+    return df
+
+
+def render(df: pd.DataFrame, **kwargs):
+    return Visualizator.render(
+        df,
+        "group",
+        None,
+        dict(),
+        dict(),
+        "PCA",
+        **kwargs,
+    )
+
+
+def test_trace_per_group():
+    df = create_df(["b", "a", "b", np.nan])
+
+    fig = render(df)
+
+    assert [trace.name for trace in fig.data] == ["a", "b", "nan"]
+    assert list(fig.data[1].text) == ["P0", "P2"]
+
+
+def test_single_trace():
+    df = create_df(["b", "a", "b", np.nan])
+
+    fig = render(df, single_trace=True)
+
+    # a legend entry without points per group and all points in the last trace
+    assert [trace.name for trace in fig.data[:-1]] == ["a", "b", "nan"]
+    assert all(list(trace.x) == [None] for trace in fig.data[:-1])
+    points = fig.data[-1]
+    assert list(points.text) == ["P0", "P1", "P2", "P3"]
+    assert list(points.marker.color) == [1, 0, 1, 2]
+    assert list(points.customdata) == ["b", "a", "b", "nan"]
+    assert points.x.tolist() == df["x_pca_3D"].tolist()
+
+
+def test_df_is_not_changed():
+    df = create_df(["b", "a", "b", np.nan])
+    expected = df.copy()
+
+    for single_trace in [False, True]:
+        fig = Visualizator.render(
+            df,
+            "group",
+            np.array(["O0", "O1", "O2", "O3"], dtype=object),
+            dict(),
+            dict(),
+            "PCA",
+            single_trace=single_trace,
+        )
+
+        # the original IDs are displayed
+        assert sorted(id for trace in fig.data for id in trace.text or []) == [
+            "O0",
+            "O1",
+            "O2",
+            "O3",
+        ]
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_single_trace_above_threshold():
+    groups = [str(i) for i in range(Visualizator.SINGLE_TRACE_THRESHOLD + 1)]
+
+    fig = render(create_df(groups), two_d=True, legend_groups=0)
+
+    assert len(fig.data) == len(groups) + 1
+    assert fig.data[-1].type == "scatter"
+    assert len(fig.data[-1].text) == len(groups)
+
+    # decided by the number of groups before folding
+    fig = render(create_df(groups), two_d=True)
+
+    legend_groups = Visualizator.LEGEND_GROUPS
+    assert len(fig.data) == legend_groups + 2
+    assert fig.data[legend_groups].name == "other (51 groups)"
+    assert len(fig.data[-1].text) == len(groups)
+
+
+def test_webgl():
+    df = create_df(["b", "a", "b", np.nan])
+
+    fig = render(df, two_d=True, webgl=True)
+    Visualizator.add_highlight_traces(fig, two_d=True)
+
+    assert {trace.type for trace in fig.data} == {"scattergl"}
+    # chosen by the number of points if not given
+    assert render(df, two_d=True).data[0].type == "scatter"
+
+
+def test_group_column():
+    values = pd.Series(["b", np.nan, "B", 2, "a", 1.5, "b"], dtype=object)
+
+    col_groups, codes, group_rows = Visualizator.group_column(values)
+
+    # numbers, strings case-insensitive, missing values last
+    assert col_groups[:-1] == [1.5, 2, "a", "b", "B"]
+    assert pd.isna(col_groups[-1])
+    assert codes.tolist() == [3, 5, 4, 1, 2, 0, 3]
+    assert [rows.tolist() for rows in group_rows] == [
+        [5],
+        [3],
+        [4],
+        [0, 6],
+        [2],
+        [1],
+    ]
+
+
+def test_continuous_colors():
+    df = create_df(["b", "a", "b", np.nan])
+    df["length"] = [120.0, 80.0, np.nan, 100.0]
+
+    fig = Visualizator.render(df, "length", None, dict(), dict(), "PCA")
+
+    # colored by value in one trace, the protein without value in grey
+    points, missing = fig.data
+    assert list(points.marker.color) == [120.0, 80.0, 100.0]
+    assert (points.marker.cmin, points.marker.cmax) == (80.0, 120.0)
+    assert points.marker.showscale
+    assert list(points.text) == ["P0", "P1", "P3"]
+    assert list(missing.text) == ["P2"]
+
+    # the hover shows the values of the column, not the float32 colors
+    df["plddt"] = [87.3, 64.1, 90.2, np.nan]
+    points = Visualizator.render(
+        df, "plddt", None, dict(), dict(), "PCA"
+    ).data[0]
+    assert list(points.customdata) == ["87.3", "64.1", "90.2"]
+    assert "%{customdata}" in points.hovertemplate
+
+    df["flag"] = [True, False, True, False]
+    points = Visualizator.render(
+        df, "flag", None, dict(), dict(), "PCA"
+    ).data[0]
+    assert list(points.customdata) == ["True", "False", "True", "False"]
+
+    # a trace per value and the colorbar
+    fig = Visualizator.render(
+        df, "length", None, dict(), dict(), "PCA", continuous=False
+    )
+    assert len(fig.data) == 5
+
+
+def test_distinct_colors():
+    np.random.seed(0)
+    expected = np.random.random_sample()
+    Visualizator.distinct_palette.cache_clear()
+
+    np.random.seed(0)
+    colors = Visualizator.gen_distinct_colors(12)
+
+    # the global random state isn't used
+    assert np.random.random_sample() == expected
+    assert len(set(colors)) == 12
+    # generated once per number of groups, the same colors each time
+    assert Visualizator.gen_distinct_colors(12) == colors
+    assert Visualizator.distinct_palette.cache_info().misses == 1
+
+
+def test_density_grid():
+    coords = np.array([[0.0, 0.0], [0.1, 0.1], [0.2, 0.0], [1.0, 1.0]])
+    codes = np.array([1, 0, 1, 2])
+
+    grid = Visualizator.density_grid(
+        coords, codes, bins=2, values=np.array([1.0, 2.0, 6.0, np.nan])
+    )
+
+    assert grid["counts"].tolist() == [3, 1]
+    assert grid["majority"].tolist() == [1, 2]
+    np.testing.assert_allclose(grid["centroids"], [[0.1, 1 / 30], [1, 1]])
+    assert grid["means"][0] == 3.0
+    assert np.isnan(grid["means"][1])
+
+
+def test_level_of_detail():
+    df = create_df(["b", "a", "b", np.nan])
+
+    fig = render(df, two_d=True, lod=True)
+
+    # legend entries and a marker per occupied cell with the nearest ID
+    assert [trace.name for trace in fig.data[:-1]] == ["a", "b", "nan"]
+    assert list(fig.data[-1].text) == ["P0", "P1", "P2", "P3"]
+
+    # only the points in the viewport at full resolution
+    fig = render(df, two_d=True, lod=False, viewport=[[2.5, 7], None])
+    assert [list(trace.text) for trace in fig.data] == [["P1"], ["P2"], []]
+    assert list(fig.layout.xaxis.range) == [2.5, 7]
+
+    # the float32 means are formatted in the hover
+    df["plddt"] = [73.42, 80.0, 60.1, np.nan]
+    fig = Visualizator.render(
+        df, "plddt", None, dict(), dict(), "PCA", two_d=True, lod=True
+    )
+    assert "%{marker.color:.4~g}" in fig.data[0].hovertemplate
+
+
+def test_fold_groups():
+    groups = ["a", "b", "b", "c", "c", "c", "d", np.nan]
+    df = create_df(groups)
+
+    fig = render(df, legend_groups=2)
+
+    # the two largest groups, the others folded
+    assert [trace.name for trace in fig.data] == [
+        "b",
+        "c",
+        "other (2 groups)",
+        "nan",
+    ]
+    assert list(fig.data[2].text) == ["P0", "P6"]
+    # with the colors they have without folding
+    colors = Visualizator.gen_distinct_colors(4)
+    assert fig.data[0].marker.color == f"rgb{colors[1]}"
+    assert fig.data[2].marker.color == f"rgb{Visualizator.OTHER_COLOR}"
+
+    fig = render(df, legend_groups=2, promoted=["d"])
+    names = [trace.name for trace in fig.data]
+    assert names == ["b", "c", "d", "other (1 group)", "nan"]
+
+    # a value of the column isn't merged with the folded groups
+    df = create_df(["other (2 groups)"] * 3 + groups[1:])
+    names = [trace.name for trace in render(df, legend_groups=2).data]
+    assert names == ["c", "other (2 groups)", "other (2 groups)*", "nan"]